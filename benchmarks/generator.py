@@ -0,0 +1,154 @@
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.schema import DATE_FORMAT, PAYMENT_DATE_FORMAT
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+
+class CategoryProfile(NamedTuple):
+    """Профиль категории: доля операций, MCC, продавцы, медиана суммы и доля поступлений."""
+    weight: float
+    mcc: Optional[int]
+    merchants: Tuple[str, ...]
+    median_amount: float
+    income_share: float
+
+
+# Распределения по мотивам data/operations.xlsx
+CATEGORY_PROFILES: Dict[str, CategoryProfile] = {
+    'Супермаркеты': CategoryProfile(0.341, 5411, ('Колхоз', 'Магнит', 'SPAR', 'Дикси', 'Пятерочка', 'Перекресток'),
+                                    110.0, 0.0),
+    'Фастфуд': CategoryProfile(0.194, 5814, ("McDonald's", 'Rumyanyj Khleb', 'Бургер Кинг', 'KFC'), 110.0, 0.0),
+    'Транспорт': CategoryProfile(0.057, 4121, ('Яндекс Такси', 'Метро Санкт-Петербург', 'Стрелка',
+                                               'Московский транспорт'), 186.0, 0.0),
+    'Переводы': CategoryProfile(0.053, 6012, ('Перевод Кредитная карта. ТП 10.2 RUR', 'Перевод на карту',
+                                              'Пополнение счета', 'Иван С.', 'Сергей З.', 'Артем П.'), 500.0, 0.34),
+    'Ж/д билеты': CategoryProfile(0.037, 4111, ('РЖД', 'Московский метрополитен',
+                                                'Северо-Западная пригородная пассажирская компания'), 300.0, 0.05),
+    'Различные товары': CategoryProfile(0.034, 5331, ('Улыбка радуги', 'Fix Price', 'Stolovaya'), 130.0, 0.01),
+    'Связь': CategoryProfile(0.029, 4814, ('МТС', 'Тинькофф Мобайл +7 995 555-55-55', 'Я МТС +7 921 11-22-33',
+                                           'REG.RU'), 250.0, 0.0),
+    'Пополнения': CategoryProfile(0.027, 6012, ('Перевод с карты', 'Внесение наличных через банкомат Тинькофф'),
+                                  7000.0, 1.0),
+    'Аптеки': CategoryProfile(0.023, 5912, ('Apteka 7', 'Аптека Вита', 'Apteka2965 Antares'), 351.0, 0.0),
+    'Каршеринг': CategoryProfile(0.018, 7512, ('Ситидрайв', 'Делимобиль'), 50.0, 0.03),
+    'Рестораны': CategoryProfile(0.018, 5812, ('OOO "Nord-S"', 'Kebab 24 Mm', 'Fethiye Restoran'), 111.0, 0.0),
+    'Бонусы': CategoryProfile(0.015, None, ('Вознаграждение за операции покупок', 'Проценты на остаток по счету'),
+                              390.0, 1.0),
+    'Наличные': CategoryProfile(0.015, 6011, ('Снятие в банкомате Сбербанк', 'Снятие в банкомате Тинькофф'),
+                                3500.0, 0.0),
+    'Дом и ремонт': CategoryProfile(0.015, 5211, ('Строитель', 'МаксидоМ', 'Леруа Мерлен'), 320.0, 0.0),
+    'Услуги банка': CategoryProfile(0.014, None, ('Плата за оповещения об операциях', 'Плата за обслуживание'),
+                                    59.0, 0.0),
+    'Топливо': CategoryProfile(0.011, 5541, ('Circle K', 'ЛУКОЙЛ', 'Газпромнефть'), 149.0, 0.0),
+    'Другое': CategoryProfile(0.099, 5999, ('Ozon.ru', 'Wildberries', 'Яндекс Маркет'), 400.0, 0.02),
+}
+
+# Карты и их доли (пропуск номера — операции по счету)
+CARDS: Tuple[Tuple[Optional[str], float], ...] = (
+    ('*7197', 0.72), ('*4556', 0.17), (None, 0.097), ('*5091', 0.008), ('*5441', 0.002), ('*1112', 0.001),
+    ('*5507', 0.001), ('*6002', 0.001)
+)
+
+# Валюты операций, их доли и курсы к рублю
+CURRENCIES: Tuple[Tuple[str, float, float], ...] = (
+    ('RUB', 0.9805, 1.0), ('TRY', 0.011, 4.5), ('EUR', 0.0043, 90.0), ('CNY', 0.0027, 12.0), ('USD', 0.0015, 75.0)
+)
+
+# Доля операций с кешбэком и с ошибкой
+CASHBACK_SHARE = 0.094
+FAILED_SHARE = 0.006
+
+# Доля операций у «длинного хвоста» продавцов, которых нет в профилях
+LONG_TAIL_SHARE = 0.08
+
+
+# Генерация синтетических транзакций
+def generate_transactions(rows: int, seed: int = 0, start: str = '2018-01-01', end: str = '2021-12-31',
+                          as_text: bool = True) -> pd.DataFrame:
+    """
+    Генерирует транзакции в схеме data/operations.xlsx. Результат полностью определяется seed.
+
+    :param rows: Число транзакций.
+    :param seed: Зерно генератора случайных чисел.
+    :param start: Первая дата периода.
+    :param end: Последняя дата периода.
+    :param as_text: Записывать ли даты строками (как в Excel-выгрузке); иначе — datetime.
+    :return: DataFrame с транзакциями в порядке убывания даты (как в выгрузке).
+    """
+    rng = np.random.default_rng(seed)
+    names = list(CATEGORY_PROFILES)
+    profiles = [CATEGORY_PROFILES[name] for name in names]
+    weights = np.array([profile.weight for profile in profiles])
+    category_codes = rng.choice(len(names), size=rows, p=weights / weights.sum())
+
+    # Время операции равномерно по периоду, с точностью до секунды
+    first = pd.Timestamp(start).value // 10 ** 9
+    last = (pd.Timestamp(end) + pd.Timedelta(days=1)).value // 10 ** 9
+    seconds = np.sort(rng.integers(first, last, size=rows))[::-1]
+    dates = pd.to_datetime(seconds, unit='s')
+
+    # Сумма: логнормальное распределение вокруг медианы категории; поступления положительные
+    medians = np.array([profile.median_amount for profile in profiles])[category_codes]
+    amounts = np.round(medians * rng.lognormal(0.0, 0.9, size=rows), 2)
+    income = rng.random(rows) < np.array([profile.income_share for profile in profiles])[category_codes]
+    amounts = np.where(income, amounts, -amounts)
+
+    descriptions = _descriptions(rng, profiles, category_codes, rows)
+    cards = _choice(rng, [card for card, _ in CARDS], [share for _, share in CARDS], rows)
+    currency_codes = rng.choice(len(CURRENCIES), size=rows, p=[share for _, share, _ in CURRENCIES])
+    currencies = np.array([currency for currency, _, _ in CURRENCIES], dtype=object)[currency_codes]
+    rates = np.array([rate for _, _, rate in CURRENCIES])[currency_codes]
+    payment_amounts = np.round(amounts, 2)
+    operation_amounts = np.round(amounts / rates, 2)
+
+    has_cashback = (rng.random(rows) < CASHBACK_SHARE) & ~income
+    cashback = np.where(has_cashback, np.floor(np.abs(payment_amounts) * rng.choice([0.01, 0.05], size=rows)),
+                        np.nan)
+    mcc = np.array([np.nan if profile.mcc is None else profile.mcc for profile in profiles])[category_codes]
+
+    frame = pd.DataFrame({
+        'Дата операции': dates.strftime(DATE_FORMAT) if as_text else dates,
+        'Дата платежа': dates.strftime(PAYMENT_DATE_FORMAT) if as_text else dates.normalize(),
+        'Номер карты': cards,
+        'Статус': np.where(rng.random(rows) < FAILED_SHARE, 'FAILED', 'OK'),
+        'Сумма операции': operation_amounts,
+        'Валюта операции': currencies,
+        'Сумма платежа': payment_amounts,
+        'Валюта платежа': 'RUB',
+        'Кэшбэк': cashback,
+        'Категория': np.array(names, dtype=object)[category_codes],
+        'MCC': mcc,
+        'Описание': descriptions,
+        'Бонусы (включая кэшбэк)': np.where(income, 0, np.floor(np.abs(payment_amounts) / 100)).astype('int64'),
+        'Округление на инвесткопилку': 0,
+        'Сумма операции с округлением': np.abs(payment_amounts)
+    })
+    logger.info(f"Сгенерировано {rows} транзакций (seed={seed}).")
+    return frame
+
+
+def _descriptions(rng: np.random.Generator, profiles: List[CategoryProfile], category_codes: np.ndarray,
+                  rows: int) -> np.ndarray:
+    # Продавец выбирается из профиля категории с убывающими долями (закон Ципфа),
+    # часть операций приходится на «длинный хвост» уникальных продавцов
+    descriptions = np.empty(rows, dtype=object)
+    for code, profile in enumerate(profiles):
+        positions = np.flatnonzero(category_codes == code)
+        shares = 1.0 / np.arange(1, len(profile.merchants) + 1)
+        descriptions[positions] = _choice(rng, list(profile.merchants), list(shares), len(positions))
+    tail = np.flatnonzero(rng.random(rows) < LONG_TAIL_SHARE)
+    tail_size = max(rows // 50, 1)
+    descriptions[tail] = np.char.add('IP Merchant ', rng.integers(0, tail_size, size=len(tail)).astype(str))
+    return descriptions
+
+
+def _choice(rng: np.random.Generator, values: List[Optional[str]], shares: List[float], size: int) -> np.ndarray:
+    probabilities = np.array(shares, dtype='float64')
+    codes = rng.choice(len(values), size=size, p=probabilities / probabilities.sum())
+    return np.array(values, dtype=object)[codes]
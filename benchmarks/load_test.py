@@ -0,0 +1,131 @@
+import argparse
+import http.client
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from src.server import WarmDataset, serve
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Запросы по умолчанию (даты — в периоде синтетических данных и data/operations.xlsx)
+DEFAULT_PATHS = (
+    '/health',
+    '/cashback?year=2021&month=6',
+    '/cashback?start=2021-02-14&end=2021-07-03',
+    '/search?q=%D0%BC%D0%B0%D0%B3%D0%BD%D0%B8%D1%82',
+    '/reports/category?category=%D0%A1%D1%83%D0%BF%D0%B5%D1%80%D0%BC%D0%B0%D1%80%D0%BA%D0%B5%D1%82%D1%8B'
+    '&date=2021-12-31',
+    '/reports/weekday?date=2021-12-31',
+    '/reports/workday?date=2021-12-31',
+)
+
+# Параметры по умолчанию
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DURATION = 10.0
+
+
+# Нагрузочный тест
+def run_load_test(base_url: str, paths: Sequence[str] = DEFAULT_PATHS, concurrency: int = DEFAULT_CONCURRENCY,
+                  duration: float = DEFAULT_DURATION) -> Dict[str, Any]:
+    """
+    Отправляет запросы к сервису из нескольких потоков (у каждого — постоянное соединение)
+    в течение заданного времени, перебирая адреса по кругу.
+
+    :param base_url: Адрес сервиса, например http://127.0.0.1:8000.
+    :param paths: Адреса запросов.
+    :param concurrency: Число одновременных клиентов.
+    :param duration: Длительность теста в секундах.
+    :return: Пропускная способность, процентили задержки в миллисекундах и число ошибок по адресам.
+    """
+    url = urlsplit(base_url)
+    deadline = time.perf_counter() + duration
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    errors: Dict[str, int] = {}
+    errors_lock = threading.Lock()
+
+    def client(number: int) -> None:
+        connection = http.client.HTTPConnection(url.hostname or 'localhost', url.port, timeout=60)
+        request = number
+        while time.perf_counter() < deadline:
+            path = paths[request % len(paths)]
+            request += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                failed = response.status != 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(url.hostname or 'localhost', url.port, timeout=60)
+                failed = True
+            if failed:
+                with errors_lock:
+                    errors[path] = errors.get(path, 0) + 1
+            else:
+                latencies[number].append(time.perf_counter() - started)
+        connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = np.concatenate([np.asarray(values) for values in latencies]) * 1000
+    p50, p95, p99 = np.percentile(all_latencies, [50, 95, 99]) if len(all_latencies) else (0.0, 0.0, 0.0)
+    return {
+        'requests': int(len(all_latencies)),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(all_latencies) / elapsed, 1),
+        'latency_ms': {'p50': round(float(p50), 2), 'p95': round(float(p95), 2), 'p99': round(float(p99), 2)},
+        'concurrency': concurrency
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Точка входа: python -m benchmarks.load_test."""
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервиса аналитики (src.server).")
+    parser.add_argument('--url', default=None, help="Адрес запущенного сервиса.")
+    parser.add_argument('--file', default=None,
+                        help="Excel-файл с операциями: запустить сервис в этом процессе на свободном порту.")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Число клиентов.")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help="Длительность, в секундах.")
+    parser.add_argument('--paths', nargs='*', default=list(DEFAULT_PATHS), help="Адреса запросов.")
+    args = parser.parse_args(argv)
+    if (args.url is None) == (args.file is None):
+        parser.error("Укажите ровно один из параметров --url или --file.")
+
+    logging.basicConfig(level=logging.WARNING)
+    server = dataset = None
+    base_url = args.url
+    if args.file is not None:
+        dataset = WarmDataset(args.file)
+        server = serve(dataset, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://{server.server_address[0]!s}:{server.server_address[1]}"
+
+    try:
+        result = run_load_test(base_url, args.paths, args.concurrency, args.duration)
+    finally:
+        if server is not None and dataset is not None:
+            server.shutdown()
+            server.server_close()
+            dataset.stop()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.scenarios import SCENARIOS, Dataset, Scenario, reset_caches
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+BASELINE_PATH = os.path.join(RESULTS_DIR, 'baseline.json')
+
+# Параметры по умолчанию
+DEFAULT_SIZES = (10_000, 100_000)
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.25
+
+
+# Замер одного сценария
+def measure(scenario: Scenario, dataset: Dataset, repeat: int = DEFAULT_REPEAT) -> Dict[str, float]:
+    """
+    Замеряет время (repeat запусков) и пиковую память (отдельный запуск под tracemalloc).
+
+    :param scenario: Сценарий.
+    :param dataset: Набор данных.
+    :param repeat: Число запусков для замера времени.
+    :return: Словарь с минимальным и медианным временем в секундах и пиком памяти в МБ.
+    """
+    if scenario.prepare is not None:
+        scenario.prepare(dataset)
+
+    timings = []
+    for _ in range(repeat):
+        reset_caches()
+        started = time.perf_counter()
+        scenario.run(dataset)
+        timings.append(time.perf_counter() - started)
+
+    reset_caches()
+    tracemalloc.start()
+    try:
+        scenario.run(dataset)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds_min': round(min(timings), 6),
+        'seconds_median': round(statistics.median(timings), 6),
+        'peak_mb': round(peak / 2 ** 20, 3)
+    }
+
+
+# Запуск набора сценариев
+def run_benchmarks(sizes: Sequence[int] = DEFAULT_SIZES, repeat: int = DEFAULT_REPEAT,
+                   selected: Optional[Sequence[str]] = None, seed: int = 0) -> Dict[str, Any]:
+    """
+    Выполняет сценарии для каждого размера данных.
+
+    :param sizes: Размеры наборов данных (число транзакций).
+    :param repeat: Число запусков для замера времени.
+    :param selected: Подстроки имен сценариев (по умолчанию все).
+    :param seed: Зерно генератора данных.
+    :return: Результаты: метаданные окружения и замеры по размерам и сценариям.
+    """
+    scenarios = [scenario for scenario in SCENARIOS
+                 if not selected or any(part in scenario.name for part in selected)]
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for rows in sizes:
+        dataset = Dataset(rows, seed=seed)
+        results[str(rows)] = {}
+        for scenario in scenarios:
+            if scenario.max_rows is not None and rows > scenario.max_rows:
+                continue
+            results[str(rows)][scenario.name] = measure(scenario, dataset, repeat)
+            print(f"{rows:>10} {scenario.name:<40} {_format(results[str(rows)][scenario.name])}", flush=True)
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'system': platform.system()
+        },
+        'repeat': repeat,
+        'seed': seed,
+        'results': results
+    }
+
+
+# Сравнение с базовыми результатами
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Сравнивает медианное время и пик памяти с базовыми результатами.
+
+    :param current: Текущие результаты.
+    :param baseline: Базовые результаты.
+    :param threshold: Допустимое отношение текущего значения к базовому.
+    :return: Список строк сравнения с отметкой регрессии.
+    """
+    rows = []
+    for size, scenarios in current['results'].items():
+        for name, values in scenarios.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if base is None:
+                continue
+            time_ratio = values['seconds_median'] / max(base['seconds_median'], 1e-9)
+            memory_ratio = values['peak_mb'] / max(base['peak_mb'], 1e-3)
+            rows.append({
+                'size': size, 'scenario': name, 'time_ratio': round(time_ratio, 3),
+                'memory_ratio': round(memory_ratio, 3),
+                'regression': time_ratio > threshold or memory_ratio > threshold
+            })
+    return rows
+
+
+def _format(values: Dict[str, float]) -> str:
+    return (f"min {values['seconds_min'] * 1000:10.2f} ms  median {values['seconds_median'] * 1000:10.2f} ms  "
+            f"peak {values['peak_mb']:9.2f} MB")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Точка входа: python -m benchmarks.run."""
+    parser = argparse.ArgumentParser(description="Замеры времени и памяти публичных функций FinAnalyzer.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="Размеры наборов данных (от 10 000 до 10 000 000 транзакций).")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Число запусков для замера времени.")
+    parser.add_argument('--scenarios', nargs='*', default=None, help="Подстроки имен сценариев.")
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'current.json'), help="Файл результатов.")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Файл базовых результатов.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Допустимое отношение к базовым результатам.")
+    parser.add_argument('--update-baseline', action='store_true', help="Сохранить результаты как базовые.")
+    args = parser.parse_args(argv)
+
+    # Сообщения модулей приложения не смешиваются с таблицей результатов
+    logging.basicConfig(level=logging.WARNING)
+
+    current = run_benchmarks(args.sizes, args.repeat, args.scenarios)
+    output = args.baseline if args.update_baseline else args.output
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"Результаты сохранены: {output}")
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    comparison = compare(current, baseline, args.threshold)
+    for row in comparison:
+        mark = 'РЕГРЕССИЯ' if row['regression'] else ''
+        print(f"{row['size']:>10} {row['scenario']:<40} "
+              f"время x{row['time_ratio']:<6} память x{row['memory_ratio']:<6} {mark}")
+    return 1 if any(row['regression'] for row in comparison) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
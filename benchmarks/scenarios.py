@@ -0,0 +1,101 @@
+import os
+import tempfile
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+from benchmarks.generator import generate_transactions
+from src.cashback import CashbackAnalysis
+from src.cube import AggregateCube
+from src.memo import DEFAULT_MEMO
+from src.reports import spending_by_category, spending_by_weekday, spending_by_workday
+from src.schema import normalize_transactions
+from src.services import (analyze_cashback_categories, investment_bank, investment_bank_table,
+                          search_personal_transfers, search_phone_numbers, simple_search)
+from src.store import TransactionStore
+from src.utils import load_transactions
+from src.views import get_card_summary, get_top_transactions
+
+# Наибольший размер Excel-файла для сценариев загрузки (запись большего файла занимает слишком долго)
+MAX_EXCEL_ROWS = 100_000
+
+# Наибольший размер списка словарей для investment_bank
+MAX_RECORD_ROWS = 1_000_000
+
+# Дата отчетов: последний день синтетического периода
+REPORT_DATE = '2021-12-31'
+
+
+class Dataset:
+    """Синтетические данные одного размера и производные от них структуры."""
+
+    def __init__(self, rows: int, seed: int = 0, work_dir: Optional[str] = None) -> None:
+        self.rows = rows
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='finanalyzer-bench-')
+        self.raw = generate_transactions(rows, seed=seed)
+        self.frame = normalize_transactions(self.raw)
+        self.store = TransactionStore(self.frame)
+        self.cube = AggregateCube.from_transactions(self.store)
+        self._excel_path: Optional[str] = None
+        self._records: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def excel_path(self) -> str:
+        """Excel-файл с данными (создается при первом обращении)."""
+        if self._excel_path is None:
+            self._excel_path = os.path.join(self.work_dir, f'operations_{self.rows}.xlsx')
+            self.raw.to_excel(self._excel_path, index=False)
+        return self._excel_path
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        """Транзакции в виде списка словарей (вход investment_bank)."""
+        if self._records is None:
+            columns = self.raw[['Дата операции', 'Сумма операции']]
+            self._records = [dict(zip(columns.columns, row)) for row in columns.itertuples(index=False)]
+        return self._records
+
+
+class Scenario(NamedTuple):
+    """Сценарий замера: имя, функция над набором данных и наибольший поддерживаемый размер."""
+    name: str
+    run: Callable[[Dataset], Any]
+    max_rows: Optional[int] = None
+    prepare: Optional[Callable[[Dataset], Any]] = None
+
+
+def _warm_load(dataset: Dataset) -> None:
+    # Кэш строится в prepare, замеряется чтение из кэша
+    load_transactions(dataset.excel_path, cache_dir=os.path.join(dataset.work_dir, 'cache'))
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario('load_transactions.cold', lambda data: load_transactions(data.excel_path, use_cache=False),
+             MAX_EXCEL_ROWS, lambda data: data.excel_path),
+    Scenario('load_transactions.cached', _warm_load, MAX_EXCEL_ROWS, _warm_load),
+    Scenario('normalize_transactions', lambda data: normalize_transactions(data.raw)),
+    Scenario('analyze_cashback_categories.frame', lambda data: analyze_cashback_categories(data.frame, 2021, 6)),
+    Scenario('analyze_cashback_categories.store', lambda data: analyze_cashback_categories(data.store, 2021, 6)),
+    Scenario('analyze_cashback_categories.cube', lambda data: analyze_cashback_categories(data.cube, 2021, 6)),
+    Scenario('CashbackAnalysis.matrix', lambda data: CashbackAnalysis(data.store).matrix()),
+    Scenario('AggregateCube.build', lambda data: AggregateCube.from_transactions(data.store)),
+    Scenario('simple_search', lambda data: simple_search(data.frame, 'магнит')),
+    Scenario('search_phone_numbers', lambda data: search_phone_numbers(data.frame)),
+    Scenario('search_personal_transfers', lambda data: search_personal_transfers(data.frame)),
+    Scenario('get_card_summary', lambda data: get_card_summary(data.frame)),
+    Scenario('get_top_transactions', lambda data: get_top_transactions(data.frame)),
+    Scenario('spending_by_category', lambda data: spending_by_category(
+        data.frame, 'Супермаркеты', REPORT_DATE, save=False)),
+    Scenario('spending_by_weekday', lambda data: spending_by_weekday(data.frame, REPORT_DATE, save=False)),
+    Scenario('spending_by_workday', lambda data: spending_by_workday(data.frame, REPORT_DATE, save=False)),
+    Scenario('investment_bank', lambda data: investment_bank('2021-06', data.records, 50),
+             MAX_RECORD_ROWS, lambda data: data.records),
+    Scenario('investment_bank_table', lambda data: investment_bank_table(
+        data.frame, pd.period_range('2018-01', '2021-12', freq='M').astype(str).tolist(), [10, 50, 100])),
+]
+
+
+# Сброс кэшей между запусками, чтобы каждый замер начинался с одинакового состояния
+def reset_caches() -> None:
+    """Очищает кэши, которые переживают вызовы (результаты по уникальным значениям)."""
+    DEFAULT_MEMO.clear()
@@ -0,0 +1,65 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Корень проекта: команды запускаются из него, чтобы пакет src был доступен
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Замеряемые команды: пустой интерпретатор (нижняя граница), команда без данных и импорт модуля с pandas
+COMMANDS: Dict[str, List[str]] = {
+    'python': ['-c', 'pass'],
+    'cli greeting': ['-m', 'src.cli', 'greeting', '--time', '2024-01-01 09:00:00'],
+    'import src.main': ['-c', 'import src.main'],
+}
+
+# Бюджет запуска команды greeting сверх запуска пустого интерпретатора, в миллисекундах
+# (время самого интерпретатора зависит от машины и установленных пакетов)
+DEFAULT_BUDGET_MS = 50.0
+DEFAULT_REPEAT = 10
+
+
+# Замер времени запуска
+def measure_startup(arguments: Sequence[str], repeat: int = DEFAULT_REPEAT) -> Dict[str, float]:
+    """
+    Запускает интерпретатор с аргументами repeat раз и замеряет время до завершения процесса.
+
+    :param arguments: Аргументы интерпретатора.
+    :param repeat: Число запусков.
+    :return: Минимальное и медианное время в миллисекундах.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], cwd=PROJECT_ROOT, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'min_ms': round(min(timings), 1), 'median_ms': round(statistics.median(timings), 1)}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Точка входа: python -m benchmarks.startup. Код 1, если команда greeting не укладывается в бюджет."""
+    parser = argparse.ArgumentParser(description="Замер времени запуска CLI.")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Число запусков каждой команды.")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Допустимое время greeting сверх пустого интерпретатора, в миллисекундах.")
+    args = parser.parse_args(argv)
+
+    results = {name: measure_startup(arguments, args.repeat) for name, arguments in COMMANDS.items()}
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    overhead = results['cli greeting']['median_ms'] - results['python']['median_ms']
+    print(f"Запуск greeting сверх интерпретатора: {overhead:.1f} мс (бюджет {args.budget_ms} мс)")
+    if overhead > args.budget_ms:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence, cast
+
+import pandas as pd
+
+from src.cache import write_atomically
+from src.report_sink import DEFAULT_FORMAT, REPORT_FORMATS, ReportSink
+from src.reports import spending_by_category, spending_by_weekday, spending_by_workday
+from src.services import analyze_cashback_categories
+from src.store import TransactionStore
+from src.utils import load_transactions
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Параметры по умолчанию
+DEFAULT_MAX_TASKS_PER_CHILD = 20
+SUCCESS_MARKER = '_SUCCESS.json'
+SUMMARY_FILE = 'summary.json'
+
+
+class BatchJob(NamedTuple):
+    """Задание пакетной обработки: файл с операциями и период анализа."""
+    job_id: str
+    file: str
+    year: int
+    month: int
+    date: Optional[str] = None
+    category: Optional[str] = None
+
+
+# Чтение манифеста заданий
+def read_manifest(manifest_path: str) -> List[BatchJob]:
+    """
+    Читает манифест заданий из JSON (список объектов или {"jobs": [...]}) или CSV.
+
+    Поля задания: file, year, month; необязательные: date (дата отчетов, по умолчанию последний день месяца),
+    category (категория для отчета spending_by_category), id (по умолчанию строится из файла и периода).
+    Относительные пути к файлам отсчитываются от папки манифеста.
+
+    :param manifest_path: Путь к манифесту.
+    :return: Список заданий.
+    :raises ValueError: Если в манифесте нет обязательных полей, повторяются идентификаторы
+        или идентификатор не годится как имя папки результатов (содержит разделители пути или '..').
+    """
+    if manifest_path.endswith('.csv'):
+        records = cast(List[Dict[str, Any]], pd.read_csv(manifest_path, dtype=str).to_dict('records'))
+    else:
+        with open(manifest_path, encoding='utf-8') as f:
+            data = json.load(f)
+        records = data['jobs'] if isinstance(data, dict) else data
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    for number, record in enumerate(records, start=1):
+        record = {key: value for key, value in record.items() if not pd.isna(value)}
+        missing = [field for field in ('file', 'year', 'month') if field not in record]
+        if missing:
+            raise ValueError(f"В задании {number} манифеста нет полей: {', '.join(missing)}")
+        file_path = os.path.join(base_dir, str(record['file']))
+        year, month = int(record['year']), int(record['month'])
+        job_id = str(record.get('id') or _default_job_id(file_path, year, month))
+        if not _is_safe_job_id(job_id):
+            raise ValueError(f"Идентификатор задания {number} манифеста не может быть именем папки: {job_id!r}")
+        jobs.append(BatchJob(
+            job_id=job_id,
+            file=file_path,
+            year=year,
+            month=month,
+            date=record.get('date'),
+            category=record.get('category')
+        ))
+
+    duplicates = [job_id for job_id, count in Counter(job.job_id for job in jobs).items() if count > 1]
+    if duplicates:
+        raise ValueError(f"Повторяющиеся идентификаторы заданий: {', '.join(sorted(duplicates))}")
+    return jobs
+
+
+def _is_safe_job_id(job_id: str) -> bool:
+    # Идентификатор — имя папки внутри output_dir: без разделителей пути, '..' и абсолютных путей
+    return (job_id not in ('', '.') and '..' not in job_id and '/' not in job_id and '\\' not in job_id
+            and not os.path.isabs(job_id))
+
+
+def _default_job_id(file_path: str, year: int, month: int) -> str:
+    # Имя файла и хэш полного пути, чтобы одинаковые имена из разных папок не смешивались
+    path_key = hashlib.sha256(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:8]
+    return f"{os.path.splitext(os.path.basename(file_path))[0]}_{path_key}_{year:04d}-{month:02d}"
+
+
+# Выполнение одного задания (в процессе-исполнителе)
+def run_job(job: BatchJob, output_dir: str, fmt: str = DEFAULT_FORMAT) -> Dict[str, Any]:
+    """
+    Выполняет анализ кешбэка и три отчета из reports.py для одного задания.
+    Результаты пишутся в папку output_dir/<job_id>; после успешного завершения
+    в ней создается маркер, по которому задание пропускается при повторном запуске.
+
+    :param job: Задание.
+    :param output_dir: Папка результатов.
+    :param fmt: Формат отчетов.
+    :return: Словарь с результатом: job_id, status ('ok' или 'failed'), seconds, error.
+    """
+    started = time.perf_counter()
+    job_dir = os.path.join(output_dir, job.job_id)
+    try:
+        sink = ReportSink(job_dir, fmt, asynchronous=False)
+        store = TransactionStore(load_transactions(job.file))
+        report_date = job.date or str((pd.Timestamp(job.year, job.month, 1) + pd.offsets.MonthEnd(0)).date())
+
+        cashback = analyze_cashback_categories(store, job.year, job.month)
+        _write_json(os.path.join(job_dir, 'cashback.json'), {str(key): value for key, value in cashback.items()})
+
+        # Отчеты не сохраняются декоратором save_report, а пишутся под постоянными именами
+        reports = {
+            'spending_by_weekday': spending_by_weekday(store, report_date, save=False),
+            'spending_by_workday': spending_by_workday(store, report_date, save=False),
+        }
+        if job.category:
+            reports['spending_by_category'] = spending_by_category(store, job.category, report_date, save=False)
+        for name, report in reports.items():
+            if sink.submit(report, f"{name}{REPORT_FORMATS[fmt].extension}").result() is None:
+                raise OSError(f"Не удалось сохранить отчет {name}")
+    except Exception as e:
+        return {
+            'job_id': job.job_id, 'status': 'failed', 'seconds': round(time.perf_counter() - started, 3),
+            'error': f"{type(e).__name__}: {e}", 'traceback': traceback.format_exc()
+        }
+
+    result = {'job_id': job.job_id, 'status': 'ok', 'seconds': round(time.perf_counter() - started, 3), 'error': None}
+    _write_json(os.path.join(job_dir, SUCCESS_MARKER), result)
+    return result
+
+
+# Пакетная обработка манифеста
+def run_batch(jobs: Sequence[BatchJob], output_dir: str, workers: Optional[int] = None,
+              max_tasks_per_child: int = DEFAULT_MAX_TASKS_PER_CHILD, memory_limit_mb: Optional[int] = None,
+              resume: bool = True, fmt: str = DEFAULT_FORMAT) -> Dict[str, Any]:
+    """
+    Выполняет задания в пуле процессов и сохраняет сводку в output_dir/summary.json.
+
+    Процессы-исполнители перезапускаются после max_tasks_per_child заданий, чтобы память,
+    накопленная при разборе больших файлов, возвращалась системе; memory_limit_mb дополнительно
+    ограничивает адресное пространство процесса (только Unix). Если процесс-исполнитель завершился
+    аварийно, ошибкой отмечается только вызвавшее аварию задание, а остальные выполняются в новом пуле.
+    При resume=True задания, у которых есть маркер успешного завершения, пропускаются.
+
+    :param jobs: Задания.
+    :param output_dir: Папка результатов.
+    :param workers: Число процессов (по умолчанию число ядер).
+    :param max_tasks_per_child: Число заданий, после которого процесс-исполнитель перезапускается.
+    :param memory_limit_mb: Ограничение памяти процесса-исполнителя в мегабайтах (необязательно).
+    :param resume: Пропускать ли уже выполненные задания.
+    :param fmt: Формат отчетов.
+    :return: Сводка: число заданий по статусам, общее время и результаты заданий.
+    """
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for job in jobs:
+        if resume and os.path.exists(os.path.join(output_dir, job.job_id, SUCCESS_MARKER)):
+            results[job.job_id] = {'job_id': job.job_id, 'status': 'skipped', 'seconds': 0.0, 'error': None}
+        else:
+            pending.append(job)
+    logger.info(f"Заданий: {len(jobs)}, к выполнению: {len(pending)}, пропущено: {len(jobs) - len(pending)}.")
+
+    queue = deque(pending)
+    while queue:
+        crashed = _run_jobs(queue, results, output_dir, fmt, workers, max_tasks_per_child, memory_limit_mb)
+        if len(crashed) > 1:
+            # Аварийно завершился один из нескольких процессов: задания перезапускаются по одному,
+            # чтобы ошибкой отметить только то, которое роняет процесс
+            crashed = [job for job in crashed
+                       if _run_jobs(deque([job]), results, output_dir, fmt, 1, 1, memory_limit_mb)]
+        for job in crashed:
+            results[job.job_id] = {'job_id': job.job_id, 'status': 'failed', 'seconds': None,
+                                   'error': "Процесс-исполнитель завершился аварийно"}
+            logger.error(f"Задание {job.job_id} завершилось с ошибкой: процесс-исполнитель завершился аварийно")
+
+    ordered = [results[job.job_id] for job in jobs]
+    summary: Dict[str, Any] = {
+        'total': len(ordered),
+        'ok': sum(result['status'] == 'ok' for result in ordered),
+        'failed': sum(result['status'] == 'failed' for result in ordered),
+        'skipped': sum(result['status'] == 'skipped' for result in ordered),
+        'seconds': round(time.perf_counter() - started, 3),
+        'jobs': ordered
+    }
+    _write_json(os.path.join(output_dir, SUMMARY_FILE), summary)
+    logger.info(f"Пакетная обработка завершена: выполнено {summary['ok']}, с ошибкой {summary['failed']}, "
+                f"пропущено {summary['skipped']} за {summary['seconds']} с.")
+    return summary
+
+
+# Выполнение очереди заданий в пуле процессов до опустошения очереди или аварии процесса
+def _run_jobs(queue: Deque[BatchJob], results: Dict[str, Dict[str, Any]], output_dir: str, fmt: str,
+              workers: Optional[int], max_tasks_per_child: int, memory_limit_mb: Optional[int]) -> List[BatchJob]:
+    """
+    Выполняет задания из очереди, пока она не опустеет или пул не сломается из-за аварийного
+    завершения процесса-исполнителя (например, из-за нехватки памяти). Одновременно выполняется
+    не больше workers заданий, поэтому при аварии известно, какие задания могли ее вызвать;
+    невыполненные задания остаются в очереди.
+
+    :param queue: Очередь заданий.
+    :param results: Словарь результатов по job_id, дополняется завершенными заданиями.
+    :param output_dir: Папка результатов.
+    :param fmt: Формат отчетов.
+    :param workers: Число процессов (по умолчанию число ядер).
+    :param max_tasks_per_child: Число заданий, после которого процесс-исполнитель перезапускается.
+    :param memory_limit_mb: Ограничение памяти процесса-исполнителя в мегабайтах (необязательно).
+    :return: Задания, выполнявшиеся в момент аварии (пустой список, если аварии не было).
+    """
+    limit = workers or os.cpu_count() or 1
+    running: Dict[Future, BatchJob] = {}
+    with ProcessPoolExecutor(max_workers=limit, mp_context=multiprocessing.get_context('spawn'),
+                             max_tasks_per_child=max_tasks_per_child,
+                             initializer=_init_worker, initargs=(memory_limit_mb,)) as executor:
+        while queue or running:
+            try:
+                while queue and len(running) < limit:
+                    future = executor.submit(run_job, queue[0], output_dir, fmt)
+                    running[future] = queue.popleft()
+            except BrokenProcessPool:
+                # Пул сломался до того, как авария была замечена: незапущенное задание остается в очереди
+                if not running:
+                    return []
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                # После аварии все выполнявшиеся задания завершаются с BrokenProcessPool
+                wait(running)
+                done = set(running)
+            crashed = []
+            for future in done:
+                job = running.pop(future)
+                if isinstance(future.exception(), BrokenProcessPool):
+                    crashed.append(job)
+                    continue
+                result = future.result()
+                results[job.job_id] = result
+                if result['status'] == 'failed':
+                    logger.error(f"Задание {job.job_id} завершилось с ошибкой: {result['error']}")
+            if crashed:
+                return crashed
+    return []
+
+
+def _init_worker(memory_limit_mb: Optional[int]) -> None:
+    # Ограничение памяти процесса-исполнителя (модуль resource есть только в Unix)
+    if memory_limit_mb is None:
+        return
+    try:
+        import resource
+    except ImportError:
+        logger.warning("Ограничение памяти процесса не поддерживается на этой платформе.")
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _write_json(path: str, data: Any) -> None:
+    # Атомарная запись JSON через уникальный временный файл
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def write(tmp_path: str) -> None:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+    write_atomically(path, write)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Неинтерактивная точка входа пакетной обработки."""
+    parser = argparse.ArgumentParser(description="Пакетный анализ кешбэка и отчеты по манифесту заданий.")
+    parser.add_argument('manifest', help="Манифест заданий (JSON или CSV).")
+    parser.add_argument('--output', required=True, help="Папка результатов.")
+    parser.add_argument('--workers', type=int, default=None, help="Число процессов.")
+    parser.add_argument('--max-tasks-per-child', type=int, default=DEFAULT_MAX_TASKS_PER_CHILD,
+                        help="Число заданий до перезапуска процесса-исполнителя.")
+    parser.add_argument('--memory-limit-mb', type=int, default=None, help="Ограничение памяти процесса.")
+    parser.add_argument('--format', default=DEFAULT_FORMAT, help="Формат отчетов: csv, csv.gz, parquet.")
+    parser.add_argument('--no-resume', action='store_true', help="Выполнить заново и уже выполненные задания.")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(read_manifest(args.manifest), args.output, args.workers, args.max_tasks_per_child,
+                        args.memory_limit_mb, resume=not args.no_resume, fmt=args.format)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa  # type: ignore[import-untyped]
+    import pyarrow.feather as feather  # type: ignore[import-untyped]
+except ImportError:  # pragma: no cover - pyarrow необязателен
+    pa = None
+    feather = None
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Версия формата кэша: увеличивается, если меняется способ подготовки данных
+CACHE_VERSION = 2
+
+# Папка кэша по умолчанию (создается рядом с исходным файлом)
+DEFAULT_CACHE_DIR_NAME = '.cache'
+
+
+# Функция для вычисления хэша содержимого файла
+def file_content_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Вычисляет SHA-256 содержимого файла, читая его блоками.
+
+    :param file_path: Путь к файлу.
+    :param chunk_size: Размер блока чтения в байтах.
+    :return: Хэш в шестнадцатеричном виде.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Функция для получения путей к файлам кэша
+def get_cache_paths(file_path: str, cache_dir: Optional[str] = None, tag: str = 'raw') -> tuple[str, str]:
+    """
+    Возвращает пути к колоночному файлу кэша и к файлу с его метаданными.
+
+    :param file_path: Путь к исходному файлу.
+    :param cache_dir: Папка кэша (по умолчанию .cache рядом с исходным файлом).
+    :param tag: Вариант подготовки данных (например, сырые или нормализованные).
+    :return: Кортеж (путь к данным, путь к метаданным).
+    """
+    source_path = os.path.abspath(file_path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(source_path), DEFAULT_CACHE_DIR_NAME)
+    path_key = hashlib.sha256(source_path.encode('utf-8')).hexdigest()[:16]
+    base_name = f"{os.path.splitext(os.path.basename(source_path))[0]}_{path_key}_{tag}"
+    return os.path.join(cache_dir, f"{base_name}.feather"), os.path.join(cache_dir, f"{base_name}.json")
+
+
+def _read_metadata(meta_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            metadata: Dict[str, Any] = json.load(f)
+            return metadata
+    except (OSError, ValueError):
+        return None
+
+
+def _temp_path(path: str) -> str:
+    # Уникальное имя временного файла в той же папке: кэш одного файла могут одновременно писать несколько процессов
+    return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+# Атомарная запись файла
+def write_atomically(path: str, write: Callable[[str], None]) -> None:
+    """
+    Записывает файл через уникальный временный файл в той же папке и атомарно переименовывает его.
+    При ошибке временный файл удаляется, а прежний файл остается нетронутым.
+
+    :param path: Путь к файлу.
+    :param write: Функция, записывающая данные по переданному пути временного файла.
+    """
+    tmp_path = _temp_path(path)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_metadata(meta_path: str, metadata: Dict[str, Any]) -> None:
+    def write(tmp_path: str) -> None:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False)
+
+    write_atomically(meta_path, write)
+
+
+# Функция для проверки актуальности кэша
+def is_cache_valid(file_path: str, metadata: Optional[Dict[str, Any]], data_path: str) -> bool:
+    """
+    Проверяет, что кэш построен для текущей версии исходного файла.
+
+    Если путь, время изменения и размер совпадают, хэш не пересчитывается.
+    Если изменилось только время изменения, сравнивается хэш содержимого.
+
+    :param file_path: Путь к исходному файлу.
+    :param metadata: Метаданные кэша.
+    :param data_path: Путь к колоночному файлу кэша.
+    :return: True, если кэш можно использовать.
+    """
+    if not metadata or not os.path.exists(data_path):
+        return False
+    if metadata.get('version') != CACHE_VERSION or metadata.get('source') != os.path.abspath(file_path):
+        return False
+
+    stat = os.stat(file_path)
+    if metadata.get('mtime_ns') == stat.st_mtime_ns and metadata.get('size') == stat.st_size:
+        return True
+    if metadata.get('size') != stat.st_size:
+        return False
+    return bool(metadata.get('sha256') == file_content_hash(file_path))
+
+
+# Функция для чтения кэша через отображение файла в память
+def read_cached_frame(data_path: str) -> pd.DataFrame:
+    """
+    Читает колоночный файл кэша, отображая его в память.
+
+    :param data_path: Путь к файлу кэша.
+    :return: DataFrame с данными.
+    """
+    table = feather.read_table(data_path, memory_map=True)
+    df: pd.DataFrame = table.to_pandas()
+    return df
+
+
+# Функция для записи кэша
+def write_cached_frame(df: pd.DataFrame, data_path: str) -> None:
+    """
+    Записывает DataFrame в колоночный файл без сжатия (чтобы его можно было отобразить в память).
+    Запись идет в уникальный временный файл, который затем атомарно переименовывается.
+
+    :param df: DataFrame с данными.
+    :param data_path: Путь к файлу кэша.
+    """
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    write_atomically(data_path, lambda tmp_path: feather.write_feather(
+        df.reset_index(drop=True), tmp_path, compression='uncompressed'))
+
+
+# Загрузка данных с использованием колоночного кэша
+def load_with_cache(file_path: str, loader: Callable[[str], pd.DataFrame],
+                    cache_dir: Optional[str] = None, tag: str = 'raw') -> pd.DataFrame:
+    """
+    Загружает данные через кэш: при первом обращении вызывает loader и сохраняет результат
+    в колоночный файл, при последующих читает этот файл, пока исходный файл не изменится.
+
+    :param file_path: Путь к исходному файлу.
+    :param loader: Функция, читающая исходный файл.
+    :param cache_dir: Папка кэша (по умолчанию .cache рядом с исходным файлом).
+    :param tag: Вариант подготовки данных, под которым хранится кэш.
+    :return: DataFrame с данными.
+    """
+    if feather is None:
+        logger.warning("pyarrow не установлен, кэш отключен.")
+        return loader(file_path)
+
+    data_path, meta_path = get_cache_paths(file_path, cache_dir, tag)
+    metadata = _read_metadata(meta_path)
+
+    if is_cache_valid(file_path, metadata, data_path):
+        try:
+            df = read_cached_frame(data_path)
+            logger.info(f"Данные загружены из кэша: {data_path}")
+            stat = os.stat(file_path)
+            if metadata is not None and metadata.get('mtime_ns') != stat.st_mtime_ns:
+                metadata['mtime_ns'] = stat.st_mtime_ns
+                _write_metadata(meta_path, metadata)
+            return df
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"Не удалось прочитать кэш {data_path}: {e}")
+
+    # Ключ фиксируется до чтения, чтобы изменение файла во время разбора не попало в кэш
+    stat = os.stat(file_path)
+    content_hash = file_content_hash(file_path)
+    df = loader(file_path)
+    try:
+        write_cached_frame(df, data_path)
+        _write_metadata(meta_path, {
+            'version': CACHE_VERSION,
+            'source': os.path.abspath(file_path),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': content_hash,
+        })
+        logger.info(f"Кэш обновлен: {data_path}")
+    except (OSError, pa.ArrowException) as e:
+        logger.warning(f"Не удалось сохранить кэш {data_path}: {e}")
+    return df
@@ -0,0 +1,116 @@
+import logging
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+from src.schema import CASHBACK_COLUMN, CATEGORY_COLUMN, DATE_COLUMN, as_datetime
+from src.store import DateLike, TransactionStore
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+MONTH_COLUMN = 'Месяц'
+
+
+class CashbackAnalysis:
+    """
+    Кешбэк по категориям сразу за все периоды.
+
+    При создании транзакции один раз группируются по месяцу и категории (матрица месяц × категория
+    и рейтинг категорий каждого месяца), а для произвольных периодов строятся накопленные суммы
+    кешбэка по каждой категории в порядке времени операций: сумма за период [start, end] —
+    разность двух накопленных сумм, найденных бинарным поиском, без повторного просмотра транзакций.
+    """
+
+    def __init__(self, transactions: Union[pd.DataFrame, TransactionStore], date_column: str = DATE_COLUMN) -> None:
+        frame = transactions.frame if isinstance(transactions, TransactionStore) else transactions
+        dates = as_datetime(frame[date_column])
+        cashback = frame[CASHBACK_COLUMN].astype('float64').fillna(0.0)
+        codes, categories = pd.factorize(frame[CATEGORY_COLUMN])
+        valid = (codes >= 0) & dates.notna().to_numpy()
+
+        # Месячные суммы по категориям — одна группировка
+        self._monthly = (
+            pd.DataFrame({
+                MONTH_COLUMN: dates[valid].dt.to_period('M'),
+                CATEGORY_COLUMN: frame[CATEGORY_COLUMN][valid],
+                CASHBACK_COLUMN: cashback[valid]
+            })
+            .groupby([MONTH_COLUMN, CATEGORY_COLUMN], observed=True)[CASHBACK_COLUMN]
+            .sum()
+        )
+
+        # Накопленные суммы: операции упорядочены по категории, внутри категории — по времени
+        times = dates.to_numpy(dtype='datetime64[ns]')[valid]
+        codes = codes[valid]
+        order = np.lexsort((times, codes))
+        self._categories: List[str] = [str(category) for category in categories]
+        self._times = times[order]
+        self._cumulative = np.concatenate([[0.0], np.cumsum(cashback.to_numpy()[valid][order])])
+        self._starts = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+        logger.info(f"Кешбэк сгруппирован: {len(self._monthly)} пар месяц-категория.")
+
+    @property
+    def categories(self) -> List[str]:
+        """Категории в порядке первого появления."""
+        return list(self._categories)
+
+    def matrix(self) -> pd.DataFrame:
+        """
+        Возвращает матрицу кешбэка месяц × категория.
+
+        :return: DataFrame с индексом 'Месяц' (PeriodIndex) и столбцами-категориями (0 — нет операций).
+        """
+        matrix: pd.DataFrame = self._monthly.unstack(CATEGORY_COLUMN, fill_value=0)
+        matrix.columns = matrix.columns.astype(str)
+        return matrix
+
+    def top(self, n: int = 3) -> Dict[str, Dict[str, float]]:
+        """
+        Возвращает n категорий с наибольшим кешбэком в каждом месяце.
+
+        :param n: Число категорий.
+        :return: Словарь {'ГГГГ-ММ': {категория: кешбэк}} с категориями по убыванию кешбэка.
+        """
+        ranked = self._monthly.reset_index().sort_values(
+            [MONTH_COLUMN, CASHBACK_COLUMN], ascending=[True, False], kind='stable'
+        )
+        top: Dict[str, Dict[str, float]] = {}
+        for month, rows in ranked.groupby(MONTH_COLUMN, sort=True).head(n).groupby(MONTH_COLUMN, sort=True):
+            top[str(month)] = dict(zip(rows[CATEGORY_COLUMN].astype(str), rows[CASHBACK_COLUMN].astype(float)))
+        return top
+
+    def month(self, year: int, month: int) -> Dict[str, float]:
+        """
+        Возвращает кешбэк по категориям за месяц (как analyze_cashback_categories).
+
+        :param year: Год.
+        :param month: Месяц.
+        :return: Словарь {категория: кешбэк} по убыванию кешбэка.
+        """
+        period = pd.Period(year=year, month=month, freq='M')
+        if period not in self._monthly.index.get_level_values(MONTH_COLUMN):
+            return {}
+        totals = self._monthly.xs(period, level=MONTH_COLUMN)
+        totals.index = totals.index.astype(str)
+        return totals.sort_values(ascending=False).to_dict()
+
+    def range(self, start: DateLike, end: DateLike) -> Dict[str, float]:
+        """
+        Возвращает кешбэк по категориям за период [start, end] (включительно) по накопленным суммам.
+
+        :param start: Начало периода.
+        :param end: Конец периода.
+        :return: Словарь {категория: кешбэк} по убыванию кешбэка (категории с операциями в периоде).
+        """
+        start_time = pd.Timestamp(start).to_datetime64()
+        end_time = pd.Timestamp(end).to_datetime64()
+        totals = {}
+        for code, category in enumerate(self._categories):
+            lo, hi = self._starts[code], self._starts[code + 1]
+            first = lo + np.searchsorted(self._times[lo:hi], start_time, side='left')
+            last = lo + np.searchsorted(self._times[lo:hi], end_time, side='right')
+            if last > first:
+                totals[category] = float(self._cumulative[last] - self._cumulative[first])
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
@@ -0,0 +1,152 @@
+import itertools
+import logging
+import re
+import threading
+from typing import List, Mapping, Optional, Pattern, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.memo import DEFAULT_MEMO, UniqueValueMemo, apply_over_uniques
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Шаблоны, используемые в services.py
+PHONE_PATTERN = r'\+7 \d{3} \d{2}-\d{2}-\d{2}|\+7 \d{3} \d{3}-\d{2}-\d{2}'
+PERSONAL_TRANSFER_PATTERN = r'\b[A-ЯЁ][а-яё]+\s[A-ЯЁ]\.'
+
+# Счетчик для ключей классификаторов в общем кэше
+_classifier_ids = itertools.count()
+
+
+class PatternClassifier:
+    """
+    Классификатор описаний по набору именованных регулярных выражений.
+
+    Все шаблоны объединяются в одно выражение: описания, не совпавшие ни с одним детектором
+    (а таких большинство), отсеиваются за один просмотр, для остальных уточняется, какие детекторы
+    сработали. Каждое уникальное описание классифицируется один раз, а результат
+    (битовая маска детекторов) кэшируется по строке описания в UniqueValueMemo.
+    Бит детектора соответствует порядку регистрации: первый детектор — 1, второй — 2 и т.д.
+    """
+
+    def __init__(self, patterns: Optional[Mapping[str, str]] = None,
+                 memo: Optional[UniqueValueMemo] = None) -> None:
+        self.memo = memo
+        self._id = next(_classifier_ids)
+        self._generation = 0
+        self._names: List[str] = []
+        self._patterns: List[Pattern[str]] = []
+        self._scoped: List[str] = []
+        self._combined: Optional[Pattern[str]] = None
+        self._lock = threading.Lock()
+        for name, pattern in (patterns or {}).items():
+            self.register(name, pattern)
+
+    @property
+    def names(self) -> List[str]:
+        """Имена детекторов в порядке регистрации."""
+        return list(self._names)
+
+    def register(self, name: str, pattern: str, flags: int = 0) -> None:
+        """
+        Регистрирует детектор. Результаты, закэшированные до регистрации, сбрасываются.
+
+        :param name: Имя детектора.
+        :param pattern: Регулярное выражение.
+        :param flags: Флаги re (поддерживаются IGNORECASE, MULTILINE, DOTALL).
+        """
+        if name in self._names:
+            raise ValueError(f"Детектор '{name}' уже зарегистрирован.")
+        if len(self._names) >= 63:
+            raise ValueError("Поддерживается не более 63 детекторов.")
+        compiled = re.compile(pattern, flags)
+        with self._lock:
+            self._names.append(name)
+            self._patterns.append(compiled)
+            self._scoped.append(f'(?{_scoped_flags(flags)}:{pattern})')
+            try:
+                self._combined = re.compile('|'.join(self._scoped))
+            except re.error:
+                # Шаблоны, которые нельзя объединить (например, с глобальными флагами), проверяются по отдельности
+                self._combined = None
+            self._generation += 1
+
+    def bit(self, name: str) -> int:
+        """Бит детектора в маске."""
+        return 1 << self._names.index(name)
+
+    def classify_text(self, text: str) -> int:
+        """
+        Возвращает битовую маску детекторов, сработавших на строке.
+
+        :param text: Описание транзакции.
+        :return: Битовая маска.
+        """
+        memo = self.memo if self.memo is not None else DEFAULT_MEMO
+        mask: int = memo.get_or_compute(self._memo_key, text, self._scan)
+        return mask
+
+    def classify(self, descriptions: pd.Series) -> np.ndarray:
+        """
+        Возвращает битовые маски для столбца описаний.
+        Каждое уникальное описание классифицируется один раз, результат раздается по строкам.
+
+        :param descriptions: Столбец с описаниями.
+        :return: Массив int64 с битовыми масками (0 для пропусков).
+        """
+        masks = apply_over_uniques(descriptions, lambda text: self._scan(str(text)), self._memo_key,
+                                   na_value=0, memo=self.memo)
+        return masks.to_numpy(dtype='int64')
+
+    def tags(self, descriptions: pd.Series) -> pd.DataFrame:
+        """
+        Возвращает по логическому столбцу на каждый детектор.
+
+        :param descriptions: Столбец с описаниями.
+        :return: DataFrame с индексом исходного столбца и столбцами-детекторами.
+        """
+        masks = self.classify(descriptions)
+        return pd.DataFrame(
+            {name: (masks & (1 << bit)) != 0 for bit, name in enumerate(self._names)},
+            index=descriptions.index
+        )
+
+    def mask(self, descriptions: pd.Series, name: str) -> pd.Series:
+        """
+        Возвращает логическую маску срабатывания одного детектора.
+
+        :param descriptions: Столбец с описаниями.
+        :param name: Имя детектора.
+        :return: Series с логическими значениями.
+        """
+        matches: pd.Series = pd.Series((self.classify(descriptions) & self.bit(name)) != 0, index=descriptions.index)
+        return matches
+
+    @property
+    def _memo_key(self) -> Tuple[str, int, int]:
+        # Ключ меняется при регистрации детектора, поэтому старые результаты не используются
+        return ('classifier', self._id, self._generation)
+
+    def _scan(self, text: str) -> int:
+        if self._combined is not None and self._combined.search(text) is None:
+            return 0
+        # Общее выражение нашло совпадение: уточняем, какие именно детекторы сработали
+        mask = 0
+        for bit, pattern in enumerate(self._patterns):
+            if pattern.search(text):
+                mask |= 1 << bit
+        return mask
+
+
+def _scoped_flags(flags: int) -> str:
+    letters = {re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's'}
+    return ''.join(letter for flag, letter in letters.items() if flags & flag)
+
+
+# Классификатор описаний по умолчанию
+TRANSACTION_CLASSIFIER = PatternClassifier({
+    'phone': PHONE_PATTERN,
+    'personal_transfer': PERSONAL_TRANSFER_PATTERN,
+})
@@ -0,0 +1,64 @@
+import argparse
+import datetime
+import importlib
+import logging
+import sys
+from typing import Callable, Dict, Optional, Sequence, cast
+
+# Модуль запускается на каждый вызов из cron, поэтому на верхнем уровне импортируется только стандартная
+# библиотека: pandas, numpy и requests загружаются модулем команды, когда она выбрана
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Команды, работающие с данными: модуль и функция-точка входа (импортируются при вызове команды)
+COMMANDS: Dict[str, str] = {
+    'cashback': 'src.main:main',
+    'batch': 'src.batch:main',
+    'ingest': 'src.ingest:main',
+    'serve': 'src.server:main',
+}
+
+
+def _greeting(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(prog='greeting', description="Приветствие по времени суток.")
+    parser.add_argument('--time', default=None, help="Время в формате 'YYYY-MM-DD HH:MM:SS' (по умолчанию текущее).")
+    args = parser.parse_args(argv)
+
+    from src.greeting import get_greeting
+    print(get_greeting(args.time or datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    return 0
+
+
+# Запуск команды с отложенным импортом ее модуля
+def run_command(command: str, argv: Sequence[str]) -> int:
+    """
+    Выполняет команду CLI. Модуль команды импортируется только здесь.
+
+    :param command: Имя команды (greeting или ключ COMMANDS).
+    :param argv: Аргументы команды.
+    :return: Код завершения.
+    """
+    if command == 'greeting':
+        return _greeting(argv)
+    module_name, function_name = COMMANDS[command].split(':')
+    entry_point = cast(Callable[..., Optional[int]], getattr(importlib.import_module(module_name), function_name))
+    # Интерактивный анализ кешбэка (src.main) не принимает аргументов
+    result = entry_point() if command == 'cashback' else entry_point(list(argv))
+    return result or 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Точка входа: python -m src.cli <команда> [аргументы]."""
+    parser = argparse.ArgumentParser(prog='finanalyzer', description="Анализ банковских операций.")
+    parser.add_argument('command', choices=['greeting', *COMMANDS], help="Команда.")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="Аргументы команды (--help для справки).")
+    args = parser.parse_args(argv)
+
+    # Логирование настраивается один раз, в точке входа
+    logging.basicConfig(level=logging.INFO)
+    return run_command(args.command, args.args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
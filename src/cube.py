@@ -0,0 +1,194 @@
+import logging
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.cache import load_with_cache
+from src.metrics import timed
+from src.schema import (AMOUNT_COLUMN, CARD_COLUMN, CASHBACK_COLUMN, CATEGORY_COLUMN, DATE_COLUMN,
+                        PAYMENT_AMOUNT_COLUMN, as_datetime)
+from src.store import DateLike, TransactionStore, select_range
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Измерения куба
+MONTH_COLUMN = 'Месяц'
+WEEKDAY_COLUMN = 'День недели'
+CUBE_DIMENSIONS = (MONTH_COLUMN, CATEGORY_COLUMN, CARD_COLUMN, WEEKDAY_COLUMN)
+
+# Показатели куба
+COUNT_COLUMN = 'Количество операций'
+CUBE_MEASURES = (AMOUNT_COLUMN, PAYMENT_AMOUNT_COLUMN, CASHBACK_COLUMN, COUNT_COLUMN)
+
+# Время первой и последней операции в ячейке (по ним проверяется, покрывает ли период целые месяцы)
+FIRST_COLUMN = 'Первая операция'
+LAST_COLUMN = 'Последняя операция'
+
+Transactions = Union[pd.DataFrame, TransactionStore]
+
+
+class AggregateCube:
+    """
+    Материализованный куб агрегатов: месяц × категория × карта × день недели
+    с суммами операций, платежей, кэшбэка и числом операций.
+
+    Строится один раз при загрузке данных (см. load_cube) и отвечает на группировки
+    по этим измерениям без просмотра транзакций. Период можно ответить по кубу, если он
+    содержит месяцы целиком (см. covers); иначе запрос выполняется по исходным транзакциям (source).
+    """
+
+    def __init__(self, cells: pd.DataFrame, source: Optional[Transactions] = None) -> None:
+        self._cells = cells
+        self.source = source
+        months = cells.groupby(MONTH_COLUMN).agg({FIRST_COLUMN: 'min', LAST_COLUMN: 'max'})
+        self._months = months.index.to_numpy(dtype='datetime64[ns]')
+        self._first = months[FIRST_COLUMN].to_numpy(dtype='datetime64[ns]')
+        self._last = months[LAST_COLUMN].to_numpy(dtype='datetime64[ns]')
+
+    @classmethod
+    def from_transactions(cls, transactions: Transactions) -> 'AggregateCube':
+        """
+        Строит куб по транзакциям.
+
+        :param transactions: DataFrame или TransactionStore с транзакциями.
+        :return: AggregateCube, у которого source — переданные транзакции.
+        """
+        return cls(build_cube_cells(transactions), transactions)
+
+    @property
+    def cells(self) -> pd.DataFrame:
+        """Ячейки куба: измерения, показатели и время первой и последней операции."""
+        return self._cells
+
+    @property
+    def months(self) -> List[pd.Period]:
+        """Месяцы, для которых в кубе есть данные."""
+        return [pd.Period(month, freq='M') for month in self._months]
+
+    def covers(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> bool:
+        """
+        Проверяет, что в период [start, end] каждый месяц попадает либо целиком, либо не попадает совсем,
+        то есть агрегаты за период можно получить по кубу.
+
+        :param start: Начало периода (необязательно).
+        :param end: Конец периода (необязательно).
+        :return: True, если период можно ответить по кубу.
+        """
+        return self._month_bounds(start, end) is not None
+
+    def totals(self, by: Sequence[str], start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+               measures: Sequence[str] = CUBE_MEASURES, dropna: bool = True) -> pd.DataFrame:
+        """
+        Возвращает суммы показателей по выбранным измерениям за период.
+
+        :param by: Измерения группировки (подмножество CUBE_DIMENSIONS).
+        :param start: Начало периода (необязательно).
+        :param end: Конец периода (необязательно).
+        :param measures: Показатели.
+        :param dropna: Отбрасывать ли группы с пропусками в измерениях (как groupby).
+        :return: DataFrame с индексом по измерениям.
+        :raises ValueError: Если период делит месяц или измерение отсутствует в кубе.
+        """
+        unknown = [dimension for dimension in by if dimension not in CUBE_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Измерения {unknown} отсутствуют в кубе.")
+        bounds = self._month_bounds(start, end)
+        if bounds is None:
+            raise ValueError("Период содержит неполные месяцы, ответ по кубу невозможен.")
+
+        first_month, last_month = bounds
+        months = self._cells[MONTH_COLUMN].to_numpy(dtype='datetime64[ns]')
+        cells = self._cells[(months >= first_month) & (months <= last_month)]
+        grouped = cells.groupby(list(by), sort=False, observed=True, dropna=dropna)
+        totals: pd.DataFrame = grouped[list(measures)].sum()
+        return totals
+
+    def _month_bounds(self, start: Optional[DateLike], end: Optional[DateLike]
+                      ) -> Optional[Tuple[np.datetime64, np.datetime64]]:
+        # Первый и последний месяц, попадающие в период целиком (None, если период делит месяц)
+        if not len(self._months):
+            return np.datetime64('NaT'), np.datetime64('NaT')
+        first_index, last_index = 0, len(self._months) - 1
+        if start is not None:
+            start_time = pd.Timestamp(start).to_datetime64()
+            first_index = int(np.searchsorted(self._last, start_time, side='left'))
+            if first_index < len(self._months) and self._first[first_index] < start_time:
+                return None
+        if end is not None:
+            end_time = pd.Timestamp(end).to_datetime64()
+            last_index = int(np.searchsorted(self._first, end_time, side='right')) - 1
+            if last_index >= 0 and self._last[last_index] > end_time:
+                return None
+        if first_index > last_index:
+            return np.datetime64('NaT'), np.datetime64('NaT')
+        return self._months[first_index], self._months[last_index]
+
+
+# Построение ячеек куба
+@timed('aggregate')
+def build_cube_cells(transactions: Transactions) -> pd.DataFrame:
+    """
+    Группирует транзакции по измерениям куба.
+
+    :param transactions: DataFrame или TransactionStore с транзакциями.
+    :return: DataFrame с ячейками куба.
+    """
+    frame = transactions.frame if isinstance(transactions, TransactionStore) else transactions
+    dates = as_datetime(frame[DATE_COLUMN])
+    cells = (
+        pd.DataFrame({
+            MONTH_COLUMN: dates.dt.to_period('M').dt.to_timestamp(),
+            CATEGORY_COLUMN: frame[CATEGORY_COLUMN],
+            CARD_COLUMN: frame[CARD_COLUMN],
+            WEEKDAY_COLUMN: dates.dt.dayofweek,
+            AMOUNT_COLUMN: frame[AMOUNT_COLUMN].astype('float64'),
+            PAYMENT_AMOUNT_COLUMN: frame[PAYMENT_AMOUNT_COLUMN].astype('float64'),
+            CASHBACK_COLUMN: frame[CASHBACK_COLUMN].astype('float64'),
+            COUNT_COLUMN: frame[AMOUNT_COLUMN].notna().astype('int64'),
+            FIRST_COLUMN: dates,
+            LAST_COLUMN: dates
+        })
+        .dropna(subset=[MONTH_COLUMN])
+        .groupby(list(CUBE_DIMENSIONS), sort=True, observed=True, dropna=False)
+        .agg({AMOUNT_COLUMN: 'sum', PAYMENT_AMOUNT_COLUMN: 'sum', CASHBACK_COLUMN: 'sum', COUNT_COLUMN: 'sum',
+              FIRST_COLUMN: 'min', LAST_COLUMN: 'max'})
+        .reset_index()
+    )
+    cells[WEEKDAY_COLUMN] = cells[WEEKDAY_COLUMN].astype('int64')
+    logger.info(f"Куб агрегатов построен: {len(cells)} ячеек по {len(frame)} транзакциям.")
+    return cells
+
+
+# Загрузка куба из кэша рядом с исходным файлом
+def load_cube(file_path: str, transactions: Transactions, cache_dir: Optional[str] = None,
+              tag: str = 'cube') -> AggregateCube:
+    """
+    Возвращает куб для файла транзакций. Куб хранится в колоночном кэше рядом с кэшем транзакций
+    и перестраивается только при изменении исходного файла.
+
+    :param file_path: Путь к исходному файлу с транзакциями.
+    :param transactions: Загруженные транзакции (по ним строится куб и выполняются запросы вне куба).
+    :param cache_dir: Папка кэша (по умолчанию .cache рядом с исходным файлом).
+    :param tag: Метка кэша (разная для кубов, построенных по-разному из одного файла).
+    :return: AggregateCube.
+    """
+    cells = load_with_cache(file_path, lambda _: build_cube_cells(transactions), cache_dir, tag=tag)
+    return AggregateCube(cells, transactions)
+
+
+# Транзакции за период для запросов, которые нельзя ответить по кубу
+def cube_source_range(cube: AggregateCube, start: DateLike, end: DateLike) -> pd.DataFrame:
+    """
+    Возвращает исходные транзакции куба за период.
+
+    :param cube: Куб с исходными транзакциями.
+    :param start: Начало периода.
+    :param end: Конец периода.
+    :return: DataFrame с транзакциями за период.
+    :raises ValueError: Если у куба нет исходных транзакций.
+    """
+    if cube.source is None:
+        raise ValueError("Период нельзя ответить по кубу, а исходные транзакции не переданы.")
+    return select_range(cube.source, start, end)
@@ -0,0 +1,314 @@
+import hashlib
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.cache import write_atomically
+from src.schema import AMOUNT_COLUMN, DATE_COLUMN, PAYMENT_AMOUNT_COLUMN
+
+if TYPE_CHECKING:
+    from src.market_data import MarketDataClient
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Базовая валюта, к которой приводятся суммы
+BASE_CURRENCY = 'RUB'
+
+# Столбцы с валютами сумм
+CURRENCY_COLUMN = 'Валюта операции'
+PAYMENT_CURRENCY_COLUMN = 'Валюта платежа'
+
+# Исходные суммы (в валютах операции и платежа) сохраняются в отдельных столбцах
+ORIGINAL_AMOUNT_COLUMN = 'Сумма операции в валюте операции'
+ORIGINAL_PAYMENT_AMOUNT_COLUMN = 'Сумма платежа в валюте платежа'
+
+# Таблица курсов по умолчанию: data/fx_rates.csv в корне проекта
+DEFAULT_RATES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'data', 'fx_rates.csv')
+
+# Файл рядом с таблицей, в котором записаны уже запрошенные периоды по валютам
+FETCHED_SUFFIX = '.fetched.json'
+
+# Период курсов: первая и последняя дата
+DateRange = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+class FxRateTable:
+    """
+    Таблица исторических курсов: дата, валюта и курс (единиц базовой валюты за единицу валюты).
+
+    Курс на дату операции берется как последний известный на эту дату (as-of), поэтому
+    выходные и праздники без котировок не требуют отдельной обработки. Для дат раньше
+    первой котировки валюты используется первая котировка.
+
+    Кроме курсов таблица помнит, за какие периоды история валюты уже запрашивалась: период считается
+    покрытым, даже если источник не вернул котировок на его крайние дни (выходные, еще не опубликованный
+    курс) или не вернул их вовсе, поэтому он не запрашивается повторно.
+    """
+
+    def __init__(self, rates: pd.DataFrame, base: str = BASE_CURRENCY,
+                 fetched: Optional[Mapping[str, Sequence[Tuple[Any, Any]]]] = None) -> None:
+        frame = pd.DataFrame({
+            'date': pd.to_datetime(rates['date']).dt.normalize(),
+            'currency': rates['currency'].astype(str),
+            'rate': rates['rate'].astype('float64')
+        })
+        self.base = base
+        self._rates = (frame.dropna().drop_duplicates(['date', 'currency'], keep='last')
+                       .sort_values(['date', 'currency'], kind='stable').reset_index(drop=True))
+        self._fetched: Dict[str, List[DateRange]] = {
+            currency: _merge_ranges([(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize())
+                                     for start, end in ranges])
+            for currency, ranges in (fetched or {}).items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._rates)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Курсы, отсортированные по дате."""
+        return self._rates
+
+    @property
+    def currencies(self) -> List[str]:
+        """Валюты, для которых есть курсы."""
+        return sorted(self._rates['currency'].unique())
+
+    @property
+    def fetched(self) -> Dict[str, List[DateRange]]:
+        """Уже запрошенные периоды по валютам (непересекающиеся, по возрастанию)."""
+        return {currency: list(ranges) for currency, ranges in self._fetched.items()}
+
+    @property
+    def fingerprint(self) -> str:
+        """Хэш базовой валюты и всех курсов: меняется при любом исправлении или замене котировок."""
+        digest = hashlib.sha256(self.base.encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(self._rates, index=False).to_numpy().tobytes())
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]], base: str = BASE_CURRENCY,
+                     fetched: Optional[Mapping[str, Sequence[Tuple[Any, Any]]]] = None) -> 'FxRateTable':
+        """
+        Создает таблицу из списка словарей с ключами date, currency, rate.
+
+        :param records: Курсы.
+        :param base: Базовая валюта.
+        :param fetched: Уже запрошенные периоды по валютам.
+        :return: FxRateTable.
+        """
+        return cls(pd.DataFrame.from_records(list(records), columns=['date', 'currency', 'rate']), base, fetched)
+
+    @classmethod
+    def load(cls, path: str, base: str = BASE_CURRENCY) -> 'FxRateTable':
+        """
+        Читает таблицу из CSV-файла.
+
+        :param path: Путь к файлу.
+        :param base: Базовая валюта.
+        :return: FxRateTable (пустая, если файла нет).
+        """
+        fetched = None
+        if os.path.exists(f"{path}{FETCHED_SUFFIX}"):
+            with open(f"{path}{FETCHED_SUFFIX}", encoding='utf-8') as f:
+                fetched = json.load(f)
+        if not os.path.exists(path):
+            return cls.from_records([], base, fetched)
+        return cls(pd.read_csv(path), base, fetched)
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет таблицу в CSV-файл, а запрошенные периоды — в файл рядом с ним
+        (запись через временные файлы).
+
+        :param path: Путь к файлу.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        fetched = {currency: [[start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')] for start, end in ranges]
+                   for currency, ranges in self._fetched.items()}
+        write_atomically(f"{path}{FETCHED_SUFFIX}", lambda tmp_path: _write_json(fetched, tmp_path))
+        write_atomically(path, lambda tmp_path: self._rates.assign(
+            date=self._rates['date'].dt.strftime('%Y-%m-%d')).to_csv(tmp_path, index=False))
+
+    def merge(self, other: 'FxRateTable') -> 'FxRateTable':
+        """
+        Объединяет курсы и запрошенные периоды двух таблиц (при совпадении даты и валюты берется курс other).
+
+        :param other: Таблица с новыми курсами.
+        :return: Новая FxRateTable.
+        """
+        fetched: Dict[str, List[DateRange]] = self.fetched
+        for currency, ranges in other.fetched.items():
+            fetched.setdefault(currency, []).extend(ranges)
+        return FxRateTable(pd.concat([self._rates, other.frame], ignore_index=True), self.base, fetched)
+
+    def covers(self, currency: str, start: pd.Timestamp, end: pd.Timestamp) -> bool:
+        """
+        Проверяет, что курсы валюты за весь период есть в таблице или уже запрашивались.
+
+        :param currency: Код валюты.
+        :param start: Начало периода.
+        :param end: Конец периода.
+        :return: True, если период лежит между первой и последней котировкой или внутри запрошенного периода.
+        """
+        start, end = start.normalize(), end.normalize()
+        if any(first <= start and end <= last for first, last in self._fetched.get(currency, [])):
+            return True
+        dates = self._rates.loc[self._rates['currency'] == currency, 'date']
+        return bool(len(dates)) and dates.iloc[0] <= start and dates.iloc[-1] >= end
+
+    def lookup(self, currencies: pd.Series, dates: pd.Series) -> np.ndarray:
+        """
+        Возвращает курсы для пар (валюта, дата) одним as-of соединением, без поиска по строкам.
+        Для базовой валюты курс равен 1, для валют без котировок — NaN.
+
+        :param currencies: Коды валют.
+        :param dates: Даты.
+        :return: Массив курсов в порядке входных строк.
+        """
+        keys = pd.DataFrame({
+            'date': pd.to_datetime(dates).dt.normalize().to_numpy(),
+            'currency': currencies.astype(object).to_numpy(),
+            'position': np.arange(len(currencies))
+        })
+        rates = np.full(len(keys), np.nan)
+        rates[(keys['currency'] == self.base).to_numpy()] = 1.0
+
+        foreign = keys[(keys['currency'] != self.base).to_numpy() & keys['currency'].notna().to_numpy()
+                       & keys['date'].notna().to_numpy()]
+        if foreign.empty or self._rates.empty:
+            return rates
+        foreign = foreign.astype({'currency': str}).sort_values('date', kind='stable')
+        matched = pd.merge_asof(foreign, self._rates, on='date', by='currency', direction='backward')
+        missing = matched['rate'].isna().to_numpy()
+        if missing.any():
+            earliest = self._rates.groupby('currency')['rate'].first()
+            matched.loc[missing, 'rate'] = matched.loc[missing, 'currency'].map(earliest)
+        rates[matched['position'].to_numpy()] = matched['rate'].to_numpy()
+        return rates
+
+
+# Загрузка таблицы курсов с дозагрузкой недостающих периодов
+def load_rate_table(currencies: Sequence[str], start: pd.Timestamp, end: pd.Timestamp,
+                    path: str = DEFAULT_RATES_PATH, client: Optional['MarketDataClient'] = None,
+                    base: str = BASE_CURRENCY) -> FxRateTable:
+    """
+    Возвращает таблицу курсов из локального файла. Если для какой-то валюты в файле нет курсов
+    на весь период, история за период запрашивается один раз и сохраняется в файл.
+
+    :param currencies: Коды валют (базовая валюта пропускается).
+    :param start: Начало периода.
+    :param end: Конец периода.
+    :param path: Путь к файлу таблицы.
+    :param client: Клиент рыночных данных (по умолчанию общий).
+    :param base: Базовая валюта.
+    :return: FxRateTable.
+    """
+    table = FxRateTable.load(path, base)
+    missing = [currency for currency in currencies
+               if currency != base and not table.covers(currency, start, end)]
+    if not missing:
+        return table
+
+    if client is None:
+        from src.market_data import get_default_client
+        client = get_default_client()
+    history = client.get_rate_history(missing, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), base)
+    if history is None:
+        # Запрос не удался (сеть, статус ответа): период не отмечается, при следующем запуске запрос повторится
+        return table
+    # Период отмечается запрошенным, даже если котировок на его края (или вовсе) нет
+    table = table.merge(FxRateTable.from_records(history, base, {currency: [(start, end)] for currency in missing}))
+    table.save(path)
+    logger.info(f"Таблица курсов дополнена: {len(history)} котировок для {', '.join(missing)}.")
+    return table
+
+
+# Таблица курсов для валют и периода транзакций
+def rate_table_for(transactions: pd.DataFrame, path: str = DEFAULT_RATES_PATH,
+                   client: Optional['MarketDataClient'] = None, base: str = BASE_CURRENCY) -> FxRateTable:
+    """
+    Возвращает таблицу курсов, покрывающую все валюты и весь период транзакций (см. load_rate_table).
+
+    :param transactions: DataFrame в канонической схеме.
+    :param path: Путь к файлу таблицы.
+    :param client: Клиент рыночных данных (по умолчанию общий).
+    :param base: Базовая валюта.
+    :return: FxRateTable (пустая, если ни у одной транзакции нет даты).
+    """
+    currencies = sorted({
+        str(currency)
+        for column in (CURRENCY_COLUMN, PAYMENT_CURRENCY_COLUMN) if column in transactions.columns
+        for currency in transactions[column].dropna().unique()
+    })
+    dates = transactions[DATE_COLUMN].dropna()
+    if dates.empty:
+        return FxRateTable.from_records([], base)
+    return load_rate_table(currencies, dates.min(), dates.max(), path, client, base)
+
+
+# Приведение сумм к базовой валюте
+def convert_to_base(transactions: pd.DataFrame, rates: FxRateTable) -> pd.DataFrame:
+    """
+    Переводит суммы операции и платежа в базовую валюту за один векторный проход.
+
+    Если одна из сумм уже в базовой валюте, она же используется для другой (это фактический
+    курс банка); иначе сумма умножается на курс таблицы на дату операции. Исходные суммы
+    сохраняются в столбцах ORIGINAL_AMOUNT_COLUMN и ORIGINAL_PAYMENT_AMOUNT_COLUMN,
+    столбцы валют не меняются. Повторный вызов не пересчитывает уже переведенные суммы.
+
+    :param transactions: DataFrame в канонической схеме.
+    :param rates: Таблица курсов.
+    :return: Новый DataFrame с суммами в базовой валюте.
+    """
+    if ORIGINAL_AMOUNT_COLUMN in transactions.columns or CURRENCY_COLUMN not in transactions.columns:
+        return transactions
+
+    df = transactions.copy()
+    dates = df[DATE_COLUMN]
+    amount = df[AMOUNT_COLUMN].to_numpy(dtype='float64')
+    currency = df[CURRENCY_COLUMN]
+    # Строки без валюты считаются уже записанными в базовой валюте
+    amount_is_base = ((currency == rates.base) | currency.isna()).to_numpy()
+    converted_amount = amount * rates.lookup(currency, dates)
+
+    has_payment = PAYMENT_AMOUNT_COLUMN in df.columns and PAYMENT_CURRENCY_COLUMN in df.columns
+    if has_payment:
+        payment = df[PAYMENT_AMOUNT_COLUMN].to_numpy(dtype='float64')
+        payment_currency = df[PAYMENT_CURRENCY_COLUMN]
+        payment_is_base = ((payment_currency == rates.base) | payment_currency.isna()).to_numpy()
+        converted_payment = payment * rates.lookup(payment_currency, dates)
+        df[ORIGINAL_PAYMENT_AMOUNT_COLUMN] = payment
+        df[PAYMENT_AMOUNT_COLUMN] = np.where(payment_is_base, payment,
+                                             np.where(amount_is_base, amount, converted_payment))
+        converted_amount = np.where(payment_is_base & ~amount_is_base, payment, converted_amount)
+
+    df[ORIGINAL_AMOUNT_COLUMN] = amount
+    df[AMOUNT_COLUMN] = np.where(amount_is_base, amount, converted_amount)
+
+    unconverted = int((np.isnan(df[AMOUNT_COLUMN].to_numpy()) & ~np.isnan(amount)).sum())
+    if unconverted:
+        logger.warning(f"Нет курса для {unconverted} операций, их суммы в базовой валюте не определены.")
+    return df
+
+
+def _merge_ranges(ranges: List[DateRange]) -> List[DateRange]:
+    # Объединение пересекающихся и соседних (через день) периодов
+    merged: List[DateRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + pd.Timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _write_json(data: Any, path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
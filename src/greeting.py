@@ -0,0 +1,14 @@
+# Модуль без тяжелых зависимостей: используется командами, которым не нужны данные (см. src.cli)
+
+
+# Приветствие в зависимости от времени суток
+def get_greeting(current_time: str) -> str:
+    hour = int(current_time.split(' ')[1].split(':')[0])
+    if 5 <= hour < 12:
+        return "Доброе утро"
+    elif 12 <= hour < 18:
+        return "Добрый день"
+    elif 18 <= hour < 22:
+        return "Добрый вечер"
+    else:
+        return "Доброй ночи"
@@ -0,0 +1,278 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.cache import feather, file_content_hash, read_cached_frame, write_atomically, write_cached_frame
+from src.cube import MONTH_COLUMN, AggregateCube, build_cube_cells
+from src.fx import BASE_CURRENCY, DEFAULT_RATES_PATH, FxRateTable, convert_to_base, rate_table_for
+from src.metrics import timed
+from src.schema import (AMOUNT_COLUMN, CARD_COLUMN, CATEGORY_COLUMN, DATE_COLUMN, DESCRIPTION_COLUMN,
+                        normalize_transactions)
+from src.store import TransactionStore
+from src.utils import load_transactions
+
+if TYPE_CHECKING:
+    from src.market_data import MarketDataClient
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Поля ключа транзакции: одинаковые строки пересекающихся выгрузок имеют одинаковый ключ
+KEY_FIELDS = (DATE_COLUMN, CARD_COLUMN, AMOUNT_COLUMN, DESCRIPTION_COLUMN)
+
+# Служебные столбцы партиций: хэш ключа и номер повторения ключа внутри месяца
+KEY_COLUMN = '_key'
+OCCURRENCE_COLUMN = '_occurrence'
+
+# Версия формата хранилища и файл с его описанием
+LEDGER_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+
+class IngestResult(NamedTuple):
+    """Результат загрузки выгрузки: число новых строк и дубликатов, затронутые месяцы."""
+    added: int
+    duplicates: int
+    months: List[str]
+
+
+# Ключи транзакций
+def transaction_keys(transactions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Вычисляет ключ каждой транзакции: 64-битный хэш полей KEY_FIELDS и номер повторения ключа.
+    Номер повторения различает одинаковые операции внутри одной выгрузки
+    (например, две одинаковые поездки в одну секунду), чтобы они не считались дубликатами.
+
+    :param transactions: DataFrame в канонической схеме.
+    :return: DataFrame со столбцами KEY_COLUMN и OCCURRENCE_COLUMN (индекс как у transactions).
+    """
+    fields = pd.DataFrame({
+        field: transactions[field] if field in transactions.columns else pd.Series(np.nan, transactions.index)
+        for field in KEY_FIELDS
+    })
+    keys = pd.util.hash_pandas_object(fields, index=False)
+    return pd.DataFrame({
+        KEY_COLUMN: keys.to_numpy(),
+        OCCURRENCE_COLUMN: keys.groupby(keys.to_numpy()).cumcount().to_numpy(dtype='int64')
+    }, index=transactions.index)
+
+
+class TransactionLedger:
+    """
+    Постоянное хранилище транзакций, разбитое на месячные партиции (колоночные файлы).
+
+    Новые выгрузки дописываются через ingest: строки, ключ которых уже есть в партиции месяца,
+    отбрасываются, а партиции и ячейки куба агрегатов пересчитываются только для месяцев,
+    в которые добавились строки. Уже загруженный файл (по хэшу содержимого) повторно не читается.
+
+    Новые строки переводятся в базовую валюту base_currency (ключи считаются по исходным суммам):
+    по переданной таблице курсов rates или по локальной таблице rates_path, дополняемой через client
+    (см. src.fx.rate_table_for). При base_currency=None суммы хранятся как в выгрузке. Базовая валюта
+    записывается в описание хранилища, и загрузка в хранилище с другой валютой запрещена, чтобы
+    в одном хранилище не смешивались переведенные и непереведенные месяцы.
+    """
+
+    def __init__(self, root: str, base_currency: Optional[str] = BASE_CURRENCY, rates: Optional[FxRateTable] = None,
+                 rates_path: str = DEFAULT_RATES_PATH, client: Optional['MarketDataClient'] = None) -> None:
+        if feather is None:
+            raise ImportError("Для хранилища транзакций нужен pyarrow.")
+        if rates is not None and base_currency is not None and rates.base != base_currency:
+            raise ValueError(f"Таблица курсов в {rates.base}, а хранилище — в {base_currency}.")
+        self.root = root
+        self.base_currency = base_currency
+        self.rates = rates
+        self.rates_path = rates_path
+        self.client = client
+        self._manifest = self._read_manifest()
+
+    @property
+    def months(self) -> List[pd.Period]:
+        """Месяцы, для которых в хранилище есть транзакции."""
+        return [pd.Period(month, freq='M') for month in sorted(self._manifest['months'])]
+
+    def __len__(self) -> int:
+        return sum(month['rows'] for month in self._manifest['months'].values())
+
+    @timed('load')
+    def ingest(self, source: Union[str, pd.DataFrame]) -> IngestResult:
+        """
+        Дописывает выгрузку в хранилище.
+
+        :param source: Путь к Excel-файлу выгрузки или DataFrame с транзакциями.
+        :return: IngestResult с числом новых строк, дубликатов и затронутыми месяцами.
+        :raises ValueError: Если хранилище уже содержит суммы в другой базовой валюте (или непереведенные).
+        """
+        self._check_base_currency()
+        content_hash = None
+        if isinstance(source, str):
+            content_hash = file_content_hash(source)
+            if any(entry['sha256'] == content_hash for entry in self._manifest['sources']):
+                logger.info(f"Файл {source} уже загружен, пропускаем.")
+                return IngestResult(0, 0, [])
+            transactions = load_transactions(source, use_cache=False)
+        else:
+            transactions = normalize_transactions(source)
+
+        missing = int(transactions[DATE_COLUMN].isna().sum())
+        if missing:
+            logger.warning(f"Пропущено {missing} транзакций без даты операции.")
+            transactions = transactions[transactions[DATE_COLUMN].notna()]
+
+        transactions = pd.concat([transactions, transaction_keys(transactions)], axis=1)
+        if self.base_currency is not None:
+            rates = (self.rates if self.rates is not None
+                     else rate_table_for(transactions, self.rates_path, self.client, self.base_currency))
+            transactions = convert_to_base(transactions, rates)
+        periods = transactions[DATE_COLUMN].dt.to_period('M').astype(str)
+
+        added = 0
+        touched = []
+        for period, rows in transactions.groupby(periods.to_numpy(), sort=True):
+            month_added = self._append_month(str(period), rows)
+            if month_added:
+                added += month_added
+                touched.append(str(period))
+
+        self._manifest['base_currency'] = self.base_currency
+        self._manifest['sources'].append({
+            'source': os.path.abspath(source) if isinstance(source, str) else None,
+            'sha256': content_hash,
+            'rows': len(transactions),
+            'added': added,
+            'ingested_at': datetime.datetime.now().isoformat(timespec='seconds')
+        })
+        self._write_manifest()
+        logger.info(f"Загружено {added} новых транзакций, дубликатов: {len(transactions) - added}, "
+                    f"обновлено месяцев: {len(touched)}.")
+        return IngestResult(added, len(transactions) - added, touched)
+
+    def month_frame(self, month: str) -> pd.DataFrame:
+        """
+        Возвращает транзакции одного месяца.
+
+        :param month: Месяц в формате 'YYYY-MM'.
+        :return: DataFrame с транзакциями месяца (пустой, если месяца нет в хранилище).
+        """
+        if month not in self._manifest['months']:
+            return pd.DataFrame()
+        return read_cached_frame(self._partition_path('transactions', month)).drop(
+            columns=[KEY_COLUMN, OCCURRENCE_COLUMN])
+
+    def frame(self) -> pd.DataFrame:
+        """Все транзакции хранилища в канонической схеме, в порядке возрастания даты."""
+        months = sorted(self._manifest['months'])
+        if not months:
+            return pd.DataFrame()
+        return normalize_transactions(pd.concat([self.month_frame(month) for month in months], ignore_index=True))
+
+    def store(self) -> TransactionStore:
+        """Все транзакции хранилища в виде TransactionStore."""
+        return TransactionStore(self.frame())
+
+    def cube(self, source: Optional[TransactionStore] = None) -> AggregateCube:
+        """
+        Собирает куб агрегатов из сохраненных ячеек месяцев без просмотра транзакций.
+
+        :param source: Транзакции для запросов, которые нельзя ответить по кубу (необязательно).
+        :return: AggregateCube.
+        :raises ValueError: Если хранилище пусто.
+        """
+        months = sorted(self._manifest['months'])
+        if not months:
+            raise ValueError("Хранилище транзакций пусто.")
+        cells = pd.concat([read_cached_frame(self._partition_path('cube', month)) for month in months],
+                          ignore_index=True)
+        # Категории месяцев различаются, после объединения измерения снова приводятся к категориям
+        for column in (CATEGORY_COLUMN, CARD_COLUMN):
+            cells[column] = cells[column].astype('category')
+        return AggregateCube(cells, source)
+
+    def _append_month(self, month: str, rows: pd.DataFrame) -> int:
+        # Новые строки месяца: ключи сверяются с хэш-индексом партиции (без чтения остальных столбцов)
+        path = self._partition_path('transactions', month)
+        existing: Optional[pd.DataFrame] = None
+        if month in self._manifest['months']:
+            existing_keys = feather.read_table(path, columns=[KEY_COLUMN, OCCURRENCE_COLUMN]).to_pandas()
+            index = pd.MultiIndex.from_frame(existing_keys)
+            rows = rows[~pd.MultiIndex.from_frame(rows[[KEY_COLUMN, OCCURRENCE_COLUMN]]).isin(index)]
+            if rows.empty:
+                return 0
+            existing = read_cached_frame(path)
+
+        combined = rows if existing is None else pd.concat([existing, rows], ignore_index=True)
+        combined = normalize_transactions(combined).sort_values(DATE_COLUMN, kind='stable')
+        write_cached_frame(combined, path)
+
+        # Ячейки куба пересчитываются только для этого месяца
+        cells = build_cube_cells(combined.drop(columns=[KEY_COLUMN, OCCURRENCE_COLUMN]))
+        write_cached_frame(cells[cells[MONTH_COLUMN] == pd.Timestamp(month)], self._partition_path('cube', month))
+
+        self._manifest['months'][month] = {
+            'rows': len(combined),
+            'updated_at': datetime.datetime.now().isoformat(timespec='seconds')
+        }
+        return len(rows)
+
+    def _check_base_currency(self) -> None:
+        # Описания без base_currency созданы до перевода валют: их месяцы хранят исходные суммы
+        if not self._manifest['months']:
+            return
+        stored = self._manifest.get('base_currency')
+        if stored != self.base_currency:
+            stored_text = f"в {stored}" if stored else "без перевода валют"
+            current_text = f"в {self.base_currency}" if self.base_currency else "без перевода валют"
+            raise ValueError(f"Хранилище {self.root} содержит суммы {stored_text}, а загрузка идет {current_text}: "
+                             f"месяцы с разными суммами нельзя смешивать.")
+
+    def _partition_path(self, kind: str, month: str) -> str:
+        return os.path.join(self.root, kind, f"{month}.feather")
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        path = os.path.join(self.root, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {'version': LEDGER_VERSION, 'months': {}, 'sources': []}
+        with open(path, encoding='utf-8') as f:
+            manifest: Dict[str, Any] = json.load(f)
+        if manifest.get('version') != LEDGER_VERSION:
+            raise ValueError(f"Неподдерживаемая версия хранилища: {manifest.get('version')}")
+        return manifest
+
+    def _write_manifest(self) -> None:
+        # Описание записывается после партиций: при сбое во время загрузки оно указывает на прежние данные
+        os.makedirs(self.root, exist_ok=True)
+
+        def write(tmp_path: str) -> None:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+
+        write_atomically(os.path.join(self.root, MANIFEST_FILE), write)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Точка входа: дописывает выгрузки в хранилище транзакций."""
+    parser = argparse.ArgumentParser(description="Загрузка новых выгрузок операций в хранилище транзакций.")
+    parser.add_argument('ledger', help="Папка хранилища.")
+    parser.add_argument('files', nargs='+', help="Excel-файлы выгрузок.")
+    parser.add_argument('--base-currency', default=BASE_CURRENCY, help="Валюта, в которую переводятся суммы.")
+    parser.add_argument('--no-convert', action='store_true', help="Хранить суммы без перевода в базовую валюту.")
+    parser.add_argument('--rates', default=DEFAULT_RATES_PATH, help="Файл таблицы курсов.")
+    args = parser.parse_args(argv)
+
+    ledger = TransactionLedger(args.ledger, None if args.no_convert else args.base_currency, rates_path=args.rates)
+    for file_path in args.files:
+        result = ledger.ingest(file_path)
+        print(f"{file_path}: новых {result.added}, дубликатов {result.duplicates}, "
+              f"месяцы: {', '.join(result.months) or '-'}")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -1,14 +1,21 @@
 import logging
+import os
 
 import pandas as pd
 
+from src import metrics
+from src.cube import load_cube
+from src.fx import convert_to_base, rate_table_for
 from src.services import analyze_cashback_categories
+from src.store import TransactionStore
 from src.utils import load_transactions
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
+# Логирование
 logger = logging.getLogger(__name__)
 
+# Файл с операциями
+OPERATIONS_FILE = '../data/operations.xlsx'
+
 
 def main() -> None:
     """Основная функция приложения для анализа кешбэка."""
@@ -16,7 +23,7 @@ def main() -> None:
 
     try:
         # Загрузка данных
-        transactions = load_transactions('../data/operations.xlsx')
+        transactions = load_transactions(OPERATIONS_FILE)
         logger.info("Транзакции успешно загружены.")
     except FileNotFoundError as e:
         logger.error(f"Ошибка загрузки данных: {e}")
@@ -29,11 +36,21 @@ def main() -> None:
 
     choice = input("Введите ваш выбор (1/2): ").strip()
 
+    if choice in ('1', '2'):
+        # Суммы в валюте переводятся в рубли по локальной таблице курсов (недостающие курсы запрашиваются
+        # один раз, только когда анализ действительно выбран)
+        rates = rate_table_for(transactions)
+        transactions = convert_to_base(transactions, rates)
+        # Хранилище с месячными партициями для выборок по периодам
+        store = TransactionStore(transactions)
+
     if choice == '1':
         year = int(input("Введите год (например, 2024): ").strip())
         month = int(input("Введите месяц (1-12): ").strip())
 
-        cashback_result = analyze_cashback_categories(transactions, year=year, month=month)
+        # Куб агрегатов (хранится в кэше рядом с файлом операций; метка меняется вместе с курсами)
+        cube = load_cube(OPERATIONS_FILE, store, tag=f'cube-{rates.fingerprint}')
+        cashback_result = analyze_cashback_categories(cube, year=year, month=month)
         if cashback_result:
             print("Анализ кешбэка за выбранный месяц:")
             print(cashback_result)
@@ -44,13 +61,8 @@ def main() -> None:
         start_date = input("Введите начальную дату (YYYY-MM-DD): ").strip()
         end_date = input("Введите конечную дату (YYYY-MM-DD): ").strip()
 
-        transactions['Дата операции'] = pd.to_datetime(transactions['Дата операции'], errors='coerce')
-        filtered_data = transactions[(
-            transactions['Дата операции'] >= pd.to_datetime(start_date)) &
-            (transactions['Дата операции'] <= pd.to_datetime(end_date))
-        ]
-
-        cashback_result = analyze_cashback_categories(filtered_data, year=None, month=None)
+        # Для одного запроса достаточно месячных партиций хранилища, накопленные суммы не строятся
+        cashback_result = analyze_cashback_categories(store.range(pd.Timestamp(start_date), pd.Timestamp(end_date)))
         if cashback_result:
             print("Анализ кешбэка за выбранный диапазон:")
             print(cashback_result)
@@ -59,8 +71,13 @@ def main() -> None:
     else:
         print("Некорректный ввод. Попробуйте снова.")
 
+    # Время стадий (загрузка, нормализация, фильтрация, агрегация), если сбор метрик включен
+    if metrics.is_enabled():
+        metrics.REGISTRY.dump(os.environ.get(metrics.METRICS_FILE_ENV, metrics.DEFAULT_METRICS_FILE))
     logger.info("Завершение работы приложения.")
 
 
 if __name__ == '__main__':
+    # Логирование настраивается один раз, в точке входа
+    logging.basicConfig(level=logging.INFO)
     main()
@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Protocol, Tuple
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Параметры по умолчанию
+DEFAULT_TTL = 60.0
+DEFAULT_MAX_STALE = 3600.0
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class CacheBackend(Protocol):
+    """Хранилище записей кэша: значение и время его получения."""
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        ...
+
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        ...
+
+
+class MemoryBackend:
+    """Хранилище в памяти процесса с вытеснением давно не использованных записей (LRU)."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteBackend:
+    """
+    Хранилище на диске (SQLite), общее для нескольких процессов.
+    Значения сохраняются в JSON, вытесняются давно не использованные записи (LRU).
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS market_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._connect() as connection:
+            row = connection.execute('SELECT value, stored_at FROM market_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE market_cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        return json.loads(row[0]), float(row[1])
+
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO market_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value, ensure_ascii=False), stored_at, time.time())
+            )
+            connection.execute(
+                'DELETE FROM market_cache WHERE key NOT IN '
+                '(SELECT key FROM market_cache ORDER BY accessed_at DESC LIMIT ?)',
+                (self.max_entries,)
+            )
+
+
+class MarketDataCache:
+    """
+    Кэш рыночных данных с индивидуальным временем жизни (TTL) для каждого ключа
+    и режимом stale-while-revalidate: устаревшее значение отдается сразу,
+    а обновление выполняется в фоне.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, default_ttl: float = DEFAULT_TTL,
+                 ttls: Optional[Mapping[str, float]] = None, max_stale: float = DEFAULT_MAX_STALE,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.backend: CacheBackend = backend if backend is not None else MemoryBackend()
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.max_stale = max_stale
+        self._clock = clock
+        self._refreshes: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='market-cache')
+
+    def ttl_for(self, key: str) -> float:
+        """Время жизни записи для ключа."""
+        return self.ttls.get(key, self.default_ttl)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        Возвращает значение из кэша или получает его через fetch.
+
+        Свежее значение отдается без запроса. Устаревшее (но не старше max_stale) отдается сразу,
+        а fetch запускается в фоне. Иначе fetch выполняется синхронно.
+        Неудачный результат (None) не кэшируется.
+
+        :param key: Ключ записи.
+        :param fetch: Функция получения значения.
+        :return: Значение или None.
+        """
+        entry = self.backend.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = self._clock() - stored_at
+            if age < self.ttl_for(key):
+                return value
+            if age < self.ttl_for(key) + self.max_stale:
+                self._schedule_refresh(key, fetch)
+                return value
+        return self._refresh(key, fetch)
+
+    def wait_for_refreshes(self, timeout: Optional[float] = None) -> None:
+        """Ожидает завершения фоновых обновлений."""
+        with self._lock:
+            futures = list(self._refreshes.values())
+        wait(futures, timeout=timeout)
+
+    def close(self) -> None:
+        """Останавливает фоновые обновления."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _refresh(self, key: str, fetch: Callable[[], Optional[Any]]) -> Optional[Any]:
+        value = fetch()
+        if value is not None:
+            self.backend.set(key, value, self._clock())
+        return value
+
+    def _schedule_refresh(self, key: str, fetch: Callable[[], Optional[Any]]) -> None:
+        with self._lock:
+            if key in self._refreshes:
+                return
+            future = self._executor.submit(self._refresh, key, fetch)
+            self._refreshes[key] = future
+        future.add_done_callback(lambda done: self._finish_refresh(key, done))
+
+    def _finish_refresh(self, key: str, future: Future) -> None:
+        with self._lock:
+            self._refreshes.pop(key, None)
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Не удалось обновить запись кэша {key}: {future.exception()}")
@@ -0,0 +1,199 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.market_cache import MarketDataCache, MemoryBackend, SQLiteBackend
+from src.metrics import timed
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Адреса источников рыночных данных
+FX_URL = 'https://api.exchangerate.host/latest'
+FX_HISTORY_URL_TEMPLATE = ('https://api.exchangerate.host/timeseries?start_date={start}&end_date={end}'
+                           '&base={base}&symbols={symbols}')
+STOCK_URL_TEMPLATE = 'https://api.example.com/stocks/{symbol}'
+
+# Параметры по умолчанию
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_CURRENCIES = ('USD', 'EUR')
+
+
+class MarketDataClient:
+    """
+    Клиент рыночных данных с общим пулом соединений, таймаутом на каждый запрос
+    и ограниченным числом параллельных запросов.
+    Если передан кэш, ответы берутся из него (ключи 'fx' и 'stock:<тикер>').
+    """
+
+    def __init__(self, fx_url: str = FX_URL, stock_url_template: str = STOCK_URL_TEMPLATE,
+                 timeout: float = DEFAULT_TIMEOUT, max_workers: int = DEFAULT_MAX_WORKERS,
+                 session: Optional[requests.Session] = None, cache: Optional[MarketDataCache] = None,
+                 fx_history_url_template: str = FX_HISTORY_URL_TEMPLATE) -> None:
+        self.fx_url = fx_url
+        self.fx_history_url_template = fx_history_url_template
+        self.cache = cache
+        self.stock_url_template = stock_url_template
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='market-data')
+
+    def __enter__(self) -> 'MarketDataClient':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Останавливает пул потоков и закрывает соединения."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    @timed('fetch', rows=None)
+    def fetch_json(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Выполняет GET-запрос и возвращает JSON-ответ.
+
+        :param url: Адрес запроса.
+        :return: Разобранный JSON или None, если запрос не удался.
+        """
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.error(f"Ошибка запроса {url}: {e}")
+            return None
+        if response.status_code != 200:
+            logger.error(f"Запрос {url} вернул статус {response.status_code}")
+            return None
+        data: Dict[str, Any] = response.json()
+        return data
+
+    def get_currency_rates(self, currencies: Sequence[str] = DEFAULT_CURRENCIES) -> List[Dict[str, Any]]:
+        """
+        Возвращает курсы валют.
+
+        :param currencies: Коды валют.
+        :return: Список словарей с валютой и курсом.
+        """
+        rates = self._cached('fx', self._fetch_rates)
+        if rates is None:
+            logger.error("Не удалось получить курсы валют")
+            return []
+        return [{"currency": currency, "rate": rates.get(currency, 'N/A')} for currency in currencies]
+
+    def get_rate_history(self, currencies: Sequence[str], start: str, end: str,
+                         base: str = 'RUB') -> Optional[List[Dict[str, Any]]]:
+        """
+        Возвращает исторические курсы валют за период (для таблицы курсов, см. src.fx).
+
+        :param currencies: Коды валют.
+        :param start: Первая дата в формате 'YYYY-MM-DD'.
+        :param end: Последняя дата в формате 'YYYY-MM-DD'.
+        :param base: Базовая валюта.
+        :return: Список словарей с датой, валютой и курсом (единиц базовой валюты за единицу валюты);
+            пустой, если источник ответил без курсов; None, если запрос не удался.
+        """
+        data = self.fetch_json(self.fx_history_url_template.format(
+            start=start, end=end, base=base, symbols=','.join(currencies)))
+        if data is None:
+            logger.error("Не удалось получить историю курсов валют")
+            return None
+        history = data.get('rates')
+        if not isinstance(history, dict):
+            logger.warning(f"Источник не вернул историю курсов за {start} — {end}: {data.get('error', data)}")
+            return []
+        return [
+            {"date": date, "currency": currency, "rate": 1 / value}
+            for date, rates in history.items() if isinstance(rates, dict)
+            for currency, value in rates.items() if value
+        ]
+
+    def get_stock_price(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает стоимость одной акции.
+
+        :param symbol: Тикер.
+        :return: Словарь с тикером и ценой или None, если данные не получены.
+        """
+        price = self._cached(f'stock:{symbol}', lambda: self._fetch_price(symbol))
+        if price is None:
+            logger.error(f"Не удалось получить данные по акции {symbol}")
+            return None
+        return {"stock": symbol, "price": price.get('price', 'N/A')}
+
+    def _cached(self, key: str, fetch: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return fetch()
+        value: Optional[Dict[str, Any]] = self.cache.get_or_fetch(key, fetch)
+        return value
+
+    def _fetch_rates(self) -> Optional[Dict[str, Any]]:
+        data = self.fetch_json(self.fx_url)
+        return None if data is None else data.get('rates', {})
+
+    def _fetch_price(self, symbol: str) -> Optional[Dict[str, Any]]:
+        data = self.fetch_json(self.stock_url_template.format(symbol=symbol))
+        return None if data is None else {'price': data.get('price', 'N/A')}
+
+    def get_stock_prices(self, symbols: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Параллельно запрашивает стоимость акций; порядок результатов совпадает с порядком тикеров.
+
+        :param symbols: Тикеры.
+        :return: Список словарей с тикером и ценой.
+        """
+        return [price for price in self._executor.map(self.get_stock_price, symbols) if price is not None]
+
+    def submit_stock_prices(self, symbols: Sequence[str]) -> List['Future[Optional[Dict[str, Any]]]']:
+        """
+        Запускает запросы стоимости акций и возвращает Future для каждого тикера,
+        чтобы вызывающий код мог забрать готовые результаты к своему сроку.
+
+        :param symbols: Тикеры.
+        :return: Список Future в порядке тикеров.
+        """
+        return [self._executor.submit(self.get_stock_price, symbol) for symbol in symbols]
+
+    def get_market_data(self, symbols: Sequence[str],
+                        currencies: Sequence[str] = DEFAULT_CURRENCIES
+                        ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Одновременно запрашивает курсы валют и стоимость всех акций.
+
+        :param symbols: Тикеры.
+        :param currencies: Коды валют.
+        :return: Кортеж (курсы валют, стоимость акций).
+        """
+        rates_future = self._executor.submit(self.get_currency_rates, currencies)
+        price_futures = self.submit_stock_prices(symbols)
+        prices = [future.result() for future in price_futures]
+        return rates_future.result(), [price for price in prices if price is not None]
+
+
+_default_client: Optional[MarketDataClient] = None
+_default_client_lock = threading.Lock()
+
+
+# Клиент по умолчанию (создается при первом обращении)
+def get_default_client() -> MarketDataClient:
+    """
+    Возвращает общий для приложения клиент рыночных данных с кэшем.
+    Если задана переменная окружения MARKET_DATA_CACHE_PATH, кэш хранится на диске
+    и разделяется между процессами, иначе — в памяти процесса.
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            cache_path = os.environ.get('MARKET_DATA_CACHE_PATH')
+            backend = SQLiteBackend(cache_path) if cache_path else MemoryBackend()
+            _default_client = MarketDataClient(cache=MarketDataCache(backend))
+        return _default_client
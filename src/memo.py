@@ -0,0 +1,106 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Максимальное число результатов в кэше по умолчанию
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+class UniqueValueMemo:
+    """
+    Ограниченный LRU-кэш результатов вычислений над отдельными значениями столбца.
+    Ключ записи — пара (ключ вычисления, значение), поэтому повторные вызовы
+    над теми же данными используют уже посчитанные результаты.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._results: 'OrderedDict[Tuple[Hashable, Hashable], Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def clear(self) -> None:
+        """Очищает кэш."""
+        with self._lock:
+            self._results.clear()
+
+    def get_or_compute(self, key: Hashable, value: Hashable, func: Callable[[Any], Any]) -> Any:
+        """
+        Возвращает результат func(value) из кэша или вычисляет и сохраняет его.
+
+        :param key: Ключ вычисления (должен однозначно определять func).
+        :param value: Значение.
+        :param func: Функция от значения.
+        :return: Результат вычисления.
+        """
+        entry = (key, value)
+        with self._lock:
+            if entry in self._results:
+                self._results.move_to_end(entry)
+                return self._results[entry]
+        result = func(value)
+        with self._lock:
+            self._results[entry] = result
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return result
+
+    def apply(self, values: pd.Series, func: Callable[[Any], Any], key: Hashable,
+              na_value: Any = None) -> pd.Series:
+        """
+        Применяет func только к уникальным значениям столбца и раздает результаты по строкам.
+
+        Для категориального столбца используются его категории и коды без повторной факторизации.
+
+        :param values: Столбец со значениями.
+        :param func: Функция от одного значения.
+        :param key: Ключ вычисления для кэша.
+        :param na_value: Результат для пропусков.
+        :return: Series с результатами, выровненный по индексу values.
+        """
+        codes, uniques = _codes_and_uniques(values)
+        results = [self.get_or_compute(key, value, func) for value in uniques]
+        # Таблица заполняется поэлементно, чтобы кортежи и списки оставались значениями, а не строками массива;
+        # последний элемент таблицы отвечает коду -1 (пропуск)
+        table = np.empty(len(results) + 1, dtype=object)
+        for position, result in enumerate(results):
+            table[position] = result
+        table[-1] = na_value
+        broadcast: pd.Series = pd.Series(table[codes], index=values.index).infer_objects()
+        return broadcast
+
+
+# Кэш по умолчанию, общий для всего приложения
+DEFAULT_MEMO = UniqueValueMemo()
+
+
+# Применение функции к уникальным значениям столбца
+def apply_over_uniques(values: pd.Series, func: Callable[[Any], Any], key: Hashable,
+                       na_value: Any = None, memo: Optional[UniqueValueMemo] = None) -> pd.Series:
+    """
+    Вычисляет func только для уникальных значений столбца (с кэшированием между вызовами)
+    и раздает результаты по строкам через коды значений.
+
+    :param values: Столбец со значениями.
+    :param func: Функция от одного значения.
+    :param key: Ключ вычисления для кэша.
+    :param na_value: Результат для пропусков.
+    :param memo: Кэш (по умолчанию общий DEFAULT_MEMO).
+    :return: Series с результатами, выровненный по индексу values.
+    """
+    return (memo if memo is not None else DEFAULT_MEMO).apply(values, func, key, na_value)
+
+
+def _codes_and_uniques(values: pd.Series) -> Tuple[np.ndarray, Any]:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    return pd.factorize(values)
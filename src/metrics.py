@@ -0,0 +1,324 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextvars import ContextVar, Token
+from functools import wraps
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, TypeVar, Union, cast
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Стадии обработки запроса
+STAGES: Tuple[str, ...] = ('load', 'normalize', 'filter', 'aggregate', 'fetch', 'write')
+
+# Границы корзин гистограммы задержек, в секундах
+LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, math.inf)
+
+# Переменные окружения: включение сбора метрик и файл для их выгрузки при завершении приложения
+METRICS_ENV = 'FINANALYZER_METRICS'
+METRICS_FILE_ENV = 'FINANALYZER_METRICS_FILE'
+DEFAULT_METRICS_FILE = 'metrics.json'
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class StageMetrics:
+    """
+    Накопленные показатели одной функции в стадии: число вызовов и ошибок, время, объем строк
+    и гистограмма задержек.
+    """
+
+    __slots__ = ('count', 'errors', 'seconds', 'max_seconds', 'rows', 'buckets')
+
+    def __init__(self, bucket_count: int) -> None:
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.buckets = [0] * bucket_count
+
+    def add(self, other: 'StageMetrics') -> None:
+        """
+        Прибавляет показатели другого набора (с теми же корзинами гистограммы).
+
+        :param other: Показатели, которые нужно прибавить.
+        """
+        self.count += other.count
+        self.errors += other.errors
+        self.seconds += other.seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.rows += other.rows
+        self.buckets = [hits + other_hits for hits, other_hits in zip(self.buckets, other.buckets)]
+
+
+class MetricsRegistry:
+    """
+    Потокобезопасный реестр метрик по стадиям и замеряемым функциям.
+    Снимок выгружается в JSON или в текстовом формате Prometheus.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self._stages: Dict[Tuple[str, str], StageMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, rows: Optional[int] = None, error: bool = False,
+               function: str = '') -> None:
+        """
+        Учитывает один вызов стадии.
+
+        :param stage: Имя стадии.
+        :param seconds: Длительность вызова в секундах.
+        :param rows: Число обработанных строк (None, если неизвестно).
+        :param error: Завершился ли вызов исключением.
+        :param function: Имя замеряемой функции или участка кода.
+        """
+        bucket = next(index for index, bound in enumerate(self.buckets) if seconds <= bound)
+        with self._lock:
+            metrics = self._stages.get((stage, function))
+            if metrics is None:
+                metrics = self._stages[(stage, function)] = StageMetrics(len(self.buckets))
+            metrics.count += 1
+            metrics.errors += int(error)
+            metrics.seconds += seconds
+            metrics.max_seconds = max(metrics.max_seconds, seconds)
+            metrics.rows += rows or 0
+            metrics.buckets[bucket] += 1
+
+    def reset(self) -> None:
+        """Очищает накопленные метрики."""
+        with self._lock:
+            self._stages.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Возвращает копию накопленных метрик.
+
+        :return: Словарь: стадия -> показатели (count, errors, seconds, max_seconds, mean_seconds, rows, buckets)
+            и те же показатели по функциям в ключе functions.
+        """
+        functions: Dict[str, Dict[str, StageMetrics]] = {}
+        with self._lock:
+            for (stage, function), metrics in sorted(self._stages.items()):
+                copy = StageMetrics(len(self.buckets))
+                copy.add(metrics)
+                functions.setdefault(stage, {})[function] = copy
+
+        snapshot = {}
+        for stage, by_function in functions.items():
+            total = StageMetrics(len(self.buckets))
+            for metrics in by_function.values():
+                total.add(metrics)
+            snapshot[stage] = self._summary(total)
+            snapshot[stage]['functions'] = {function: self._summary(metrics)
+                                            for function, metrics in by_function.items()}
+        return snapshot
+
+    def to_json(self) -> str:
+        """Возвращает снимок метрик в формате JSON."""
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = 'finanalyzer') -> str:
+        """
+        Возвращает снимок метрик в текстовом формате Prometheus.
+
+        :param prefix: Префикс имен метрик.
+        :return: Текст для отдачи по /metrics или записи в файл.
+        """
+        series = [(f'stage="{stage}",function="{function}"', values)
+                  for stage, stage_values in self.snapshot().items()
+                  for function, values in stage_values['functions'].items()]
+        lines: List[str] = []
+
+        lines += [f'# HELP {prefix}_stage_seconds Длительность стадий обработки.',
+                  f'# TYPE {prefix}_stage_seconds histogram']
+        for labels, values in series:
+            cumulative = 0
+            for bound, hits in values['buckets'].items():
+                cumulative += hits
+                lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{{labels}}} {values["seconds"]!r}')
+            lines.append(f'{prefix}_stage_seconds_count{{{labels}}} {values["count"]}')
+
+        for name, key, description in (('stage_errors_total', 'errors', 'Число вызовов стадий с ошибкой.'),
+                                       ('stage_rows_total', 'rows', 'Число строк, обработанных стадиями.')):
+            lines += [f'# HELP {prefix}_{name} {description}', f'# TYPE {prefix}_{name} counter']
+            lines += [f'{prefix}_{name}{{{labels}}} {values[key]}' for labels, values in series]
+        return '\n'.join(lines) + '\n'
+
+    def _summary(self, metrics: StageMetrics) -> Dict[str, Any]:
+        # Показатели стадии или функции в виде словаря снимка
+        return {
+            'count': metrics.count,
+            'errors': metrics.errors,
+            'seconds': metrics.seconds,
+            'max_seconds': metrics.max_seconds,
+            'mean_seconds': metrics.seconds / metrics.count if metrics.count else 0.0,
+            'rows': metrics.rows,
+            'buckets': {_bound_label(bound): hits for bound, hits in zip(self.buckets, metrics.buckets)}
+        }
+
+    def dump(self, path: str) -> None:
+        """
+        Записывает снимок метрик в файл: .prom и .txt — формат Prometheus, иначе JSON.
+
+        :param path: Путь к файлу.
+        """
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        logger.info(f"Метрики сохранены в файл: {path}")
+
+
+class Span:
+    """
+    Замер одного участка кода. Число строк можно задать после входа через атрибут rows.
+    Участок внутри уже замеряемого вызова той же стадии не записывается, чтобы время не учитывалось дважды.
+    """
+
+    __slots__ = ('stage', 'rows', 'registry', 'function', '_started', '_token')
+
+    def __init__(self, stage: str, rows: Optional[int], registry: MetricsRegistry, function: str = '') -> None:
+        self.stage = stage
+        self.rows = rows
+        self.registry = registry
+        self.function = function
+        self._started = 0.0
+        self._token: Optional[Token[FrozenSet[str]]] = None
+
+    def __enter__(self) -> 'Span':
+        self._token = _enter_stage(self.stage)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if self._token is None:
+            return
+        _ACTIVE_STAGES.reset(self._token)
+        self._token = None
+        self.registry.record(self.stage, time.perf_counter() - self._started, self.rows, exc_type is not None,
+                             self.function)
+
+
+class _NullSpan:
+    # Замена Span при выключенном сборе метрик: ничего не замеряет и не записывает
+    __slots__ = ()
+    rows: Optional[int] = None
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        return None
+
+
+REGISTRY = MetricsRegistry()
+_NULL_SPAN = _NullSpan()
+# Стадии, замеряемые в текущем потоке или задаче: вложенные вызовы тех же стадий не записываются
+_ACTIVE_STAGES: ContextVar[FrozenSet[str]] = ContextVar('active_stages', default=frozenset())
+_enabled = os.environ.get(METRICS_ENV, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+# Включение сбора метрик
+def enable() -> None:
+    """Включает сбор метрик."""
+    global _enabled
+    _enabled = True
+
+
+# Выключение сбора метрик
+def disable() -> None:
+    """Выключает сбор метрик (накопленные значения сохраняются)."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Возвращает True, если сбор метрик включен."""
+    return _enabled
+
+
+# Замер участка кода
+def span(stage: str, rows: Optional[int] = None, registry: Optional[MetricsRegistry] = None,
+         function: str = '') -> Union[Span, _NullSpan]:
+    """
+    Возвращает контекстный менеджер, замеряющий участок кода как вызов стадии.
+    При выключенном сборе метрик возвращается общий пустой объект без замеров.
+
+    :param stage: Имя стадии.
+    :param rows: Число обрабатываемых строк (можно задать позже через span.rows).
+    :param registry: Реестр (по умолчанию общий).
+    :param function: Имя функции или участка кода для метки function.
+    :return: Контекстный менеджер.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(stage, rows, registry if registry is not None else REGISTRY, function)
+
+
+# Число строк результата
+def result_rows(result: Any) -> Optional[int]:
+    """
+    Возвращает размер результата стадии: длину DataFrame, Series, списка или словаря.
+
+    :param result: Результат функции.
+    :return: Число строк или None для результатов без длины.
+    """
+    if isinstance(result, (str, bytes)) or not hasattr(result, '__len__'):
+        return None
+    return len(result)
+
+
+# Декоратор замера функции
+def timed(stage: str, rows: Optional[Callable[[Any], Optional[int]]] = result_rows) -> Callable[[F], F]:
+    """
+    Декоратор, замеряющий каждый вызов функции как вызов стадии с меткой function — полным именем функции.
+    Вызов внутри уже замеряемого вызова той же стадии не записывается, чтобы время не учитывалось дважды.
+    При выключенном сборе метрик добавляет к вызову только проверку флага.
+
+    :param stage: Имя стадии.
+    :param rows: Функция, вычисляющая число строк по результату (None — не учитывать строки).
+    :return: Декоратор.
+    """
+    def decorator(func: F) -> F:
+        function = func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return func(*args, **kwargs)
+            token = _enter_stage(stage)
+            if token is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                REGISTRY.record(stage, time.perf_counter() - started, error=True, function=function)
+                raise
+            finally:
+                _ACTIVE_STAGES.reset(token)
+            REGISTRY.record(stage, time.perf_counter() - started, rows(result) if rows is not None else None,
+                            function=function)
+            return result
+        return cast(F, wrapper)
+    return decorator
+
+
+def _enter_stage(stage: str) -> Optional[Token[FrozenSet[str]]]:
+    # Отмечает стадию как замеряемую; None — стадия уже замеряется внешним вызовом
+    active = _ACTIVE_STAGES.get()
+    if stage in active:
+        return None
+    return _ACTIVE_STAGES.set(active | {stage})
+
+
+def _bound_label(bound: float) -> str:
+    return '+Inf' if math.isinf(bound) else repr(bound)
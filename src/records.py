@@ -0,0 +1,198 @@
+import datetime
+import json
+import logging
+import math
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Union, cast, overload
+
+import numpy as np
+import pandas as pd
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Массив значений одного столбца: numpy-массив или массив pandas (Categorical, DatetimeArray и т.п.)
+ColumnValues = Union[np.ndarray, pd.api.extensions.ExtensionArray]
+
+# Число строк, значения которых переводятся в объекты Python за один шаг при обходе
+ITER_BLOCK_SIZE = 4096
+
+
+class TransactionRecords(Sequence[Dict[str, Any]]):
+    """
+    Компактный список транзакций: значения хранятся по столбцам, а не в словаре на каждую строку.
+
+    Ведет себя как последовательность словарей (как результат to_dict('records')), но словарь
+    строки создается только при обращении к ней. Срез возвращает новый TransactionRecords над
+    теми же массивами столбцов, без копирования данных. Категориальные столбцы хранятся кодами.
+    """
+
+    __slots__ = ('_columns', '_length')
+
+    def __init__(self, columns: Mapping[str, ColumnValues]) -> None:
+        self._columns: Dict[str, ColumnValues] = {str(name): values for name, values in columns.items()}
+        lengths = {len(values) for values in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Столбцы должны быть одной длины.")
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'TransactionRecords':
+        """
+        Создает последовательность над столбцами DataFrame (массивы столбцов не копируются).
+
+        :param frame: DataFrame с транзакциями.
+        :return: TransactionRecords.
+        """
+        return cls({str(name): _column_values(frame.iloc[:, number])
+                    for number, name in enumerate(frame.columns)})
+
+    @classmethod
+    def from_records(cls, records: Sequence[Mapping[str, Any]],
+                     columns: Optional[Sequence[str]] = None) -> 'TransactionRecords':
+        """
+        Создает последовательность из списка словарей (значения переносятся в массивы столбцов).
+
+        :param records: Транзакции в виде словарей.
+        :param columns: Столбцы (по умолчанию — ключи всех словарей).
+        :return: TransactionRecords.
+        """
+        if isinstance(records, TransactionRecords):
+            return records if columns is None else records.select(columns)
+        return cls.from_frame(pd.DataFrame.from_records(list(records), columns=columns))
+
+    @property
+    def columns(self) -> List[str]:
+        """Имена столбцов."""
+        return list(self._columns)
+
+    def column(self, name: str) -> ColumnValues:
+        """
+        Возвращает массив значений столбца без копирования.
+
+        :param name: Имя столбца.
+        :return: Массив значений.
+        """
+        return self._columns[name]
+
+    def select(self, columns: Sequence[str]) -> 'TransactionRecords':
+        """
+        Возвращает последовательность только с указанными столбцами (без копирования).
+
+        :param columns: Имена столбцов.
+        :return: TransactionRecords.
+        """
+        return TransactionRecords({name: self._columns[name] for name in columns})
+
+    def to_frame(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Собирает DataFrame из столбцов (без промежуточных словарей строк).
+
+        :param columns: Имена столбцов (по умолчанию все).
+        :return: DataFrame.
+        """
+        names = self.columns if columns is None else list(columns)
+        return pd.DataFrame({name: self._columns[name] for name in names}, columns=names)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Возвращает все строки в виде списка словарей."""
+        return list(self)
+
+    def to_json_records(self) -> List[Dict[str, Any]]:
+        """
+        Возвращает строки в виде словарей со значениями типов JSON:
+        даты — строки ISO, пропуски (NaN, NaT) и бесконечности — None.
+
+        :return: Список словарей, который можно передать в json.dumps.
+        """
+        return [{name: _json_value(value) for name, value in row.items()} for row in self]
+
+    def to_json(self, **kwargs: Any) -> str:
+        """
+        Сериализует строки в JSON-массив объектов (см. to_json_records).
+
+        :param kwargs: Дополнительные параметры json.dumps (по умолчанию ensure_ascii=False).
+        :return: Строка JSON.
+        """
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(self.to_json_records(), **kwargs)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'TransactionRecords':
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], 'TransactionRecords']:
+        if isinstance(index, slice):
+            return TransactionRecords({name: values[index] for name, values in self._columns.items()})
+        position = int(index)
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("Индекс транзакции вне диапазона.")
+        return {name: _native(values[position]) for name, values in self._columns.items()}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        # Значения переводятся в объекты Python блоками по столбцам: это быстрее обращения к каждой ячейке,
+        # а в памяти одновременно находится не больше ITER_BLOCK_SIZE словарей
+        names = self.columns
+        for start in range(0, self._length, ITER_BLOCK_SIZE):
+            block = [_python_values(values[start:start + ITER_BLOCK_SIZE]) for values in self._columns.values()]
+            for row in zip(*block):
+                yield dict(zip(names, row))
+
+    def __eq__(self, other: object) -> bool:
+        # Построчное сравнение, в котором пропуски (NaN, NaT, None) равны друг другу, как в DataFrame.equals
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            isinstance(other_row, Mapping) and row.keys() == other_row.keys()
+            and all(_values_equal(value, other_row[name]) for name, value in row.items())
+            for row, other_row in zip(self, other)
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"TransactionRecords({self._length} строк, столбцы: {', '.join(self._columns)})"
+
+
+def _column_values(column: pd.Series) -> ColumnValues:
+    # Массив столбца без копирования: numpy для обычных типов, массив pandas для категорий и дат
+    if isinstance(column.dtype, np.dtype) and column.dtype.kind not in 'mM':
+        return column.to_numpy(copy=False)
+    return column.array
+
+
+def _python_values(values: ColumnValues) -> List[Any]:
+    # Значения части столбца в виде объектов Python, как в to_dict('records')
+    if isinstance(values, np.ndarray):
+        return cast(List[Any], values.tolist())
+    return list(values)
+
+
+def _native(value: Any) -> Any:
+    # Значения numpy приводятся к типам Python, как в to_dict('records')
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _values_equal(left: Any, right: Any) -> bool:
+    if pd.api.types.is_scalar(left) and pd.api.types.is_scalar(right) and pd.isna(left) and pd.isna(right):
+        return True
+    return bool(left == right)
+
+
+def _json_value(value: Any) -> Any:
+    # Значение строки в виде типа JSON
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or value is pd.NaT or (isinstance(value, float) and not math.isfinite(value)):
+        return None
+    if isinstance(value, (datetime.date, pd.Timedelta)):
+        return value.isoformat()
+    return value
@@ -0,0 +1,160 @@
+import datetime
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+from src.metrics import span
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Папка отчетов по умолчанию: data/reports в корне проекта (не зависит от рабочей папки)
+DEFAULT_REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'reports')
+DEFAULT_FORMAT = 'csv'
+
+
+class ReportFormat(NamedTuple):
+    """Формат отчета: расширение файла и функция записи DataFrame по пути."""
+    extension: str
+    write: Callable[[pd.DataFrame, str], None]
+
+
+# Доступные форматы (дополняются через register_format)
+REPORT_FORMATS: Dict[str, ReportFormat] = {
+    'csv': ReportFormat('.csv', lambda df, path: df.to_csv(path, index=False)),
+    'csv.gz': ReportFormat('.csv.gz', lambda df, path: df.to_csv(path, index=False, compression='gzip')),
+    'parquet': ReportFormat('.parquet', lambda df, path: df.to_parquet(path, index=False)),
+}
+
+
+# Регистрация формата отчетов
+def register_format(name: str, extension: str, write: Callable[[pd.DataFrame, str], None]) -> None:
+    """
+    Добавляет формат отчетов.
+
+    :param name: Имя формата.
+    :param extension: Расширение файла (с точкой).
+    :param write: Функция записи DataFrame по пути.
+    """
+    REPORT_FORMATS[name] = ReportFormat(extension, write)
+
+
+class ReportSink:
+    """
+    Приемник отчетов: сохраняет DataFrame в папку root в выбранном формате.
+
+    Запись выполняется в фоновом потоке (по очереди, в порядке поступления), поэтому вызывающий код
+    не ждет диска. Файл пишется во временный файл в той же папке и атомарно переименовывается,
+    так что читатели не видят частично записанных отчетов. Ошибки записи логируются.
+    """
+
+    def __init__(self, root: str = DEFAULT_REPORTS_DIR, fmt: str = DEFAULT_FORMAT,
+                 asynchronous: bool = True) -> None:
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Неизвестный формат отчетов: {fmt}")
+        self.root = root
+        self.fmt = fmt
+        self.asynchronous = asynchronous
+        self._pending: List['Future[Optional[str]]'] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-sink')
+
+    def unique_name(self, stem: str, fmt: Optional[str] = None) -> str:
+        """
+        Возвращает уникальное имя файла отчета: основа, время и случайный суффикс.
+
+        :param stem: Основа имени (например, имя функции отчета).
+        :param fmt: Формат (по умолчанию формат приемника).
+        :return: Имя файла с расширением формата.
+        """
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        return f"{stem}_{timestamp}_{uuid.uuid4().hex[:8]}{REPORT_FORMATS[fmt or self.fmt].extension}"
+
+    def submit(self, report: pd.DataFrame, file_name: str, fmt: Optional[str] = None) -> 'Future[Optional[str]]':
+        """
+        Ставит отчет в очередь на запись. При фоновой записи в очередь ставится копия DataFrame,
+        поэтому вызывающий код может сразу изменять переданный отчет.
+
+        :param report: DataFrame с отчетом.
+        :param file_name: Имя файла относительно root.
+        :param fmt: Формат (по умолчанию формат приемника).
+        :return: Future с путем к файлу (None, если запись не удалась).
+        """
+        report_format = REPORT_FORMATS[fmt or self.fmt]
+        output_path = os.path.join(self.root, file_name)
+        if not self.asynchronous:
+            future: 'Future[Optional[str]]' = Future()
+            future.set_result(self._write(report, output_path, report_format))
+            return future
+
+        # Снимок отчета: фоновый поток не должен видеть изменения, сделанные после submit
+        future = self._executor.submit(self._write, report.copy(), output_path, report_format)
+        with self._lock:
+            self._pending = [pending for pending in self._pending if not pending.done()]
+            self._pending.append(future)
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Ожидает записи всех поставленных в очередь отчетов."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending, timeout=timeout)
+
+    def close(self) -> None:
+        """Дописывает очередь и останавливает фоновый поток."""
+        self._executor.shutdown(wait=True)
+
+    def _write(self, report: pd.DataFrame, output_path: str, report_format: ReportFormat) -> Optional[str]:
+        directory = os.path.dirname(output_path)
+        tmp_path = os.path.join(directory, f".{os.path.basename(output_path)}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with span('write', rows=len(report), function='ReportSink.submit'):
+                os.makedirs(directory, exist_ok=True)
+                report_format.write(report, tmp_path)
+                os.replace(tmp_path, output_path)
+        except Exception as e:
+            logger.error(f"Не удалось сохранить отчет {output_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        logger.info(f"Отчет сохранен в файл: {output_path}")
+        return output_path
+
+
+_default_sink: Optional[ReportSink] = None
+_default_sink_lock = threading.Lock()
+
+
+# Приемник отчетов по умолчанию (создается при первом обращении)
+def get_default_sink() -> ReportSink:
+    """
+    Возвращает общий для приложения приемник отчетов.
+    Папку и формат можно задать переменными окружения REPORTS_DIR и REPORTS_FORMAT.
+    """
+    global _default_sink
+    with _default_sink_lock:
+        if _default_sink is None:
+            _default_sink = ReportSink(
+                root=os.environ.get('REPORTS_DIR', DEFAULT_REPORTS_DIR),
+                fmt=os.environ.get('REPORTS_FORMAT', DEFAULT_FORMAT)
+            )
+        return _default_sink
+
+
+# Замена приемника отчетов по умолчанию
+def set_default_sink(sink: Optional[ReportSink]) -> Optional[ReportSink]:
+    """
+    Устанавливает приемник отчетов по умолчанию (None — создать заново при следующем обращении).
+
+    :param sink: Новый приемник.
+    :return: Предыдущий приемник.
+    """
+    global _default_sink
+    with _default_sink_lock:
+        previous, _default_sink = _default_sink, sink
+        return previous
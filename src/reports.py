@@ -1,37 +1,47 @@
-import datetime
+import functools
 import logging
-import os
-from typing import Callable, Optional
+from typing import Any, Callable, Optional, Union
 
+import numpy as np
 import pandas as pd
 
+from src.cube import COUNT_COLUMN, WEEKDAY_COLUMN, AggregateCube, cube_source_range
+from src.metrics import timed
+from src.report_sink import ReportSink, get_default_sink
+from src.rolling import WEEKDAY_NAMES
+from src.schema import AMOUNT_COLUMN, as_datetime
+from src.store import TransactionStore, select_range
 from src.utils import ensure_datetime_column, get_last_three_months_range
 
 # Логирование
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ReportFunction = Callable[..., pd.DataFrame]
+
 
 # Декоратор для сохранения отчетов в файл
-def save_report(file_name: Optional[str] = None) -> Callable[[Callable[..., pd.DataFrame]], Callable[..., pd.DataFrame]]:
+def save_report(file_name: Optional[str] = None, fmt: Optional[str] = None,
+                sink: Optional[ReportSink] = None) -> Callable[[ReportFunction], ReportFunction]:
     """
     Декоратор для сохранения отчета в файл.
-    Если имя файла не указано, используется имя по умолчанию.
+    Если имя файла не указано, при каждом вызове создается новое уникальное имя.
+    Запись выполняется приемником отчетов (по умолчанию src.report_sink.get_default_sink()) в фоне.
+    Обернутая функция принимает дополнительный аргумент save: при save=False отчет только возвращается.
+
+    :param file_name: Имя файла относительно папки отчетов (необязательно).
+    :param fmt: Формат отчета: 'csv', 'csv.gz', 'parquet' (по умолчанию формат приемника).
+    :param sink: Приемник отчетов (необязательно).
     """
 
-    def decorator(func: Callable[..., pd.DataFrame]) -> Callable[..., pd.DataFrame]:
-        def wrapper(*args: tuple, **kwargs: dict) -> pd.DataFrame:
+    def decorator(func: ReportFunction) -> ReportFunction:
+        @functools.wraps(func)
+        def wrapper(*args: Any, save: bool = True, **kwargs: Any) -> pd.DataFrame:
             result = func(*args, **kwargs)
-            nonlocal file_name
-            if not file_name:
-                file_name = f"{func.__name__}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-
-            output_path = os.path.join("../data/reports", file_name)
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
+            if not save:
+                return result
             if isinstance(result, pd.DataFrame):
-                result.to_csv(output_path, index=False)
-                logger.info(f"Отчет сохранен в файл: {output_path}")
+                report_sink = sink if sink is not None else get_default_sink()
+                report_sink.submit(result, file_name or report_sink.unique_name(func.__name__, fmt), fmt)
             else:
                 logger.error("Функция должна возвращать DataFrame для сохранения отчета.")
             return result
@@ -43,8 +53,9 @@ def save_report(file_name: Optional[str] = None) -> Callable[[Callable[..., pd.D
 
 # Траты по категории
 @save_report()
+@timed('filter')
 def spending_by_category(
-        transactions: pd.DataFrame,
+        transactions: Union[pd.DataFrame, TransactionStore],
         category: str,
         date: Optional[str] = None
 ) -> pd.DataFrame:
@@ -52,6 +63,10 @@ def spending_by_category(
     Возвращает отчет о тратах по категории за последние 3 месяца.
     """
     start_date, current_date = get_last_three_months_range(date)
+    if isinstance(transactions, TransactionStore):
+        period_transactions = transactions.range(start_date, current_date)
+        return period_transactions[period_transactions['Категория'] == category]
+
     transactions = ensure_datetime_column(transactions, 'Дата операции')
     filtered_transactions = transactions[
         (transactions['Категория'] == category) &
@@ -63,8 +78,9 @@ def spending_by_category(
 
 # Траты по дням недели
 @save_report()
+@timed('aggregate')
 def spending_by_weekday(
-    transactions: pd.DataFrame,
+    transactions: Union[pd.DataFrame, TransactionStore, AggregateCube],
     date: Optional[str] = None
 ) -> pd.DataFrame:
     """
@@ -77,16 +93,10 @@ def spending_by_weekday(
 
     start_date = current_date - pd.DateOffset(months=3)
 
-    transactions['Дата операции'] = pd.to_datetime(transactions['Дата операции'])
-    filtered_data = transactions[
-        (transactions['Дата операции'] >= start_date) &
-        (transactions['Дата операции'] <= current_date)
-    ]
-
-    filtered_data['День недели'] = filtered_data['Дата операции'].dt.day_name()
+    means = _mean_by_day_label(transactions, start_date, current_date, 'День недели',
+                               lambda weekdays: np.array(WEEKDAY_NAMES, dtype=object)[weekdays])
     report = (
-        filtered_data.groupby('День недели')['Сумма операции']
-        .mean()
+        means
         .reset_index()
         .sort_values(by='Сумма операции', ascending=False)
     )
@@ -95,8 +105,9 @@ def spending_by_weekday(
 
 # Траты в рабочий/выходной день
 @save_report()
+@timed('aggregate')
 def spending_by_workday(
-    transactions: pd.DataFrame,
+    transactions: Union[pd.DataFrame, TransactionStore, AggregateCube],
     date: Optional[str] = None
 ) -> pd.DataFrame:
     """
@@ -109,19 +120,40 @@ def spending_by_workday(
 
     start_date = current_date - pd.DateOffset(months=3)
 
-    transactions['Дата операции'] = pd.to_datetime(transactions['Дата операции'])
-    filtered_data = transactions[
-        (transactions['Дата операции'] >= start_date) &
-        (transactions['Дата операции'] <= current_date)
-    ]
+    means = _mean_by_day_label(transactions, start_date, current_date, 'Тип дня',
+                               lambda weekdays: np.where(weekdays < 5, 'Рабочий день', 'Выходной день'))
+    report = means.reset_index()
+    return report
 
-    filtered_data['Тип дня'] = filtered_data['Дата операции'].dt.dayofweek.apply(
-        lambda x: 'Рабочий день' if x < 5 else 'Выходной день'
-    )
 
-    report = (
-        filtered_data.groupby('Тип дня')['Сумма операции']
-        .mean()
-        .reset_index()
-    )
-    return report
+# Средняя сумма операции по меткам дня недели за период
+def _mean_by_day_label(transactions: Union[pd.DataFrame, TransactionStore, AggregateCube],
+                       start: pd.Timestamp, end: pd.Timestamp, label_column: str,
+                       labels: Callable[[np.ndarray], np.ndarray]) -> pd.Series:
+    """
+    Группирует траты за период по метке, вычисляемой из номера дня недели, и возвращает средние.
+    Если передан куб и период состоит из целых месяцев, средние считаются по кубу.
+
+    :param transactions: DataFrame, TransactionStore или AggregateCube.
+    :param start: Начало периода.
+    :param end: Конец периода.
+    :param label_column: Название столбца с меткой.
+    :param labels: Функция, переводящая номера дней недели (0 — понедельник) в метки.
+    :return: Series со средней суммой операции по меткам.
+    """
+    if isinstance(transactions, AggregateCube) and transactions.covers(start, end):
+        totals = transactions.totals([WEEKDAY_COLUMN], start, end, [AMOUNT_COLUMN, COUNT_COLUMN])
+        grouped = totals.groupby(labels(totals.index.to_numpy(dtype='int64')))[[AMOUNT_COLUMN, COUNT_COLUMN]].sum()
+        cube_means: pd.Series = (grouped[AMOUNT_COLUMN] / grouped[COUNT_COLUMN]).rename(AMOUNT_COLUMN)
+        return cube_means.rename_axis(label_column)
+
+    if isinstance(transactions, AggregateCube):
+        period_transactions = cube_source_range(transactions, start, end)
+    else:
+        period_transactions = select_range(transactions, start, end)
+    filtered_data = pd.DataFrame({
+        label_column: labels(as_datetime(period_transactions['Дата операции']).dt.dayofweek.to_numpy()),
+        'Сумма операции': period_transactions['Сумма операции']
+    })
+    means: pd.Series = filtered_data.groupby(label_column)['Сумма операции'].mean()
+    return means
@@ -0,0 +1,229 @@
+import logging
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.schema import AMOUNT_COLUMN, CATEGORY_COLUMN, DATE_COLUMN, as_datetime
+from src.store import DateLike, TransactionStore
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Длина окна отчетов в месяцах (как в utils.get_last_three_months_range)
+WINDOW_MONTHS = 3
+
+# Названия дней недели в порядке dayofweek (как у Series.dt.day_name)
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+class RollingReportEngine:
+    """
+    Инкрементальный расчет отчетов за скользящее окно (по умолчанию 3 месяца).
+
+    По транзакциям один раз строятся дневные агрегаты: сумма и число операций за каждый день
+    по категориям и в целом за день (из даты следуют день недели и тип дня).
+    Сдвиг окна прибавляет вошедшие в него дни и вычитает выбывшие, поэтому ежедневное
+    обновление отчетов стоит O(число изменившихся дней), а не O(число транзакций в окне).
+    Окно состоит из целых календарных дней: [дата отчета - months, дата отчета] включительно.
+    """
+
+    def __init__(self, transactions: Union[pd.DataFrame, TransactionStore],
+                 date_column: str = DATE_COLUMN, months: int = WINDOW_MONTHS) -> None:
+        self.date_column = date_column
+        self.months = months
+        self._first_day: Optional[np.datetime64] = None
+        self._categories: List[str] = []
+        self._day_sums: np.ndarray = np.zeros((0, 0))
+        self._day_counts: np.ndarray = np.zeros((0, 0), dtype='int64')
+        self._day_totals: np.ndarray = np.zeros(0)
+        self._day_total_counts: np.ndarray = np.zeros(0, dtype='int64')
+        self._window: Optional[Tuple[int, int]] = None
+        self._category_sums: np.ndarray = np.zeros(0)
+        self._category_counts: np.ndarray = np.zeros(0, dtype='int64')
+        self._weekday_sums: np.ndarray = np.zeros(7)
+        self._weekday_counts: np.ndarray = np.zeros(7, dtype='int64')
+        self.add(transactions.frame if isinstance(transactions, TransactionStore) else transactions)
+
+    @property
+    def window(self) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Первый и последний день текущего окна или None, если окно еще не задано."""
+        if self._window is None or self._first_day is None:
+            return None
+        start, end = self._window
+        return pd.Timestamp(self._first_day + start), pd.Timestamp(self._first_day + end)
+
+    def add(self, transactions: pd.DataFrame) -> None:
+        """
+        Добавляет транзакции (например, за новый день) в дневные агрегаты.
+        Если их даты попадают в текущее окно, отчеты окна обновляются сразу.
+
+        :param transactions: DataFrame с новыми транзакциями.
+        """
+        days = as_datetime(transactions[self.date_column]).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        amounts = pd.to_numeric(transactions[AMOUNT_COLUMN], errors='coerce').to_numpy(dtype='float64')
+        valid = ~np.isnat(days) & ~np.isnan(amounts)
+        if not valid.any():
+            return
+        days, amounts = days[valid], amounts[valid]
+        categories = transactions[CATEGORY_COLUMN].to_numpy()[valid]
+
+        self._extend_days(days.min(), days.max())
+        assert self._first_day is not None
+        day_numbers = (days - self._first_day).astype('int64')
+
+        category_codes, new_categories = pd.factorize(categories)
+        columns = np.array([self._category_column(str(category)) for category in new_categories], dtype='int64')
+        has_category = category_codes >= 0
+        category_columns = columns[category_codes[has_category]] if len(columns) else np.zeros(0, dtype='int64')
+
+        day_sums = np.zeros_like(self._day_sums)
+        day_counts = np.zeros_like(self._day_counts)
+        np.add.at(day_sums, (day_numbers[has_category], category_columns), amounts[has_category])
+        np.add.at(day_counts, (day_numbers[has_category], category_columns), 1)
+        size = len(self._day_totals)
+        day_totals = np.bincount(day_numbers, weights=amounts, minlength=size)
+        day_total_counts = np.bincount(day_numbers, minlength=size)
+
+        self._day_sums += day_sums
+        self._day_counts += day_counts
+        self._day_totals += day_totals
+        self._day_total_counts += day_total_counts
+
+        # Дни, уже входящие в окно, сразу учитываются в отчетах
+        if self._window is not None:
+            start, end = self._window
+            self._apply_days(start, end, 1, day_sums, day_counts, day_totals, day_total_counts)
+
+    def advance(self, date: Optional[DateLike] = None) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """
+        Сдвигает окно так, чтобы оно заканчивалось днем отчета.
+        Пересчитываются только дни, вошедшие в окно или выбывшие из него.
+
+        :param date: Дата отчета (по умолчанию сегодня).
+        :return: Первый и последний день окна.
+        """
+        end_date = pd.Timestamp(date).normalize() if date is not None else pd.Timestamp.now().normalize()
+        start_date = end_date - pd.DateOffset(months=self.months)
+        if self._first_day is None:
+            return start_date, end_date
+
+        start = int((start_date.to_datetime64().astype('datetime64[D]') - self._first_day).astype('int64'))
+        end = int((end_date.to_datetime64().astype('datetime64[D]') - self._first_day).astype('int64'))
+        if self._window is None:
+            self._apply_days(start, end, 1)
+        else:
+            old_start, old_end = self._window
+            # Выбывшие дни: часть старого окна вне нового; вошедшие — часть нового окна вне старого
+            self._apply_days(old_start, min(old_end, start - 1), -1)
+            self._apply_days(max(old_start, end + 1), old_end, -1)
+            self._apply_days(start, min(end, old_start - 1), 1)
+            self._apply_days(max(start, old_end + 1), end, 1)
+        self._window = (start, end)
+        return start_date, end_date
+
+    def category_report(self) -> pd.DataFrame:
+        """
+        Возвращает траты по категориям за окно.
+
+        :return: DataFrame со столбцами 'Категория', 'Сумма операции' и 'Количество операций'.
+        """
+        present = self._category_counts > 0
+        report = pd.DataFrame({
+            CATEGORY_COLUMN: np.array(self._categories, dtype=object)[present],
+            AMOUNT_COLUMN: self._category_sums[present],
+            'Количество операций': self._category_counts[present]
+        })
+        return report.sort_values(by=CATEGORY_COLUMN).reset_index(drop=True)
+
+    def category_total(self, category: str) -> Tuple[float, int]:
+        """
+        Возвращает сумму и число операций категории за окно.
+
+        :param category: Категория.
+        :return: Кортеж (сумма, число операций).
+        """
+        if category not in self._categories:
+            return 0.0, 0
+        column = self._categories.index(category)
+        return float(self._category_sums[column]), int(self._category_counts[column])
+
+    def weekday_report(self) -> pd.DataFrame:
+        """
+        Возвращает средние траты по дням недели за окно (как reports.spending_by_weekday).
+
+        :return: DataFrame со столбцами 'День недели' и 'Сумма операции'.
+        """
+        present = self._weekday_counts > 0
+        report = pd.DataFrame({
+            'День недели': np.array(WEEKDAY_NAMES, dtype=object)[present],
+            AMOUNT_COLUMN: self._weekday_sums[present] / self._weekday_counts[present]
+        })
+        return report.sort_values(by=AMOUNT_COLUMN, ascending=False)
+
+    def workday_report(self) -> pd.DataFrame:
+        """
+        Возвращает средние траты в рабочие и выходные дни за окно (как reports.spending_by_workday).
+
+        :return: DataFrame со столбцами 'Тип дня' и 'Сумма операции'.
+        """
+        rows = []
+        # Порядок совпадает с groupby по названию типа дня
+        for name, weekdays in (('Выходной день', slice(5, 7)), ('Рабочий день', slice(0, 5))):
+            count = self._weekday_counts[weekdays].sum()
+            if count:
+                rows.append({'Тип дня': name, AMOUNT_COLUMN: self._weekday_sums[weekdays].sum() / count})
+        return pd.DataFrame(rows, columns=['Тип дня', AMOUNT_COLUMN])
+
+    def _category_column(self, category: str) -> int:
+        if category not in self._categories:
+            self._categories.append(category)
+            self._day_sums = np.pad(self._day_sums, ((0, 0), (0, 1)))
+            self._day_counts = np.pad(self._day_counts, ((0, 0), (0, 1)))
+            self._category_sums = np.append(self._category_sums, 0.0)
+            self._category_counts = np.append(self._category_counts, 0)
+        return self._categories.index(category)
+
+    def _extend_days(self, first: np.datetime64, last: np.datetime64) -> None:
+        # Расширяет дневные массивы так, чтобы они покрывали дни [first, last]
+        if self._first_day is None:
+            self._first_day = first
+        last_known = self._first_day + (len(self._day_totals) - 1)
+        before = max(int((self._first_day - first).astype('int64')), 0)
+        after = max(int((last - last_known).astype('int64')), 0)
+        if not before and not after:
+            return
+        self._day_sums = np.pad(self._day_sums, ((before, after), (0, 0)))
+        self._day_counts = np.pad(self._day_counts, ((before, after), (0, 0)))
+        self._day_totals = np.pad(self._day_totals, (before, after))
+        self._day_total_counts = np.pad(self._day_total_counts, (before, after))
+        if before:
+            self._first_day = first
+            if self._window is not None:
+                self._window = (self._window[0] + before, self._window[1] + before)
+
+    def _apply_days(self, start: int, end: int, sign: int,
+                    day_sums: Optional[np.ndarray] = None, day_counts: Optional[np.ndarray] = None,
+                    day_totals: Optional[np.ndarray] = None, day_total_counts: Optional[np.ndarray] = None
+                    ) -> None:
+        # Прибавляет (sign=1) или вычитает (sign=-1) дни [start, end] в агрегатах окна
+        assert self._first_day is not None
+        start, end = max(start, 0), min(end, len(self._day_totals) - 1)
+        if start > end:
+            return
+        sums = self._day_sums if day_sums is None else day_sums
+        counts = self._day_counts if day_counts is None else day_counts
+        totals = self._day_totals if day_totals is None else day_totals
+        total_counts = self._day_total_counts if day_total_counts is None else day_total_counts
+
+        self._category_sums += sign * sums[start:end + 1].sum(axis=0)
+        self._category_counts += sign * counts[start:end + 1].sum(axis=0)
+        weekdays = (np.arange(start, end + 1) + _weekday(self._first_day)) % 7
+        self._weekday_sums += sign * np.bincount(weekdays, weights=totals[start:end + 1], minlength=7)
+        self._weekday_counts += sign * np.bincount(weekdays, weights=total_counts[start:end + 1],
+                                                   minlength=7).astype('int64')
+
+
+def _weekday(day: np.datetime64) -> int:
+    # День недели (0 — понедельник); 1970-01-01 был четвергом
+    return (int(day.astype('datetime64[D]').astype('int64')) + 3) % 7
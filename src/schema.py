@@ -0,0 +1,110 @@
+import logging
+from typing import Tuple
+
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+
+from src.metrics import timed
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Названия столбцов выгрузки операций
+DATE_COLUMN = 'Дата операции'
+PAYMENT_DATE_COLUMN = 'Дата платежа'
+CARD_COLUMN = 'Номер карты'
+CATEGORY_COLUMN = 'Категория'
+DESCRIPTION_COLUMN = 'Описание'
+AMOUNT_COLUMN = 'Сумма операции'
+PAYMENT_AMOUNT_COLUMN = 'Сумма платежа'
+CASHBACK_COLUMN = 'Кэшбэк'
+
+# Форматы дат в выгрузке
+DATE_FORMAT = '%d.%m.%Y %H:%M:%S'
+PAYMENT_DATE_FORMAT = '%d.%m.%Y'
+
+# Столбцы с повторяющимися строками, которые хранятся как категории
+CATEGORICAL_COLUMNS: Tuple[str, ...] = (
+    CATEGORY_COLUMN,
+    DESCRIPTION_COLUMN,
+    CARD_COLUMN,
+    'Статус',
+    'Валюта операции',
+    'Валюта платежа',
+)
+
+# Числовые столбцы (хранятся как float64, чтобы пропуски не меняли тип)
+NUMERIC_COLUMNS: Tuple[str, ...] = (
+    AMOUNT_COLUMN,
+    PAYMENT_AMOUNT_COLUMN,
+    CASHBACK_COLUMN,
+    'MCC',
+    'Бонусы (включая кэшбэк)',
+    'Округление на инвесткопилку',
+    'Сумма операции с округлением',
+)
+
+
+# Функция для преобразования столбца с датами
+def as_datetime(values: pd.Series, date_format: str = DATE_FORMAT) -> pd.Series:
+    """
+    Возвращает столбец с датами в формате datetime.
+    Уже преобразованный столбец возвращается без изменений.
+
+    Сначала используется фиксированный формат выгрузки, а значения,
+    которые под него не подошли, разбираются в общем порядке с днем перед месяцем
+    (как во всех выгрузках банка; даты ISO вида YYYY-MM-DD разбираются как есть).
+
+    :param values: Столбец с датами.
+    :param date_format: Ожидаемый формат дат.
+    :return: Столбец типа datetime64.
+    """
+    if is_datetime64_any_dtype(values):
+        return values
+
+    parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+    unparsed = parsed.isna() & values.notna()
+    if unparsed.any():
+        parsed[unparsed] = pd.to_datetime(values[unparsed].astype(str), format='mixed', dayfirst=True,
+                                          errors='coerce')
+    return parsed
+
+
+# Функция для проверки, приведен ли DataFrame к схеме
+def is_normalized(df: pd.DataFrame) -> bool:
+    """
+    Проверяет, что DataFrame уже приведен к канонической схеме.
+
+    :param df: DataFrame с транзакциями.
+    :return: True, если столбец с датой операции уже имеет тип datetime.
+    """
+    return DATE_COLUMN in df.columns and is_datetime64_any_dtype(df[DATE_COLUMN])
+
+
+# Функция для приведения выгрузки к канонической схеме
+@timed('normalize')
+def normalize_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит выгрузку операций к канонической схеме за один проход:
+    даты разбираются по фиксированному формату, строковые столбцы становятся категориями,
+    суммы получают фиксированный числовой тип. Отсутствующие столбцы пропускаются.
+
+    :param df: DataFrame с транзакциями.
+    :return: Новый DataFrame в канонической схеме.
+    """
+    df = df.copy()
+    if DATE_COLUMN in df.columns:
+        df[DATE_COLUMN] = as_datetime(df[DATE_COLUMN], DATE_FORMAT)
+    if PAYMENT_DATE_COLUMN in df.columns:
+        df[PAYMENT_DATE_COLUMN] = as_datetime(df[PAYMENT_DATE_COLUMN], PAYMENT_DATE_FORMAT)
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+
+    logger.info(f"Транзакции приведены к схеме: {len(df)} строк.")
+    return df
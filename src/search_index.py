@@ -0,0 +1,149 @@
+import logging
+from typing import Any, Dict, List, NamedTuple, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Столбцы, по которым ведется поиск
+SEARCH_COLUMNS = ('Описание', 'Категория')
+
+# Максимальная длина n-граммы в индексе
+NGRAM_SIZE = 3
+
+
+class SearchPage(NamedTuple):
+    """Страница результатов поиска и общее число найденных транзакций."""
+    total: int
+    page: int
+    page_size: int
+    items: List[Dict[str, Any]]
+
+
+class SearchIndex:
+    """
+    Инвертированный индекс n-грамм по описаниям и категориям транзакций.
+
+    Индексируются уникальные строки (в нижнем регистре): для каждой n-граммы длиной
+    от 1 до NGRAM_SIZE хранится множество строк, где она встречается, а для каждой строки —
+    номера транзакций. Запрос отвечает пересечением списков n-грамм и проверкой кандидатов,
+    не просматривая все транзакции. Индекс дополняется новыми транзакциями через add().
+    """
+
+    def __init__(self, transactions: pd.DataFrame, columns: Sequence[str] = SEARCH_COLUMNS) -> None:
+        self.columns = tuple(columns)
+        self._texts: List[str] = []
+        self._text_ids: Dict[str, int] = {}
+        self._text_rows: List[List[np.ndarray]] = []
+        self._grams: Dict[str, Set[int]] = {}
+        self._chunks: List[pd.DataFrame] = []
+        self._offsets: List[int] = []
+        self._size = 0
+        self.add(transactions)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, transactions: pd.DataFrame) -> None:
+        """
+        Добавляет транзакции в индекс; n-граммы строятся только для новых строк.
+
+        :param transactions: DataFrame с новыми транзакциями.
+        """
+        base = self._size
+        for column in self.columns:
+            codes, uniques = pd.factorize(transactions[column])
+            text_ids = np.array([self._register_text(str(value).lower()) for value in uniques], dtype='int64')
+
+            # Группируем номера транзакций по строке без цикла по транзакциям
+            valid = np.flatnonzero(codes >= 0)
+            order = np.argsort(codes[valid], kind='stable')
+            positions = valid[order] + base
+            sorted_codes = codes[valid][order]
+            group_codes, starts = np.unique(sorted_codes, return_index=True)
+            for code, rows in zip(group_codes, np.split(positions, starts[1:])):
+                self._text_rows[text_ids[code]].append(rows)
+
+        self._chunks.append(transactions)
+        self._offsets.append(base)
+        self._size += len(transactions)
+        logger.info(f"В индекс добавлено {len(transactions)} транзакций, уникальных строк: {len(self._texts)}.")
+
+    def find(self, query: str, prefix: bool = False) -> np.ndarray:
+        """
+        Возвращает номера транзакций, у которых описание или категория содержит строку запроса
+        (без учета регистра). При prefix=True строка должна начинаться с запроса.
+
+        :param query: Строка запроса.
+        :param prefix: Искать только по началу строки.
+        :return: Отсортированный массив номеров транзакций.
+        """
+        needle = query.lower()
+        if needle:
+            grams = [needle] if len(needle) <= NGRAM_SIZE else _ngrams(needle, NGRAM_SIZE)
+            postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = set(range(len(self._texts)))
+
+        if prefix:
+            matches = [text_id for text_id in candidates if self._texts[text_id].startswith(needle)]
+        else:
+            matches = [text_id for text_id in candidates if needle in self._texts[text_id]]
+
+        row_arrays = [rows for text_id in matches for rows in self._text_rows[text_id]]
+        if not row_arrays:
+            return np.empty(0, dtype='int64')
+        positions: np.ndarray = np.unique(np.concatenate(row_arrays))
+        return positions
+
+    def rows(self, positions: np.ndarray) -> pd.DataFrame:
+        """
+        Возвращает транзакции по их номерам в индексе.
+
+        :param positions: Отсортированный массив номеров транзакций.
+        :return: DataFrame с транзакциями.
+        """
+        chunk_numbers = np.searchsorted(self._offsets, positions, side='right') - 1
+        parts: List[pd.DataFrame] = [
+            self._chunks[number].iloc[positions[chunk_numbers == number] - self._offsets[number]]
+            for number in np.unique(chunk_numbers)
+        ]
+        if not parts:
+            return self._chunks[0].iloc[0:0] if self._chunks else pd.DataFrame()
+        return parts[0] if len(parts) == 1 else pd.concat(parts)
+
+    def search(self, query: str, page: int = 1, page_size: int = 20, prefix: bool = False) -> SearchPage:
+        """
+        Ищет транзакции и возвращает одну страницу результатов и общее число найденных.
+        В словари преобразуются только транзакции текущей страницы.
+
+        :param query: Строка запроса.
+        :param page: Номер страницы (с 1).
+        :param page_size: Размер страницы.
+        :param prefix: Искать только по началу строки.
+        :return: SearchPage с результатами.
+        """
+        positions = self.find(query, prefix)
+        start = (max(page, 1) - 1) * page_size
+        page_rows = self.rows(positions[start:start + page_size])
+        items = [{str(key): value for key, value in record.items()} for record in page_rows.to_dict('records')]
+        return SearchPage(total=len(positions), page=page, page_size=page_size, items=items)
+
+    def _register_text(self, text: str) -> int:
+        text_id = self._text_ids.get(text)
+        if text_id is None:
+            text_id = len(self._texts)
+            self._text_ids[text] = text_id
+            self._texts.append(text)
+            self._text_rows.append([])
+            for size in range(1, NGRAM_SIZE + 1):
+                for gram in _ngrams(text, size):
+                    self._grams.setdefault(gram, set()).add(text_id)
+        return text_id
+
+
+def _ngrams(text: str, size: int) -> List[str]:
+    return [text[i:i + size] for i in range(len(text) - size + 1)]
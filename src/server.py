@@ -0,0 +1,329 @@
+import argparse
+import datetime
+import json
+import logging
+import math
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src import metrics
+from src.cashback import CashbackAnalysis
+from src.cube import AggregateCube
+from src.fx import BASE_CURRENCY, DEFAULT_RATES_PATH, convert_to_base, rate_table_for
+from src.market_data import MarketDataClient
+from src.records import TransactionRecords
+from src.reports import spending_by_category, spending_by_weekday, spending_by_workday
+from src.search_index import SearchIndex
+from src.services import analyze_cashback_categories, simple_search
+from src.store import TransactionStore
+from src.utils import load_transactions
+from src.views import generate_main_page_response
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Файл с операциями по умолчанию: data/operations.xlsx в корне проекта
+DEFAULT_OPERATIONS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                       'data', 'operations.xlsx')
+
+# Параметры по умолчанию
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+
+class DatasetSnapshot(NamedTuple):
+    """Загруженные данные и построенные по ним структуры; после создания не изменяются."""
+    frame: pd.DataFrame
+    store: TransactionStore
+    cube: AggregateCube
+    search_index: SearchIndex
+    cashback: CashbackAnalysis
+    loaded_at: str
+    version: Tuple[int, int]
+
+
+class WarmDataset:
+    """
+    Набор данных, который загружается один раз и держится в памяти.
+
+    Запросы читают текущий снимок (DatasetSnapshot). При изменении исходного файла
+    новый снимок строится в фоне и подменяет старый целиком, поэтому запрос всегда видит
+    согласованные данные и не ждет перезагрузки.
+
+    Суммы в валюте переводятся в base_currency по таблице курсов rates_path (см. src.fx.rate_table_for);
+    при base_currency=None данные используются как есть.
+    """
+
+    def __init__(self, file_path: str, loader: Callable[[str], pd.DataFrame] = load_transactions,
+                 reload_interval: float = DEFAULT_RELOAD_INTERVAL, base_currency: Optional[str] = BASE_CURRENCY,
+                 rates_path: str = DEFAULT_RATES_PATH, rates_client: Optional[MarketDataClient] = None) -> None:
+        self.file_path = file_path
+        self.loader = loader
+        self.reload_interval = reload_interval
+        self.base_currency = base_currency
+        self.rates_path = rates_path
+        self.rates_client = rates_client
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._snapshot = self._load()
+
+    @property
+    def snapshot(self) -> DatasetSnapshot:
+        """Текущий снимок данных."""
+        return self._snapshot
+
+    def reload_if_changed(self) -> bool:
+        """
+        Перезагружает данные, если исходный файл изменился (по времени изменения и размеру).
+
+        :return: True, если данные перезагружены.
+        """
+        with self._reload_lock:
+            if _file_version(self.file_path) == self._snapshot.version:
+                return False
+            try:
+                self._snapshot = self._load()
+            except Exception as e:
+                logger.error(f"Не удалось перезагрузить {self.file_path}, остаются прежние данные: {e}")
+                return False
+        logger.info(f"Данные перезагружены: {len(self._snapshot.frame)} транзакций.")
+        return True
+
+    def start_watcher(self) -> None:
+        """Запускает фоновую проверку изменений исходного файла."""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name='dataset-watcher', daemon=True)
+            self._watcher.start()
+
+    def stop(self) -> None:
+        """Останавливает фоновую проверку."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload_if_changed()
+            except OSError as e:
+                logger.warning(f"Не удалось проверить файл {self.file_path}: {e}")
+
+    def _load(self) -> DatasetSnapshot:
+        # Версия фиксируется до чтения, чтобы изменение файла во время разбора вызвало повторную загрузку
+        version = _file_version(self.file_path)
+        frame = self.loader(self.file_path)
+        if self.base_currency is not None:
+            rates = rate_table_for(frame, self.rates_path, self.rates_client, self.base_currency)
+            frame = convert_to_base(frame, rates)
+        store = TransactionStore(frame)
+        return DatasetSnapshot(
+            frame=frame,
+            store=store,
+            cube=AggregateCube.from_transactions(store),
+            search_index=SearchIndex(frame),
+            cashback=CashbackAnalysis(store),
+            loaded_at=datetime.datetime.now().isoformat(timespec='seconds'),
+            version=version
+        )
+
+
+class AnalyticsServer(ThreadingHTTPServer):
+    """HTTP-сервер аналитики: каждый запрос обрабатывается в отдельном потоке над общим снимком данных."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], dataset: WarmDataset,
+                 client: Optional[MarketDataClient] = None) -> None:
+        super().__init__(address, AnalyticsRequestHandler)
+        self.dataset = dataset
+        self.client = client
+
+
+class AnalyticsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик запросов (GET, параметры в строке запроса, ответ в JSON):
+
+    /health — состояние и размер данных;
+    /main?time=&stocks= — главная страница (generate_main_page_response);
+    /cashback?year=&month= или ?start=&end= — кешбэк по категориям;
+    /search?q= — простой поиск по описанию и категории;
+    /reports/category?category=&date=, /reports/weekday?date=, /reports/workday?date= — отчеты;
+    /metrics — метрики стадий в формате Prometheus.
+    """
+
+    server: AnalyticsServer
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        route = ROUTES.get(url.path.rstrip('/') or '/')
+        if route is None:
+            self._send_json(404, {'error': f"Неизвестный адрес: {url.path}"})
+            return
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            result = route(self.server, params)
+        except (KeyError, ValueError) as e:
+            self._send_json(400, {'error': f"Некорректный запрос: {e}"})
+            return
+        except Exception as e:
+            logger.exception(f"Ошибка обработки {self.path}")
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+        if isinstance(result, str):
+            self._send(200, result.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8')
+        else:
+            self._send_json(200, result)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Журнал запросов пишется на уровне DEBUG, чтобы не замедлять обработку
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, data: Any) -> None:
+        body = json.dumps(_plain(data), ensure_ascii=False).encode('utf-8')
+        self._send(status, body, 'application/json; charset=utf-8')
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _health(server: AnalyticsServer, params: Dict[str, str]) -> Dict[str, Any]:
+    snapshot = server.dataset.snapshot
+    return {'status': 'ok', 'transactions': len(snapshot.frame), 'loaded_at': snapshot.loaded_at}
+
+
+def _main_page(server: AnalyticsServer, params: Dict[str, str]) -> Dict[str, Any]:
+    current_time = params.get('time') or datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    stocks = [stock for stock in params.get('stocks', '').split(',') if stock]
+    return generate_main_page_response(server.dataset.snapshot.frame, current_time, {'user_stocks': stocks},
+                                       client=server.client, parallel=True)
+
+
+def _cashback(server: AnalyticsServer, params: Dict[str, str]) -> Dict[str, float]:
+    snapshot = server.dataset.snapshot
+    if 'start' in params or 'end' in params:
+        return snapshot.cashback.range(pd.Timestamp(params['start']), pd.Timestamp(params['end']))
+    return analyze_cashback_categories(snapshot.cube, int(params['year']), int(params['month']))
+
+
+def _search(server: AnalyticsServer, params: Dict[str, str]) -> Any:
+    return simple_search(server.dataset.snapshot.search_index, params['q'])
+
+
+def _category_report(server: AnalyticsServer, params: Dict[str, str]) -> pd.DataFrame:
+    return spending_by_category(server.dataset.snapshot.store, params['category'], params.get('date'), save=False)
+
+
+def _weekday_report(server: AnalyticsServer, params: Dict[str, str]) -> pd.DataFrame:
+    return spending_by_weekday(server.dataset.snapshot.cube, params.get('date'), save=False)
+
+
+def _workday_report(server: AnalyticsServer, params: Dict[str, str]) -> pd.DataFrame:
+    return spending_by_workday(server.dataset.snapshot.cube, params.get('date'), save=False)
+
+
+def _metrics(server: AnalyticsServer, params: Dict[str, str]) -> str:
+    return metrics.REGISTRY.to_prometheus()
+
+
+# Адреса сервиса и их обработчики (отчеты возвращаются без сохранения в файл)
+ROUTES: Dict[str, Callable[[AnalyticsServer, Dict[str, str]], Any]] = {
+    '/health': _health,
+    '/main': _main_page,
+    '/cashback': _cashback,
+    '/search': _search,
+    '/reports/category': _category_report,
+    '/reports/weekday': _weekday_report,
+    '/reports/workday': _workday_report,
+    '/metrics': _metrics,
+}
+
+
+# Запуск сервиса
+def serve(dataset: WarmDataset, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          client: Optional[MarketDataClient] = None) -> AnalyticsServer:
+    """
+    Создает сервер аналитики и запускает фоновую проверку изменений данных.
+    Обработка запросов начинается после вызова serve_forever().
+
+    :param dataset: Загруженный набор данных.
+    :param host: Адрес.
+    :param port: Порт (0 — выбрать свободный).
+    :param client: Клиент рыночных данных для главной страницы (по умолчанию общий).
+    :return: AnalyticsServer.
+    """
+    server = AnalyticsServer((host, port), dataset, client)
+    dataset.start_watcher()
+    logger.info(f"Сервис аналитики: http://{server.server_address[0]!s}:{server.server_address[1]}")
+    return server
+
+
+def _file_version(file_path: str) -> Tuple[int, int]:
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _plain(value: Any) -> Any:
+    # Приведение ответа к типам JSON: DataFrame — список записей, даты — ISO, NaN — null
+    if isinstance(value, TransactionRecords):
+        return value.to_json_records()
+    if isinstance(value, pd.DataFrame):
+        return _plain(value.to_dict('records'))
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (pd.Timestamp, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Точка входа: python -m src.server."""
+    parser = argparse.ArgumentParser(description="Сервис аналитики над загруженными в память операциями.")
+    parser.add_argument('--file', default=DEFAULT_OPERATIONS_FILE, help="Excel-файл с операциями.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Адрес.")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Порт.")
+    parser.add_argument('--reload-interval', type=float, default=DEFAULT_RELOAD_INTERVAL,
+                        help="Период проверки изменений файла, в секундах.")
+    parser.add_argument('--base-currency', default=BASE_CURRENCY, help="Валюта, в которую переводятся суммы.")
+    parser.add_argument('--no-convert', action='store_true', help="Не переводить суммы в базовую валюту.")
+    parser.add_argument('--rates', default=DEFAULT_RATES_PATH, help="Файл таблицы курсов.")
+    args = parser.parse_args(argv)
+
+    dataset = WarmDataset(args.file, reload_interval=args.reload_interval,
+                          base_currency=None if args.no_convert else args.base_currency, rates_path=args.rates)
+    server = serve(dataset, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        dataset.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -1,39 +1,55 @@
-import datetime
 import logging
-from typing import Any, Dict, List, Optional
+import re
+from typing import Any, Dict, Iterable, Optional, Pattern, Sequence, Union
 
+import numpy as np
 import pandas as pd
 
+from src.classifier import TRANSACTION_CLASSIFIER
+from src.cube import AggregateCube
+from src.memo import apply_over_uniques
+from src.metrics import timed
+from src.records import TransactionRecords
+from src.schema import CASHBACK_COLUMN, CATEGORY_COLUMN, as_datetime
+from src.search_index import SearchIndex
+from src.store import TransactionStore
+from src.streaming import accumulate_group_sums
+
 # Логирование
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 #  Анализ выгодных категорий повышенного кешбэка
-def analyze_cashback_categories(data: pd.DataFrame, year: Optional[int] = None,
-                                month: Optional[int] = None) -> Dict[str, float]:
+@timed('aggregate')
+def analyze_cashback_categories(data: Union[pd.DataFrame, TransactionStore, AggregateCube, Iterable[pd.DataFrame]],
+                                year: Optional[int] = None, month: Optional[int] = None) -> Dict[str, float]:
     """
     Анализ выгодных категорий повышенного кешбэка.
+    Для TransactionStore читается только партиция нужного месяца, для AggregateCube суммы берутся из куба.
+    Вместо DataFrame можно передать поток пакетов (см. src.streaming.iter_transactions),
+    тогда суммы накапливаются по мере чтения.
     """
-    # Указать формат и установить dayfirst=True, если даты в формате дд.мм.гггг
-    data['Дата операции'] = pd.to_datetime(data['Дата операции'],
-                                           format='%d.%m.%Y %H:%M:%S', errors='coerce', dayfirst=True)
-
-    if year and month:
-        # Анализ за месяц и год
-        filtered_data = data[
-            (data['Дата операции'].dt.year == year) &
-            (data['Дата операции'].dt.month == month)
-        ]
-    else:
-        # Анализ за предоставленный диапазон дат (если фильтрация уже сделана)
-        filtered_data = data
+    if isinstance(data, AggregateCube):
+        start = pd.Timestamp(year, month, 1) if year and month else None
+        end = start + pd.offsets.MonthBegin(1) - pd.Timedelta(1, 'ns') if start is not None else None
+        cashback_totals = data.totals([CATEGORY_COLUMN], start, end, [CASHBACK_COLUMN])[CASHBACK_COLUMN]
+        return cashback_totals.sort_values(ascending=False).to_dict()
+    if isinstance(data, TransactionStore):
+        data = data.month(year, month) if year and month else data.frame
+        year = month = None
+    elif not isinstance(data, pd.DataFrame):
+        cashback_totals = accumulate_group_sums(
+            (_filter_by_month(chunk, year, month) for chunk in data), 'Категория', 'Кэшбэк'
+        )
+        return cashback_totals.sort_values(ascending=False).to_dict()
+
+    filtered_data = _filter_by_month(data, year, month)
 
     if filtered_data.empty:
         return {}
 
     cashback_by_category = (
-        filtered_data.groupby('Категория')['Кэшбэк']
+        filtered_data.groupby('Категория', observed=True)['Кэшбэк']
         .sum()
         .sort_values(ascending=False)
     ).to_dict()
@@ -41,81 +57,121 @@ def analyze_cashback_categories(data: pd.DataFrame, year: Optional[int] = None,
     return cashback_by_category
 
 
+def _filter_by_month(data: pd.DataFrame, year: Optional[int], month: Optional[int]) -> pd.DataFrame:
+    if year and month:
+        # Анализ за месяц и год (нормализованный столбец с датами не разбирается повторно)
+        dates = as_datetime(data['Дата операции'])
+        return data[
+            (dates.dt.year == year) &
+            (dates.dt.month == month)
+        ]
+    # Анализ за предоставленный диапазон дат (если фильтрация уже сделана)
+    return data
+
+
 # Инвесткопилка
-def investment_bank(month: str, transactions: List[Dict[str, Any]], limit: int) -> float:
+def investment_bank(month: str, transactions: Sequence[Dict[str, Any]], limit: int) -> float:
     """
     Рассчитывает сумму, которую можно было бы отложить в «Инвесткопилку».
+    Тонкая обертка над investment_bank_table для списка словарей или TransactionRecords
+    (у TransactionRecords столбцы берутся напрямую, без обхода строк).
     """
-    # Преобразуем строку месяца в datetime
-    month_date = datetime.datetime.strptime(month, "%Y-%m")
-
-    # Преобразуем даты операций в транзакциях в datetime
-    for txn in transactions:
-        txn['Дата операции'] = pd.to_datetime(txn['Дата операции'], errors='coerce')
-
-    # Фильтруем транзакции по месяцу
-    filtered_transactions = [
-        txn for txn in transactions
-        if txn['Дата операции'].year == month_date.year and
-        txn['Дата операции'].month == month_date.month
-    ]
+    columns = ['Дата операции', 'Сумма операции']
+    if isinstance(transactions, TransactionRecords):
+        frame = transactions.to_frame(columns)
+    else:
+        frame = pd.DataFrame.from_records(transactions, columns=columns)
+    table = investment_bank_table(frame, [month], [limit])
+    return float(table.to_numpy()[0, 0])
 
-    # Логирование для отладки
-    logger.info(f"Month: {month_date}")
-    logger.info(f"Filtered Transactions: {filtered_transactions}")
 
-    # Рассчитываем общую сумму, которую можно отложить
-    total_saved = sum(
-        (limit - (txn['Сумма операции'] % limit)) % limit
-        for txn in filtered_transactions
-    )
+# Инвесткопилка для нескольких месяцев и лимитов
+@timed('aggregate')
+def investment_bank_table(transactions: pd.DataFrame, months: Sequence[str], limits: Sequence[int]) -> pd.DataFrame:
+    """
+    Рассчитывает суммы для «Инвесткопилки» сразу для нескольких месяцев и лимитов округления.
 
-    return float(total_saved)  # Убедитесь, что возвращаете float
+    :param transactions: DataFrame со столбцами 'Дата операции' и 'Сумма операции'.
+    :param months: Месяцы в формате 'YYYY-MM'.
+    :param limits: Лимиты округления (положительные числа).
+    :return: DataFrame: строки — месяцы, столбцы — лимиты, значения — сумма округлений.
+    """
+    limits_array = np.asarray(limits, dtype='float64')
+    if (limits_array <= 0).any():
+        raise ValueError("Лимит округления должен быть положительным.")
+
+    month_index = pd.PeriodIndex([pd.Period(month, freq='M') for month in months], freq='M', name='Месяц')
+    periods = as_datetime(transactions['Дата операции']).dt.to_period('M')
+    in_months = periods.isin(month_index).to_numpy()
+
+    amounts = transactions['Сумма операции'].to_numpy(dtype='float64')[in_months]
+    logger.info(f"Инвесткопилка: {len(amounts)} транзакций за {len(month_index)} мес.")
+
+    # Округление до лимита для всех транзакций и всех лимитов сразу (строки × лимиты)
+    savings = np.mod(limits_array - np.mod(amounts[:, None], limits_array), limits_array)
+    table = (
+        pd.DataFrame(savings, index=periods[in_months].to_numpy(), columns=pd.Index(limits, name='Лимит'))
+        .groupby(level=0)
+        .sum()
+        .reindex(month_index, fill_value=0.0)
+    )
+    table.index.name = 'Месяц'
+    return table
 
 
 # Простой поиск
-def simple_search(transactions: pd.DataFrame, query: str) -> List[Dict[str, Any]]:
+def simple_search(transactions: Union[pd.DataFrame, SearchIndex], query: str) -> TransactionRecords:
     """
-    Ищет транзакции по описанию или категории.
+    Ищет транзакции по описанию или категории: запрос — обычная подстрока без учета регистра
+    (не регулярное выражение, символы вроде '.' и '+' ищутся буквально).
+    Результат — TransactionRecords: последовательность словарей, создаваемых по мере обращения к строкам.
+    Если передан SearchIndex, совпадения берутся из индекса без просмотра всех строк
+    (для постраничной выдачи используйте SearchIndex.search), результат тот же.
     """
+    if isinstance(transactions, SearchIndex):
+        return TransactionRecords.from_frame(transactions.rows(transactions.find(query)))
+
+    # Запрос проверяется только на уникальных значениях столбцов, результаты кэшируются между вызовами
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
     filtered_transactions = transactions[
-        transactions['Описание'].str.contains(query, case=False, na=False) |
-        transactions['Категория'].str.contains(query, case=False, na=False)
+        _matches_pattern(transactions['Описание'], pattern) |
+        _matches_pattern(transactions['Категория'], pattern)
     ]
 
-    return [
-        {str(key): value for key, value in txn.items()}
-        for txn in filtered_transactions.to_dict('records')
-    ]
+    return TransactionRecords.from_frame(filtered_transactions)
+
+
+# Проверка шаблона по уникальным значениям столбца
+def _matches_pattern(values: pd.Series, pattern: Pattern[str]) -> pd.Series:
+    matches: pd.Series = apply_over_uniques(
+        values, lambda value: pattern.search(str(value)) is not None,
+        ('simple_search', pattern.pattern, pattern.flags), na_value=False
+    ).astype(bool)
+    return matches
 
 
 # Поиск по телефонным номерам
-def search_phone_numbers(transactions: pd.DataFrame) -> List[Dict[str, Any]]:
+def search_phone_numbers(transactions: pd.DataFrame) -> TransactionRecords:
     """
     Ищет транзакции с мобильными номерами в описании.
+    Использует общий классификатор описаний (src.classifier).
     """
-    phone_pattern = r'\+7 \d{3} \d{2}-\d{2}-\d{2}|\+7 \d{3} \d{3}-\d{2}-\d{2}'
     filtered_transactions = transactions[
-        transactions['Описание'].str.contains(phone_pattern, regex=True, na=False)
+        TRANSACTION_CLASSIFIER.mask(transactions['Описание'], 'phone')
     ]
 
-    return [
-        {str(key): value for key, value in txn.items()}
-        for txn in filtered_transactions.to_dict('records')
-    ]
+    return TransactionRecords.from_frame(filtered_transactions)
 
 
 # Поиск переводов физическим лицам
-def search_personal_transfers(transactions: pd.DataFrame) -> List[Dict[str, Any]]:
+def search_personal_transfers(transactions: pd.DataFrame) -> TransactionRecords:
     """
     Ищет транзакции, относящиеся к переводам физическим лицам.
+    Использует общий классификатор описаний (src.classifier).
     """
     filtered_transactions = transactions[
         (transactions['Категория'] == "Переводы") &
-        transactions['Описание'].str.contains(r'\b[A-ЯЁ][а-яё]+\s[A-ЯЁ]\.', regex=True, na=False)
+        TRANSACTION_CLASSIFIER.mask(transactions['Описание'], 'personal_transfer')
     ]
 
-    return [
-        {str(key): value for key, value in txn.items()}
-        for txn in filtered_transactions.to_dict('records')
-    ]
+    return TransactionRecords.from_frame(filtered_transactions)
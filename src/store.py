@@ -0,0 +1,110 @@
+import logging
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+
+from src.metrics import span, timed
+from src.schema import as_datetime
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+DateLike = Union[str, pd.Timestamp, np.datetime64]
+
+
+class TransactionStore:
+    """
+    Хранилище транзакций, отсортированное по дате операции и разбитое на месячные партиции.
+
+    Запросы по периоду находят границы партиций бинарным поиском и возвращают
+    срез данных, не просматривая остальную историю.
+    """
+
+    def __init__(self, transactions: pd.DataFrame, date_column: str = 'Дата операции') -> None:
+        dates = as_datetime(transactions[date_column])
+        missing = int(dates.isna().sum())
+        if missing:
+            logger.warning(f"Пропущено {missing} транзакций без даты операции.")
+
+        order = np.argsort(dates.to_numpy(), kind='stable')[:len(dates) - missing]
+        frame = transactions.iloc[order].reset_index(drop=True)
+        frame[date_column] = dates.iloc[order].to_numpy()
+
+        self.date_column = date_column
+        self._frame = frame
+        self._dates = frame[date_column].to_numpy(dtype='datetime64[ns]')
+        self._months, starts = np.unique(self._dates.astype('datetime64[M]'), return_index=True)
+        self._bounds = np.append(starts, len(frame))
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Все транзакции в порядке возрастания даты."""
+        return self._frame
+
+    @property
+    def months(self) -> List[pd.Period]:
+        """Месяцы, для которых в хранилище есть транзакции."""
+        return [pd.Period(month, freq='M') for month in self._months]
+
+    @timed('filter')
+    def range(self, start: DateLike, end: DateLike) -> pd.DataFrame:
+        """
+        Возвращает транзакции с датой операции в диапазоне [start, end] (включительно).
+
+        :param start: Начало периода.
+        :param end: Конец периода.
+        :return: Срез DataFrame с транзакциями за период.
+        """
+        start64 = np.datetime64(pd.Timestamp(start), 'ns')
+        end64 = np.datetime64(pd.Timestamp(end), 'ns')
+
+        first = int(np.searchsorted(self._months, start64.astype('datetime64[M]'), side='left'))
+        last = int(np.searchsorted(self._months, end64.astype('datetime64[M]'), side='right'))
+        if first >= last:
+            return self._frame.iloc[0:0]
+
+        # Внутри граничных партиций ищем точные позиции, не касаясь остальных
+        lo_start, lo_end = self._bounds[first], self._bounds[first + 1]
+        lo = lo_start + int(np.searchsorted(self._dates[lo_start:lo_end], start64, side='left'))
+        hi_start, hi_end = self._bounds[last - 1], self._bounds[last]
+        hi = hi_start + int(np.searchsorted(self._dates[hi_start:hi_end], end64, side='right'))
+        return self._frame.iloc[lo:max(lo, hi)]
+
+    @timed('filter')
+    def month(self, year: int, month: int) -> pd.DataFrame:
+        """
+        Возвращает транзакции за указанный месяц.
+
+        :param year: Год.
+        :param month: Месяц (1-12).
+        :return: Срез DataFrame с транзакциями за месяц.
+        """
+        index = int(np.searchsorted(self._months, np.datetime64(f"{year:04d}-{month:02d}", 'M')))
+        if index == len(self._months) or self._months[index] != np.datetime64(f"{year:04d}-{month:02d}", 'M'):
+            return self._frame.iloc[0:0]
+        return self._frame.iloc[self._bounds[index]:self._bounds[index + 1]]
+
+
+# Выборка транзакций за период
+def select_range(transactions: Union[pd.DataFrame, TransactionStore], start: DateLike,
+                 end: DateLike) -> pd.DataFrame:
+    """
+    Возвращает транзакции за период [start, end].
+    Для TransactionStore используется поиск по партициям, для DataFrame — фильтрация по маске.
+
+    :param transactions: DataFrame или TransactionStore с транзакциями.
+    :param start: Начало периода.
+    :param end: Конец периода.
+    :return: DataFrame с транзакциями за период.
+    """
+    if isinstance(transactions, TransactionStore):
+        return transactions.range(start, end)
+    with span('filter', function='select_range') as stage:
+        dates = as_datetime(transactions['Дата операции'])
+        selected = transactions[(dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))]
+        stage.rows = len(selected)
+    return selected
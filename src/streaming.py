@@ -0,0 +1,109 @@
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from openpyxl import load_workbook  # type: ignore[import-untyped]
+
+from src.schema import normalize_transactions
+
+# Логирование
+logger = logging.getLogger(__name__)
+
+# Размер пакета строк по умолчанию
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+# Потоковое чтение Excel-файла
+def iter_excel_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      sheet_name: Optional[str] = None, normalize: bool = True) -> Iterator[pd.DataFrame]:
+    """
+    Читает лист Excel пакетами строк в режиме read-only, не загружая книгу целиком.
+
+    :param file_path: Путь к Excel-файлу.
+    :param chunk_size: Количество строк в пакете.
+    :param sheet_name: Имя листа (по умолчанию активный лист).
+    :param normalize: Приводить ли пакеты к канонической схеме.
+    :return: Итератор по DataFrame с транзакциями.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) for name in header]
+
+        batch: List[tuple] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield _make_chunk(batch, columns, normalize)
+                batch = []
+        if batch:
+            yield _make_chunk(batch, columns, normalize)
+    finally:
+        workbook.close()
+
+
+# Потоковое чтение CSV-файла
+def iter_csv_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, normalize: bool = True,
+                    **read_csv_kwargs: Any) -> Iterator[pd.DataFrame]:
+    """
+    Читает CSV-выгрузку пакетами строк.
+
+    :param file_path: Путь к CSV-файлу.
+    :param chunk_size: Количество строк в пакете.
+    :param normalize: Приводить ли пакеты к канонической схеме.
+    :return: Итератор по DataFrame с транзакциями.
+    """
+    with pd.read_csv(file_path, chunksize=chunk_size, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            yield normalize_transactions(chunk) if normalize else chunk
+
+
+# Потоковое чтение выгрузки операций
+def iter_transactions(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      normalize: bool = True) -> Iterator[pd.DataFrame]:
+    """
+    Возвращает итератор по пакетам транзакций; формат определяется по расширению файла.
+    Пиковое потребление памяти ограничено размером пакета, а не размером файла.
+
+    :param file_path: Путь к файлу выгрузки (.xlsx или .csv).
+    :param chunk_size: Количество строк в пакете.
+    :param normalize: Приводить ли пакеты к канонической схеме.
+    :return: Итератор по DataFrame с транзакциями.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        return iter_csv_chunks(file_path, chunk_size, normalize)
+    if extension in ('.xlsx', '.xlsm'):
+        return iter_excel_chunks(file_path, chunk_size, normalize=normalize)
+    raise ValueError(f"Неподдерживаемый формат файла: {file_path}")
+
+
+# Накопление сумм по группам для потока пакетов
+def accumulate_group_sums(chunks: Iterable[pd.DataFrame], by: str, column: str) -> pd.Series:
+    """
+    Суммирует столбец по группам, обрабатывая пакеты по одному.
+    Порядок групп соответствует порядку их первого появления.
+
+    :param chunks: Пакеты транзакций.
+    :param by: Столбец для группировки.
+    :param column: Суммируемый столбец.
+    :return: Series с суммами по группам.
+    """
+    totals: Dict[Any, float] = {}
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        sums = chunk.groupby(by, observed=True, sort=False)[column].sum()
+        for key, value in sums.items():
+            totals[key] = totals.get(key, 0.0) + float(value)
+    return pd.Series(totals, dtype='float64')
+
+
+def _make_chunk(batch: List[tuple], columns: List[str], normalize: bool) -> pd.DataFrame:
+    chunk = pd.DataFrame.from_records(batch, columns=columns)
+    return normalize_transactions(chunk) if normalize else chunk
@@ -3,9 +3,14 @@ import os
 from typing import Optional
 
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+
+from src.cache import load_with_cache
+from src.fx import FxRateTable, convert_to_base
+from src.metrics import timed
+from src.schema import as_datetime, normalize_transactions
 
 # Логирование
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -23,14 +28,17 @@ def get_last_three_months_range(date: Optional[str] = None) -> tuple[pd.Timestam
 def ensure_datetime_column(df: pd.DataFrame, column: str) -> pd.DataFrame:
     """
     Проверяет и преобразует указанный столбец в datetime.
+    Если столбец уже имеет тип datetime (например, после нормализации), он не разбирается повторно.
 
     :param df: DataFrame с данными.
     :param column: Название столбца для преобразования.
     :return: DataFrame с преобразованным столбцом.
     """
     if column in df.columns:
-        df[column] = pd.to_datetime(df[column], errors='coerce')
-        logger.info(f"Столбец '{column}' преобразован в datetime.")
+        if is_datetime64_any_dtype(df[column]):
+            return df
+        df[column] = as_datetime(df[column])
+        logger.debug(f"Столбец '{column}' преобразован в datetime.")
     else:
         logger.error(f"Столбец '{column}' не найден в DataFrame.")
         raise KeyError(f"Столбец '{column}' не найден.")
@@ -48,7 +56,7 @@ def ensure_directory_exists(path: str) -> None:
         os.makedirs(path)
         logger.info(f"Папка создана: {path}")
     else:
-        logger.info(f"Папка уже существует: {path}")
+        logger.debug(f"Папка уже существует: {path}")
 
 
 # Функция для вычисления кешбэка по сумме операций
@@ -60,12 +68,11 @@ def calculate_cashback(amount: float, rate: float = 0.01) -> float:
     :param rate: Процент кешбэка (по умолчанию 1%).
     :return: Сумма кешбэка.
     """
-    cashback = round(amount * rate, 2)
-    logger.info(f"Рассчитан кешбэк: {cashback} для суммы: {amount}")
-    return cashback
+    return round(amount * rate, 2)
 
 
 # Функция для фильтрации транзакций по категории
+@timed('filter')
 def filter_transactions_by_category(df: pd.DataFrame, category: str) -> pd.DataFrame:
     """
     Фильтрует транзакции по указанной категории.
@@ -75,12 +82,34 @@ def filter_transactions_by_category(df: pd.DataFrame, category: str) -> pd.DataF
     :return: Отфильтрованный DataFrame.
     """
     filtered_df = df[df['Категория'] == category]
-    logger.info(f"Отфильтровано {len(filtered_df)} транзакций по категории: {category}")
+    logger.debug(f"Отфильтровано {len(filtered_df)} транзакций по категории: {category}")
     return filtered_df
 
 
-def load_transactions(file_path: str) -> pd.DataFrame:
+def _read_normalized_excel(file_path: str) -> pd.DataFrame:
+    return normalize_transactions(pd.read_excel(file_path))
+
+
+@timed('load')
+def load_transactions(file_path: str, use_cache: bool = True, cache_dir: Optional[str] = None,
+                      normalize: bool = True, rates: Optional[FxRateTable] = None) -> pd.DataFrame:
     """
     Загружает данные о транзакциях из Excel-файла.
+
+    По умолчанию данные сразу приводятся к канонической схеме (см. src.schema),
+    а результат сохраняется в колоночный кэш, который перестраивается при изменении исходного файла.
+
+    :param file_path: Путь к Excel-файлу.
+    :param use_cache: Использовать ли колоночный кэш.
+    :param cache_dir: Папка кэша (по умолчанию .cache рядом с исходным файлом).
+    :param normalize: Приводить ли данные к канонической схеме.
+    :param rates: Таблица курсов: если передана, суммы переводятся в базовую валюту (см. src.fx).
+    :return: DataFrame с транзакциями.
     """
-    return pd.read_excel(file_path)
+    loader = _read_normalized_excel if normalize else pd.read_excel
+    if not use_cache:
+        transactions = loader(file_path)
+    else:
+        transactions = load_with_cache(file_path, loader, cache_dir, tag='normalized' if normalize else 'raw')
+    # Перевод в базовую валюту выполняется после кэша: кэш не зависит от таблицы курсов
+    return transactions if rates is None else convert_to_base(transactions, rates)
@@ -1,92 +1,301 @@
 import logging
-from typing import Any, Dict, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping, Optional, Union, cast
 
+import numpy as np
 import pandas as pd
-import requests
+
+from src.cube import FIRST_COLUMN, AggregateCube
+from src.greeting import get_greeting
+from src.metrics import timed
+from src.schema import CARD_COLUMN, CATEGORY_COLUMN, PAYMENT_AMOUNT_COLUMN
+from src.store import DateLike, TransactionStore, select_range
+
+if TYPE_CHECKING:
+    from src.market_data import MarketDataClient
 
 # Логирование
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-# Приветствие в зависимости от времени суток
-def get_greeting(current_time: str) -> str:
-    hour = int(current_time.split(' ')[1].split(':')[0])
-    if 5 <= hour < 12:
-        return "Доброе утро"
-    elif 12 <= hour < 18:
-        return "Добрый день"
-    elif 18 <= hour < 22:
-        return "Добрый вечер"
-    else:
-        return "Доброй ночи"
+# Суммирование трат и кешбэка по картам
+@timed('aggregate')
+def get_card_summary(transactions: Union[pd.DataFrame, AggregateCube, Iterable[pd.DataFrame]],
+                     card_rates: Optional[Mapping[Any, float]] = None,
+                     category_rates: Optional[Mapping[str, float]] = None,
+                     default_rate: float = 0.01) -> List[Dict[str, Any]]:
+    """
+    Возвращает сводку по картам: последние 4 цифры, сумма потраченных средств и кэшбэк.
+    Суммы считаются одной группировкой по номеру карты.
+    Вместо DataFrame можно передать поток пакетов (см. src.streaming.iter_transactions)
+    или куб агрегатов (карты тогда следуют в порядке их первой операции).
 
+    :param transactions: DataFrame, AggregateCube или поток пакетов с транзакциями.
+    :param card_rates: Ставки кешбэка по номеру карты (имеют приоритет над ставками по категориям).
+    :param category_rates: Ставки кешбэка по категориям.
+    :param default_rate: Ставка кешбэка по умолчанию (1%).
+    :return: Список словарей со сводкой по картам.
+    """
+    if isinstance(transactions, pd.DataFrame):
+        totals = _card_totals(transactions, category_rates, default_rate)
+    elif isinstance(transactions, AggregateCube):
+        totals = _cube_card_totals(transactions, category_rates, default_rate)
+    else:
+        partial_totals = [_card_totals(chunk, category_rates, default_rate) for chunk in transactions]
+        if not partial_totals:
+            return []
+        totals = pd.concat(partial_totals).groupby(level=0, sort=False).sum()
 
-# Суммирование трат и кешбэка по картам
-def get_card_summary(transactions: pd.DataFrame) -> List[Dict[str, Any]]:
-    """Возвращает сводку по картам: последние 4 цифры, сумма потраченных средств и кэшбэк."""
-    card_summary = []
-    for card in transactions['Номер карты'].unique():
-        card_transactions = transactions[transactions['Номер карты'] == card]
-        total_spent = card_transactions['Сумма платежа'].sum()
-        cashback = total_spent * 0.01  # 1% cashback
-        last_digits = str(card)[-4:]  # Extract last 4 digits as string
-        card_summary.append({
-            'last_digits': last_digits,
-            'total_spent': total_spent,
-            'cashback': cashback
-        })
-    return card_summary
+    if totals.empty:
+        return []
 
+    cashback = totals['cashback']
+    if card_rates:
+        override_rates = totals.index.map(lambda card: card_rates.get(card, np.nan)).to_numpy(dtype='float64')
+        cashback = cashback.where(np.isnan(override_rates), totals['total_spent'] * override_rates)
 
-# Топ-5 транзакций по сумме платежа
-def get_top_transactions(transactions: pd.DataFrame) -> List[Dict[str, Any]]:
-    top_transactions = transactions.sort_values(by='Сумма платежа', ascending=False).head(5)
     return [
-        {
-            "date": row['Дата операции'],
-            "amount": row['Сумма платежа'],
-            "category": row['Категория'],
-            "description": row['Описание']
-        }
-        for _, row in top_transactions.iterrows()
+        {'last_digits': str(card)[-4:], 'total_spent': total_spent, 'cashback': card_cashback}
+        for card, total_spent, card_cashback in zip(totals.index, totals['total_spent'], cashback)
     ]
 
 
-# Получение курсов валют
-def get_currency_rates() -> List[Dict[str, Any]]:
-    response = requests.get('https://api.exchangerate.host/latest')
-    if response.status_code == 200:
-        data = response.json()
-        return [
-            {"currency": "USD", "rate": data['rates'].get('USD', 'N/A')},
-            {"currency": "EUR", "rate": data['rates'].get('EUR', 'N/A')}
-        ]
+def _card_totals(transactions: pd.DataFrame, category_rates: Optional[Mapping[str, float]],
+                 default_rate: float) -> pd.DataFrame:
+    amounts = transactions['Сумма платежа'].astype('float64')
+    if category_rates:
+        rates = transactions['Категория'].map(category_rates).astype('float64').fillna(default_rate)
     else:
-        logger.error("Не удалось получить курсы валют")
-        return []
+        rates = pd.Series(default_rate, index=transactions.index)
+    return (
+        pd.DataFrame({
+            'card': transactions['Номер карты'],
+            'total_spent': amounts,
+            'cashback': amounts * rates
+        })
+        .groupby('card', sort=False, observed=True)[['total_spent', 'cashback']]
+        .sum()
+    )
+
+
+def _cube_card_totals(cube: AggregateCube, category_rates: Optional[Mapping[str, float]],
+                      default_rate: float) -> pd.DataFrame:
+    cells = cube.totals([CARD_COLUMN, CATEGORY_COLUMN], measures=[PAYMENT_AMOUNT_COLUMN], dropna=False)
+    cells = cells.reset_index()
+    first_operations = cube.cells.groupby(CARD_COLUMN, observed=True)[FIRST_COLUMN].min()
+    if category_rates:
+        rates = cells[CATEGORY_COLUMN].map(category_rates).astype('float64').fillna(default_rate)
+    else:
+        rates = pd.Series(default_rate, index=cells.index)
+    totals = (
+        pd.DataFrame({
+            'card': cells[CARD_COLUMN],
+            'total_spent': cells[PAYMENT_AMOUNT_COLUMN],
+            'cashback': cells[PAYMENT_AMOUNT_COLUMN] * rates
+        })
+        .groupby('card', observed=True)[['total_spent', 'cashback']]
+        .sum()
+    )
+    ordered: pd.DataFrame = totals.loc[first_operations.reindex(totals.index).sort_values(kind='stable').index]
+    return ordered
+
+
+# Топ-k транзакций по сумме платежа
+@timed('aggregate')
+def get_top_transactions(transactions: Union[pd.DataFrame, TransactionStore], k: int = 5,
+                         start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> List[Dict[str, Any]]:
+    """
+    Возвращает k крупнейших транзакций по сумме платежа (по умолчанию топ-5).
+    Используется частичный отбор (nlargest) вместо полной сортировки.
+
+    :param transactions: DataFrame или TransactionStore с транзакциями.
+    :param k: Количество транзакций.
+    :param start: Начало периода (необязательно).
+    :param end: Конец периода (необязательно).
+    :return: Список словарей с датой, суммой, категорией и описанием.
+    """
+    frame = _select_window(transactions, start, end)
+    return _to_top_records(frame.nlargest(k, 'Сумма платежа'))
+
+
+# Топ-k транзакций в каждой группе (по карте, категории и т.п.)
+def get_top_transactions_by_group(transactions: Union[pd.DataFrame, TransactionStore], group_by: str,
+                                  k: int = 5, start: Optional[DateLike] = None,
+                                  end: Optional[DateLike] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Возвращает k крупнейших транзакций по сумме платежа в каждой группе.
+
+    :param transactions: DataFrame или TransactionStore с транзакциями.
+    :param group_by: Столбец для группировки, например 'Номер карты' или 'Категория'.
+    :param k: Количество транзакций в группе.
+    :param start: Начало периода (необязательно).
+    :param end: Конец периода (необязательно).
+    :return: Словарь: значение группы -> список словарей с транзакциями.
+    """
+    frame = _select_window(transactions, start, end)
+    amounts = pd.Series(frame['Сумма платежа'].to_numpy(), index=np.arange(len(frame)))
+    top = amounts.groupby(frame[group_by].to_numpy(), sort=False).nlargest(k)
+
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    records = _to_top_records(frame.iloc[top.index.get_level_values(-1)])
+    for group, record in zip(top.index.get_level_values(0), records):
+        groups.setdefault(str(group), []).append(record)
+    return groups
+
+
+def _select_window(transactions: Union[pd.DataFrame, TransactionStore], start: Optional[DateLike],
+                   end: Optional[DateLike]) -> pd.DataFrame:
+    if start is None and end is None:
+        return transactions.frame if isinstance(transactions, TransactionStore) else transactions
+    return select_range(transactions, start if start is not None else pd.Timestamp.min,
+                        end if end is not None else pd.Timestamp.max)
 
 
-# Получение стоимости акций
-def get_stock_prices(stocks: List[str]) -> List[Dict[str, Any]]:
-    stock_data = []
-    for stock in stocks:
-        response = requests.get(f'https://api.example.com/stocks/{stock}')
-        if response.status_code == 200:
-            data = response.json()
-            stock_data.append({"stock": stock, "price": data.get('price', 'N/A')})
-        else:
-            logger.error(f"Не удалось получить данные по акции {stock}")
-    return stock_data
+def _to_top_records(top_transactions: pd.DataFrame) -> List[Dict[str, Any]]:
+    return cast(List[Dict[str, Any]], pd.DataFrame({
+        "date": top_transactions['Дата операции'],
+        "amount": top_transactions['Сумма платежа'],
+        "category": top_transactions['Категория'],
+        "description": top_transactions['Описание']
+    }).to_dict('records'))
+
+
+def _market_client(client: Optional['MarketDataClient']) -> 'MarketDataClient':
+    # Модуль рыночных данных (и requests) импортируется только при первом сетевом запросе
+    if client is not None:
+        return client
+    from src.market_data import get_default_client
+    return get_default_client()
+
+
+# Получение курсов валют
+def get_currency_rates(client: Optional['MarketDataClient'] = None) -> List[Dict[str, Any]]:
+    return _market_client(client).get_currency_rates()
+
+
+# Получение стоимости акций (все тикеры запрашиваются параллельно)
+def get_stock_prices(stocks: List[str], client: Optional['MarketDataClient'] = None) -> List[Dict[str, Any]]:
+    return _market_client(client).get_stock_prices(stocks)
+
+
+# Сроки (в секундах от начала сборки) для разделов главной страницы по умолчанию
+DEFAULT_SECTION_DEADLINES: Dict[str, float] = {
+    "greeting": 1.0,
+    "cards": 2.0,
+    "top_transactions": 2.0,
+    "currency_rates": 3.0,
+    "stock_prices": 3.0,
+}
+
+# Значения разделов, не успевших к сроку
+_DEGRADED_SECTIONS: Dict[str, Any] = {
+    "greeting": None,
+    "cards": [],
+    "top_transactions": [],
+    "currency_rates": [],
+    "stock_prices": [],
+}
 
 
 # Главная функция
 def generate_main_page_response(transactions: pd.DataFrame, current_time: str,
-                                user_settings: Dict[str, Any]) -> Dict[str, Any]:
+                                user_settings: Dict[str, Any],
+                                client: Optional['MarketDataClient'] = None,
+                                parallel: bool = False,
+                                deadlines: Optional[Mapping[str, float]] = None) -> Dict[str, Any]:
+    """
+    Формирует ответ главной страницы.
+
+    В режиме parallel=True разделы собираются параллельно (см. assemble_main_page):
+    у каждого раздела свой срок, а в ответ добавляются время сборки разделов и список неполных разделов.
+    """
+    if parallel:
+        return assemble_main_page(transactions, current_time, user_settings, client, deadlines)
+
+    currency_rates, stock_prices = _market_client(client).get_market_data(
+        user_settings.get("user_stocks", [])
+    )
     return {
         "greeting": get_greeting(current_time),
         "cards": get_card_summary(transactions),
         "top_transactions": get_top_transactions(transactions),
-        "currency_rates": get_currency_rates(),
-        "stock_prices": get_stock_prices(user_settings.get("user_stocks", []))
+        "currency_rates": currency_rates,
+        "stock_prices": stock_prices
     }
+
+
+# Параллельная сборка главной страницы
+def assemble_main_page(transactions: pd.DataFrame, current_time: str, user_settings: Dict[str, Any],
+                       client: Optional['MarketDataClient'] = None,
+                       deadlines: Optional[Mapping[str, float]] = None) -> Dict[str, Any]:
+    """
+    Собирает главную страницу, выполняя сетевые запросы параллельно с агрегациями pandas.
+
+    Раздел, не успевший к своему сроку, не задерживает ответ: он возвращается пустым,
+    а для акций — с ценами, полученными к сроку. Такие разделы перечисляются в "degraded",
+    время сборки каждого раздела (в секундах) — в "timings".
+
+    :param transactions: DataFrame с транзакциями.
+    :param current_time: Текущее время в формате 'YYYY-MM-DD HH:MM:SS'.
+    :param user_settings: Настройки пользователя.
+    :param client: Клиент рыночных данных.
+    :param deadlines: Сроки разделов в секундах от начала сборки.
+    :return: Ответ главной страницы.
+    """
+    client = _market_client(client)
+    section_deadlines = {**DEFAULT_SECTION_DEADLINES, **(deadlines or {})}
+    started = time.perf_counter()
+    finished_at: Dict[str, float] = {}
+
+    def track_finish(name: str, func: Callable[[], Any]) -> Callable[[], Any]:
+        def run() -> Any:
+            try:
+                return func()
+            finally:
+                finished_at[name] = time.perf_counter()
+        return run
+
+    executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='main-page')
+    futures = {
+        "greeting": executor.submit(track_finish("greeting", lambda: get_greeting(current_time))),
+        "cards": executor.submit(track_finish("cards", lambda: get_card_summary(transactions))),
+        "top_transactions": executor.submit(track_finish("top_transactions",
+                                                         lambda: get_top_transactions(transactions))),
+        "currency_rates": executor.submit(track_finish("currency_rates", client.get_currency_rates)),
+    }
+    stock_futures = client.submit_stock_prices(user_settings.get("user_stocks", []))
+
+    response: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    degraded: List[str] = []
+    for name, future in futures.items():
+        remaining = max(0.0, started + section_deadlines[name] - time.perf_counter())
+        try:
+            response[name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            logger.warning(f"Раздел '{name}' не успел к сроку {section_deadlines[name]} с")
+            response[name] = _DEGRADED_SECTIONS[name]
+            degraded.append(name)
+        except Exception as e:
+            logger.error(f"Ошибка при сборке раздела '{name}': {e}")
+            response[name] = _DEGRADED_SECTIONS[name]
+            degraded.append(name)
+        timings[name] = finished_at.get(name, time.perf_counter()) - started
+
+    wait(stock_futures, timeout=max(0.0, started + section_deadlines["stock_prices"] - time.perf_counter()))
+    response["stock_prices"] = [
+        future.result() for future in stock_futures
+        if future.done() and not future.cancelled() and future.exception() is None and future.result() is not None
+    ]
+    if not all(future.done() for future in stock_futures):
+        logger.warning(f"Раздел 'stock_prices' не успел к сроку {section_deadlines['stock_prices']} с")
+        degraded.append("stock_prices")
+    timings["stock_prices"] = time.perf_counter() - started
+
+    executor.shutdown(wait=False, cancel_futures=True)
+    response["timings"] = timings
+    response["degraded"] = degraded
+    return response
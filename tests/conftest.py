@@ -0,0 +1,96 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+from src.market_data import MarketDataClient
+from src.report_sink import ReportSink, set_default_sink
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Клиент может закрыть соединение по таймауту раньше, чем сервер ответит
+        pass
+
+
+class StubMarketDataServer:
+    """Локальный HTTP-сервер, отдающий заранее заданные курсы валют (текущие и исторические) и цены акций."""
+
+    def __init__(self) -> None:
+        self.rates: Dict[str, float] = {'USD': 74.3, 'EUR': 88.7}
+        self.prices: Dict[str, float] = {}
+        self.history: Dict[str, Dict[str, float]] = {}
+        self.delay = 0.0
+        self.requests: List[str] = []
+        self._server = _QuietHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def client(self, **kwargs: Any) -> MarketDataClient:
+        """Клиент, настроенный на этот сервер."""
+        return MarketDataClient(fx_url=f"{self.base_url}/latest",
+                                stock_url_template=f"{self.base_url}/stocks/{{symbol}}",
+                                fx_history_url_template=f"{self.base_url}/timeseries?symbols={{symbols}}", **kwargs)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                stub.requests.append(self.path)
+                if stub.delay:
+                    threading.Event().wait(stub.delay)
+                if self.path == '/latest':
+                    self._reply(200, {'rates': stub.rates})
+                elif self.path.startswith('/timeseries'):
+                    self._reply(200, {'rates': stub.history})
+                elif self.path.startswith('/stocks/') and self.path[len('/stocks/'):] in stub.prices:
+                    self._reply(200, {'price': stub.prices[self.path[len('/stocks/'):]]})
+                else:
+                    self._reply(404, {})
+
+            def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def market_server() -> Iterator[StubMarketDataServer]:
+    """Запущенный локальный сервер рыночных данных."""
+    server = StubMarketDataServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def report_sink(tmp_path_factory: pytest.TempPathFactory) -> Iterator[ReportSink]:
+    """Отчеты, сохраняемые декоратором save_report, пишутся во временную папку, а не в data/reports."""
+    sink = ReportSink(str(tmp_path_factory.mktemp('reports')), asynchronous=False)
+    previous = set_default_sink(sink)
+    yield sink
+    set_default_sink(previous)
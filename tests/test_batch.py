@@ -0,0 +1,102 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import pandas as pd
+import pytest
+
+from src.batch import SUCCESS_MARKER, BatchJob, main, read_manifest, run_batch, run_job
+
+
+@pytest.fixture
+def manifest(tmp_path: Path) -> Path:
+    """Манифест с двумя заданиями по одному файлу и заданием с отсутствующим файлом."""
+    pd.DataFrame({
+        'Дата операции': ['10.03.2023 12:00:00', '11.03.2023 12:00:00', '18.03.2023 12:00:00'],
+        'Номер карты': ['*7197', '*7197', '*4556'],
+        'Сумма операции': [-100.0, -200.0, -300.0],
+        'Сумма платежа': [-100.0, -200.0, -300.0],
+        'Кэшбэк': [1.0, 2.0, 3.0],
+        'Категория': ['Еда', 'Транспорт', 'Еда'],
+        'Описание': ['Магнит', 'Метро', 'Пятерочка']
+    }).to_excel(tmp_path / 'operations.xlsx', index=False)
+
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps({'jobs': [
+        {'id': 'march', 'file': 'operations.xlsx', 'year': 2023, 'month': 3, 'category': 'Еда'},
+        {'file': 'operations.xlsx', 'year': 2023, 'month': 4},
+        {'id': 'missing', 'file': 'missing.xlsx', 'year': 2023, 'month': 3}
+    ]}), encoding='utf-8')
+    return path
+
+
+def test_read_manifest(manifest: Path, tmp_path: Path) -> None:
+    """Пути к файлам отсчитываются от манифеста, идентификаторы строятся по файлу и периоду."""
+    jobs = read_manifest(str(manifest))
+
+    assert [job.job_id for job in jobs][0] == 'march'
+    assert jobs[1].job_id.startswith('operations_') and jobs[1].job_id.endswith('_2023-04')
+    assert jobs[0].file == str(tmp_path / 'operations.xlsx')
+    assert jobs[0].category == 'Еда' and jobs[1].category is None
+
+    duplicate = tmp_path / 'duplicate.json'
+    duplicate.write_text(json.dumps([{'id': 'a', 'file': 'x', 'year': 2023, 'month': 1}] * 2), encoding='utf-8')
+    with pytest.raises(ValueError):
+        read_manifest(str(duplicate))
+
+    for job_id in ('../x', '/tmp/x', 'a/b', 'a\\b', '..', 'a..b'):
+        unsafe = tmp_path / 'unsafe.json'
+        unsafe.write_text(json.dumps([{'id': job_id, 'file': 'x', 'year': 2023, 'month': 1}]), encoding='utf-8')
+        with pytest.raises(ValueError):
+            read_manifest(str(unsafe))
+
+
+def test_run_job_writes_results(manifest: Path, tmp_path: Path) -> None:
+    """Задание сохраняет кешбэк, отчеты и маркер успешного завершения."""
+    output = tmp_path / 'out'
+    result = run_job(read_manifest(str(manifest))[0], str(output))
+
+    assert result['status'] == 'ok'
+    cashback = json.loads((output / 'march' / 'cashback.json').read_text(encoding='utf-8'))
+    assert cashback == {'Еда': 4.0, 'Транспорт': 2.0}
+    assert pd.read_csv(output / 'march' / 'spending_by_category.csv')['Описание'].tolist() == ['Магнит', 'Пятерочка']
+    assert (output / 'march' / 'spending_by_weekday.csv').exists()
+    assert (output / 'march' / 'spending_by_workday.csv').exists()
+    assert (output / 'march' / SUCCESS_MARKER).exists()
+
+
+def test_run_batch_summary_and_resume(manifest: Path, tmp_path: Path) -> None:
+    """Пакет выполняется в пуле процессов, ошибки попадают в сводку, выполненные задания пропускаются."""
+    output = tmp_path / 'out'
+    jobs = read_manifest(str(manifest))
+
+    summary = run_batch(jobs, str(output), workers=2)
+    assert (summary['ok'], summary['failed'], summary['skipped']) == (2, 1, 0)
+    failed = [job for job in summary['jobs'] if job['status'] == 'failed']
+    assert failed[0]['job_id'] == 'missing' and 'FileNotFoundError' in failed[0]['error']
+    assert json.loads((output / 'summary.json').read_text(encoding='utf-8'))['failed'] == 1
+
+    summary = run_batch(jobs, str(output), workers=1)
+    assert (summary['ok'], summary['failed'], summary['skipped']) == (0, 1, 2)
+
+    assert main([str(manifest), '--output', str(output), '--no-resume', '--workers', '1']) == 1
+
+
+def _crash_on_job(job: BatchJob, output_dir: str, fmt: str) -> Dict[str, Any]:
+    # Задание 'crash' аварийно завершает процесс-исполнитель, остальные выполняются успешно
+    if job.job_id == 'crash':
+        os._exit(1)
+    time.sleep(0.2)
+    return {'job_id': job.job_id, 'status': 'ok', 'seconds': 0.0, 'error': None}
+
+
+def test_run_batch_fails_only_crashed_job(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Авария процесса-исполнителя отмечает ошибкой только вызвавшее ее задание."""
+    monkeypatch.setattr('src.batch.run_job', _crash_on_job)
+    jobs = [BatchJob(job_id, 'operations.xlsx', 2023, 3) for job_id in ('a', 'crash', 'b', 'c')]
+
+    summary = run_batch(jobs, str(tmp_path / 'out'), workers=2)
+    assert (summary['ok'], summary['failed']) == (3, 1)
+    assert [job['job_id'] for job in summary['jobs'] if job['status'] == 'failed'] == ['crash']
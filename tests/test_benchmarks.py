@@ -0,0 +1,35 @@
+import pandas as pd
+
+from benchmarks.generator import generate_transactions
+from benchmarks.run import compare, run_benchmarks
+from src.schema import is_normalized, normalize_transactions
+
+
+def test_generator_is_deterministic_and_matches_schema() -> None:
+    """Генератор воспроизводим и выдает столбцы data/operations.xlsx."""
+    first = generate_transactions(2000, seed=7)
+    second = generate_transactions(2000, seed=7)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert list(first.columns) == [
+        'Дата операции', 'Дата платежа', 'Номер карты', 'Статус', 'Сумма операции', 'Валюта операции',
+        'Сумма платежа', 'Валюта платежа', 'Кэшбэк', 'Категория', 'MCC', 'Описание',
+        'Бонусы (включая кэшбэк)', 'Округление на инвесткопилку', 'Сумма операции с округлением'
+    ]
+    assert first['Номер карты'].nunique() > 3
+    assert first['Категория'].value_counts().index[0] == 'Супермаркеты'
+    assert is_normalized(normalize_transactions(first))
+    assert not generate_transactions(2000, seed=8).equals(first)
+
+
+def test_run_and_compare_benchmarks() -> None:
+    """Сценарии выполняются, а рост времени выше порога отмечается как регрессия."""
+    current = run_benchmarks([1000], repeat=1, selected=['get_card_summary', 'simple_search'])
+    assert set(current['results']['1000']) == {'get_card_summary', 'simple_search'}
+
+    baseline = {'results': {'1000': {
+        name: {**values, 'seconds_median': values['seconds_median'] / 10} if name == 'simple_search' else values
+        for name, values in current['results']['1000'].items()
+    }}}
+    regressions = {row['scenario']: row['regression'] for row in compare(current, baseline)}
+    assert regressions == {'get_card_summary': False, 'simple_search': True}
@@ -0,0 +1,96 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.cache import (feather, file_content_hash, get_cache_paths, load_with_cache, read_cached_frame,
+                       write_cached_frame)
+from src.utils import load_transactions
+
+
+@pytest.fixture
+def excel_file(tmp_path: Path) -> str:
+    """Небольшой Excel-файл с транзакциями."""
+    path = tmp_path / "operations.xlsx"
+    pd.DataFrame({
+        'Дата операции': ['31.12.2021 16:44:00', '30.12.2021 12:00:00'],
+        'Номер карты': ['*7197', None],
+        'Сумма операции': [-160.89, -50.0],
+        'Категория': ['Супермаркеты', 'Кафе'],
+        'Описание': ['Колхоз', 'Кофейня']
+    }).to_excel(path, index=False)
+    return str(path)
+
+
+def test_load_transactions_creates_and_uses_cache(excel_file: str, tmp_path: Path) -> None:
+    """Первая загрузка строит кэш, вторая читает его без разбора Excel."""
+    cache_dir = str(tmp_path / "cache")
+    first = load_transactions(excel_file, cache_dir=cache_dir)
+
+    data_path, meta_path = get_cache_paths(excel_file, cache_dir, 'normalized')
+    assert os.path.exists(data_path)
+    assert os.path.exists(meta_path)
+
+    with patch("src.utils.pd.read_excel") as mock_read_excel:
+        second = load_transactions(excel_file, cache_dir=cache_dir)
+        mock_read_excel.assert_not_called()
+
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_cache_rebuilt_when_source_changes(excel_file: str, tmp_path: Path) -> None:
+    """Изменение исходного файла приводит к перестроению кэша."""
+    cache_dir = str(tmp_path / "cache")
+    load_transactions(excel_file, cache_dir=cache_dir)
+
+    pd.DataFrame({'Категория': ['Транспорт'], 'Сумма операции': [-10.0]}).to_excel(excel_file, index=False)
+    result = load_transactions(excel_file, cache_dir=cache_dir)
+
+    assert list(result['Категория']) == ['Транспорт']
+
+
+def test_cache_survives_touch_without_changes(excel_file: str, tmp_path: Path) -> None:
+    """Если изменилось только время изменения файла, кэш проверяется по хэшу и используется."""
+    cache_dir = str(tmp_path / "cache")
+    load_with_cache(excel_file, pd.read_excel, cache_dir)
+
+    stat = os.stat(excel_file)
+    os.utime(excel_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    with patch("src.cache.file_content_hash", wraps=file_content_hash) as mock_hash, \
+            patch("src.cache.pd.read_excel") as mock_read_excel:
+        load_with_cache(excel_file, mock_read_excel, cache_dir)
+        mock_read_excel.assert_not_called()
+        mock_hash.assert_called_once()
+
+
+def test_load_transactions_without_cache(excel_file: str, tmp_path: Path) -> None:
+    """При отключенном кэше файлы кэша не создаются."""
+    cache_dir = str(tmp_path / "cache")
+    load_transactions(excel_file, use_cache=False, cache_dir=cache_dir)
+    assert not os.path.exists(cache_dir)
+
+
+def test_concurrent_writers_use_separate_temp_files(tmp_path: Path) -> None:
+    """Одновременные записи одного кэша идут в разные временные файлы; после ошибки временный файл удаляется."""
+    data_path = str(tmp_path / "cache" / "frame.feather")
+    frame = pd.DataFrame({'a': [1, 2]})
+    temp_paths = []
+    original_write = feather.write_feather
+
+    def write_feather(df: pd.DataFrame, path: str, **kwargs: object) -> None:
+        temp_paths.append(path)
+        original_write(df, path, **kwargs)
+
+    with patch("src.cache.feather.write_feather", side_effect=write_feather):
+        write_cached_frame(frame, data_path)
+        write_cached_frame(frame, data_path)
+    assert len(set(temp_paths)) == 2 and data_path not in temp_paths
+    assert all(os.path.dirname(path) == os.path.dirname(data_path) for path in temp_paths)
+
+    with patch("src.cache.feather.write_feather", side_effect=OSError("disk full")), pytest.raises(OSError):
+        write_cached_frame(frame, data_path)
+    assert os.listdir(os.path.dirname(data_path)) == ["frame.feather"]
+    pd.testing.assert_frame_equal(read_cached_frame(data_path), frame)
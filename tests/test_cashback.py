@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cashback import CashbackAnalysis
+from src.schema import normalize_transactions
+from src.services import analyze_cashback_categories
+from src.store import TransactionStore
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    """Транзакции за год с пропусками в категориях и кешбэке."""
+    rng = np.random.default_rng(2)
+    size = 3000
+    dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, size), unit='min')
+    cashback = rng.integers(0, 100, size).astype(float)
+    cashback[::17] = np.nan
+    return normalize_transactions(pd.DataFrame({
+        'Дата операции': dates.strftime('%d.%m.%Y %H:%M:%S'),
+        'Категория': rng.choice(np.array(['Еда', 'Транспорт', 'Связь', 'Кафе', None], dtype=object), size),
+        'Сумма операции': -rng.integers(1, 5000, size).astype(float),
+        'Кэшбэк': cashback
+    }))
+
+
+def test_matrix_matches_monthly_analysis(transactions: pd.DataFrame) -> None:
+    """Каждая строка матрицы совпадает с анализом за отдельный месяц."""
+    analysis = CashbackAnalysis(TransactionStore(transactions))
+    matrix = analysis.matrix()
+
+    assert len(matrix) == 12
+    for period, row in zip(matrix.index, matrix.to_dict('records')):
+        expected = analyze_cashback_categories(transactions, period.year, period.month)
+        assert analysis.month(period.year, period.month) == pytest.approx(expected)
+        assert {category: value for category, value in row.items() if category in expected} == pytest.approx(expected)
+
+    assert analysis.month(2030, 1) == {}
+
+
+def test_top_categories_per_month(transactions: pd.DataFrame) -> None:
+    """Рейтинг месяца — первые n категорий по убыванию кешбэка."""
+    top = CashbackAnalysis(transactions).top(2)
+
+    assert list(top) == [f'2023-{month:02d}' for month in range(1, 13)]
+    expected = analyze_cashback_categories(transactions, 2023, 5)
+    assert list(top['2023-05'].items()) == list(expected.items())[:2]
+
+
+def test_custom_range_from_cumulative_sums(transactions: pd.DataFrame) -> None:
+    """Сумма за произвольный период совпадает с фильтрацией транзакций."""
+    store = TransactionStore(transactions)
+    analysis = CashbackAnalysis(store)
+
+    for start, end in [('2023-02-14 10:30', '2023-07-03 18:00'), ('2023-01-01', '2024-01-01'),
+                       ('2022-01-01', '2022-12-31')]:
+        expected = analyze_cashback_categories(store.range(start, end))
+        result = analysis.range(start, end)
+        assert result == pytest.approx(expected)
+        assert list(result.values()) == sorted(result.values(), reverse=True)
@@ -0,0 +1,59 @@
+import re
+
+import pandas as pd
+
+from src.classifier import PHONE_PATTERN, PatternClassifier
+from src.services import search_personal_transfers, search_phone_numbers
+
+
+def test_classify_returns_bitmask_for_all_detectors() -> None:
+    """Каждое описание получает маску всех сработавших детекторов."""
+    classifier = PatternClassifier({'phone': PHONE_PATTERN})
+    classifier.register('atm', r'снятие наличных', re.IGNORECASE)
+    classifier.register('subscription', r'(?i)подписка')
+
+    descriptions = pd.Series([
+        'Снятие наличных', 'Подписка +7 921 11-22-33', None, 'Снятие наличных', 'Магнит'
+    ], index=[10, 11, 12, 13, 14])
+    masks = classifier.classify(descriptions)
+
+    assert list(masks) == [
+        classifier.bit('atm'),
+        classifier.bit('phone') | classifier.bit('subscription'),
+        0,
+        classifier.bit('atm'),
+        0
+    ]
+
+    tags = classifier.tags(descriptions)
+    assert list(tags.columns) == ['phone', 'atm', 'subscription']
+    assert list(tags.index) == [10, 11, 12, 13, 14]
+    assert list(tags['subscription']) == [False, True, False, False, False]
+
+
+def test_each_unique_description_scanned_once() -> None:
+    """Повторяющиеся описания классифицируются один раз."""
+    classifier = PatternClassifier({'atm': 'Снятие'})
+    scanned = []
+    original_scan = classifier._scan
+
+    def counting_scan(text: str) -> int:
+        scanned.append(text)
+        return original_scan(text)
+
+    classifier._scan = counting_scan  # type: ignore[method-assign]
+    classifier.classify(pd.Series(['Снятие', 'Магнит', 'Снятие'] * 100))
+    classifier.classify(pd.Series(['Снятие', 'Магнит']))
+
+    assert sorted(scanned) == ['Магнит', 'Снятие']
+
+
+def test_services_use_classifier() -> None:
+    """Функции поиска из services.py возвращают те же транзакции, что и раньше."""
+    transactions = pd.DataFrame({
+        'Категория': ['Переводы', 'Связь', 'Переводы', 'Еда'],
+        'Описание': ['Иванов И.', 'Пополнение +7 921 111-22-33', 'Перевод на карту', 'Иванов И.']
+    })
+
+    assert [txn['Описание'] for txn in search_phone_numbers(transactions)] == ['Пополнение +7 921 111-22-33']
+    assert [txn['Описание'] for txn in search_personal_transfers(transactions)] == ['Иванов И.']
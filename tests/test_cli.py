@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+# Корень проекта (из него запускаются проверяемые команды)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code: str) -> str:
+    result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, check=True, capture_output=True,
+                            text=True)
+    return result.stdout.strip()
+
+
+def test_greeting_does_not_import_data_libraries() -> None:
+    """Команда greeting не импортирует pandas, numpy и requests."""
+    output = _run(
+        "import sys\n"
+        "from src.cli import main\n"
+        "main(['greeting', '--time', '2024-01-01 19:30:00'])\n"
+        "print(sorted(name for name in ('pandas', 'numpy', 'requests') if name in sys.modules))"
+    )
+    assert output.splitlines() == ['Добрый вечер', '[]']
+
+
+def test_views_import_does_not_load_network_client() -> None:
+    """Модуль рыночных данных (и requests) загружается только при сетевом запросе."""
+    assert _run("import sys, src.views; print('requests' in sys.modules, 'src.market_data' in sys.modules)") \
+        == 'False False'
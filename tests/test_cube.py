@@ -0,0 +1,85 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cube import AggregateCube, build_cube_cells, load_cube
+from src.reports import spending_by_weekday, spending_by_workday
+from src.schema import normalize_transactions
+from src.services import analyze_cashback_categories
+from src.store import TransactionStore
+from src.views import get_card_summary
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    """Нормализованные транзакции за полгода."""
+    rng = np.random.default_rng(1)
+    size = 1500
+    dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 181 * 24 * 60, size), unit='min')
+    amounts = -rng.integers(1, 5000, size).astype(float)
+    return normalize_transactions(pd.DataFrame({
+        'Дата операции': dates.strftime('%d.%m.%Y %H:%M:%S'),
+        'Номер карты': rng.choice(np.array(['*7197', '*4556', '*5091', None], dtype=object), size),
+        'Категория': rng.choice(np.array(['Еда', 'Транспорт', 'Связь', None], dtype=object), size),
+        'Сумма операции': amounts,
+        'Сумма платежа': amounts,
+        'Кэшбэк': np.round(-amounts * 0.01)
+    }))
+
+
+def test_cube_answers_match_raw_rows(transactions: pd.DataFrame) -> None:
+    """Ответы по кубу совпадают с расчетом по транзакциям."""
+    cube = AggregateCube.from_transactions(TransactionStore(transactions))
+
+    assert analyze_cashback_categories(cube, 2023, 3) == pytest.approx(
+        analyze_cashback_categories(transactions, 2023, 3))
+    assert analyze_cashback_categories(cube) == pytest.approx(analyze_cashback_categories(transactions))
+
+    rates = {'Еда': 0.05}
+    from_cube = {row['last_digits']: row for row in get_card_summary(cube, category_rates=rates)}
+    from_rows = {row['last_digits']: row for row in get_card_summary(transactions, category_rates=rates)}
+    assert from_cube.keys() == from_rows.keys()
+    for card, row in from_rows.items():
+        assert from_cube[card]['total_spent'] == pytest.approx(row['total_spent'])
+        assert from_cube[card]['cashback'] == pytest.approx(row['cashback'])
+
+
+def test_reports_use_cube_for_whole_months(transactions: pd.DataFrame) -> None:
+    """Отчеты по дням недели считаются по кубу для целых месяцев и по транзакциям иначе."""
+    cube = AggregateCube.from_transactions(transactions)
+
+    # Окно [28.02.2023 23:59:59.999999, 31.05.2023 23:59:59.999999] содержит ровно март — май
+    whole_months = '2023-05-31 23:59:59.999999'
+    assert cube.covers(pd.Timestamp(whole_months) - pd.DateOffset(months=3), whole_months)
+    assert not cube.covers('2023-03-15', '2023-06-15')
+
+    for date in [whole_months, '2023-06-15']:
+        with patch.object(AggregateCube, 'totals', wraps=cube.totals) as totals:
+            weekday = spending_by_weekday(cube, date)
+            workday = spending_by_workday(cube, date)
+        assert totals.called == (date == whole_months)
+
+        expected_weekday = spending_by_weekday(transactions, date)
+        assert list(weekday['День недели']) == list(expected_weekday['День недели'])
+        assert np.allclose(weekday['Сумма операции'], expected_weekday['Сумма операции'])
+        expected_workday = spending_by_workday(transactions, date)
+        assert list(workday['Тип дня']) == list(expected_workday['Тип дня'])
+        assert np.allclose(workday['Сумма операции'], expected_workday['Сумма операции'])
+
+
+def test_load_cube_persists_cells(transactions: pd.DataFrame, tmp_path: Path) -> None:
+    """Куб строится один раз и затем читается из кэша рядом с транзакциями."""
+    pytest.importorskip('pyarrow')
+    source = tmp_path / 'operations.xlsx'
+    source.write_bytes(b'operations')
+
+    with patch('src.cube.build_cube_cells', wraps=build_cube_cells) as build:
+        first = load_cube(str(source), transactions, str(tmp_path / 'cache'))
+        second = load_cube(str(source), transactions, str(tmp_path / 'cache'))
+
+    assert build.call_count == 1
+    assert second.months == first.months
+    assert analyze_cashback_categories(second, 2023, 2) == pytest.approx(analyze_cashback_categories(first, 2023, 2))
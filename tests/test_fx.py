@@ -0,0 +1,118 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.fx import (CURRENCY_COLUMN, FETCHED_SUFFIX, ORIGINAL_AMOUNT_COLUMN, ORIGINAL_PAYMENT_AMOUNT_COLUMN,
+                    PAYMENT_CURRENCY_COLUMN, FxRateTable, convert_to_base, load_rate_table, rate_table_for)
+from src.market_data import MarketDataClient
+from src.schema import AMOUNT_COLUMN, DATE_COLUMN, PAYMENT_AMOUNT_COLUMN
+from tests.conftest import StubMarketDataServer
+
+
+@pytest.fixture
+def rates() -> FxRateTable:
+    """Курсы USD на пятницу и понедельник."""
+    return FxRateTable.from_records([
+        {'date': '2021-01-08', 'currency': 'USD', 'rate': 70.0},
+        {'date': '2021-01-11', 'currency': 'USD', 'rate': 75.0},
+    ])
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    """Операции в рублях, в USD с рублевым платежом и полностью в USD."""
+    return pd.DataFrame({
+        DATE_COLUMN: pd.to_datetime(['2021-01-09 12:00', '2021-01-09 13:00', '2021-01-11 10:00', '2021-01-05 09:00']),
+        AMOUNT_COLUMN: [-100.0, -10.0, -2.0, -1.0],
+        CURRENCY_COLUMN: ['RUB', 'USD', 'USD', 'USD'],
+        PAYMENT_AMOUNT_COLUMN: [-100.0, -731.0, -2.0, -1.0],
+        PAYMENT_CURRENCY_COLUMN: ['RUB', 'RUB', 'USD', 'USD'],
+    })
+
+
+def test_lookup_uses_last_known_rate(rates: FxRateTable) -> None:
+    """Курс берется на дату или последний до нее; до первой котировки — первая; базовая валюта — 1."""
+    currencies = pd.Series(['USD', 'USD', 'USD', 'RUB', 'GBP'])
+    dates = pd.Series(pd.to_datetime(['2021-01-09 00:00', '2021-01-11 18:00', '2021-01-01 00:00',
+                                      '2021-01-09 00:00', '2021-01-09 00:00']))
+    np.testing.assert_array_equal(rates.lookup(currencies, dates), [70.0, 75.0, 70.0, 1.0, np.nan])
+
+
+def test_convert_to_base(rates: FxRateTable, transactions: pd.DataFrame) -> None:
+    """Рублевая сумма платежа имеет приоритет над курсом таблицы, исходные суммы сохраняются."""
+    converted = convert_to_base(transactions, rates)
+    assert converted[AMOUNT_COLUMN].tolist() == [-100.0, -731.0, -150.0, -70.0]
+    assert converted[PAYMENT_AMOUNT_COLUMN].tolist() == [-100.0, -731.0, -150.0, -70.0]
+    assert converted[ORIGINAL_AMOUNT_COLUMN].tolist() == [-100.0, -10.0, -2.0, -1.0]
+    assert converted[ORIGINAL_PAYMENT_AMOUNT_COLUMN].tolist() == [-100.0, -731.0, -2.0, -1.0]
+    assert transactions[AMOUNT_COLUMN].tolist() == [-100.0, -10.0, -2.0, -1.0]
+    # Повторный перевод не меняет уже переведенные суммы
+    assert convert_to_base(converted, rates)[AMOUNT_COLUMN].tolist() == converted[AMOUNT_COLUMN].tolist()
+
+
+def test_table_roundtrip_and_merge(tmp_path: Path, rates: FxRateTable) -> None:
+    """Таблица сохраняется в CSV и читается обратно; при слиянии новый курс заменяет старый."""
+    path = str(tmp_path / 'fx_rates.csv')
+    assert len(FxRateTable.load(path)) == 0
+    rates.save(path)
+    loaded = FxRateTable.load(path)
+    pd.testing.assert_frame_equal(loaded.frame, rates.frame)
+
+    merged = loaded.merge(FxRateTable.from_records([{'date': '2021-01-11', 'currency': 'USD', 'rate': 76.0}]))
+    assert merged.frame['rate'].tolist() == [70.0, 76.0]
+    assert merged.covers('USD', pd.Timestamp('2021-01-08'), pd.Timestamp('2021-01-11 23:00'))
+    assert not merged.covers('USD', pd.Timestamp('2021-01-07'), pd.Timestamp('2021-01-11'))
+
+
+def test_rate_history_is_fetched_once(tmp_path: Path, market_server: StubMarketDataServer,
+                                      transactions: pd.DataFrame) -> None:
+    """Недостающие курсы запрашиваются один раз и дальше читаются из локального файла."""
+    market_server.history = {'2021-01-05': {'USD': 1 / 72}, '2021-01-11': {'USD': 1 / 75}}
+    path = str(tmp_path / 'fx_rates.csv')
+    with market_server.client() as client:
+        table = rate_table_for(transactions, path, client)
+        assert table.currencies == ['USD']
+        assert table.frame['rate'].round(6).tolist() == [72.0, 75.0]
+
+        again = load_rate_table(['USD'], pd.Timestamp('2021-01-05'), pd.Timestamp('2021-01-11'), path, client)
+        assert len(again) == 2
+    assert len(market_server.requests) == 1
+    assert market_server.requests[0].endswith('symbols=USD')
+
+
+def test_rate_table_for_undated_transactions(tmp_path: Path, transactions: pd.DataFrame) -> None:
+    """Без дат операций курсы не запрашиваются, возвращается пустая таблица."""
+    undated = transactions.assign(**{DATE_COLUMN: pd.NaT})
+    table = rate_table_for(undated, str(tmp_path / 'fx_rates.csv'), MarketDataClient(fx_history_url_template=''))
+    assert len(table) == 0
+
+
+def test_fetched_range_counts_as_covered(tmp_path: Path, market_server: StubMarketDataServer) -> None:
+    """Период без котировок на крайние дни (или вовсе без котировок) после запроса не запрашивается снова."""
+    market_server.history = {'2021-01-11': {'USD': 1 / 75}}
+    path = str(tmp_path / 'fx_rates.csv')
+    start, end = pd.Timestamp('2021-01-09'), pd.Timestamp('2021-01-17')
+    with market_server.client() as client:
+        load_rate_table(['USD'], start, end, path, client)
+        market_server.history = {}
+        load_rate_table(['EUR'], start, end, path, client)
+        table = load_rate_table(['USD', 'EUR'], start + pd.Timedelta(days=1), end, path, client)
+    assert len(market_server.requests) == 2
+    assert table.covers('EUR', start, end) and not table.covers('EUR', start - pd.Timedelta(days=1), end)
+    assert (tmp_path / f'fx_rates.csv{FETCHED_SUFFIX}').exists()
+
+    # Неудавшийся запрос не отмечает период: при следующем запуске он повторится
+    with MarketDataClient(fx_history_url_template=f"{market_server.base_url}/missing?symbols={{symbols}}") as client:
+        table = load_rate_table(['GBP'], start, end, path, client)
+    assert not table.covers('GBP', start, end)
+    assert not FxRateTable.load(path).covers('GBP', start, end)
+
+
+def test_fingerprint_tracks_rate_values(rates: FxRateTable) -> None:
+    """Хэш таблицы меняется при исправлении курса, даже если число котировок то же."""
+    corrected = rates.merge(FxRateTable.from_records([{'date': '2021-01-11', 'currency': 'USD', 'rate': 76.0}]))
+    assert len(corrected) == len(rates)
+    assert corrected.fingerprint != rates.fingerprint
+    assert FxRateTable(rates.frame).fingerprint == rates.fingerprint
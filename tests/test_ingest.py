@@ -0,0 +1,101 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.cube import AggregateCube
+from src.fx import FxRateTable
+from src.ingest import MANIFEST_FILE, TransactionLedger, transaction_keys
+from src.schema import normalize_transactions
+
+
+@pytest.fixture
+def exports() -> pd.DataFrame:
+    """Транзакции за три месяца с двумя одинаковыми операциями."""
+    return pd.DataFrame({
+        'Дата операции': ['05.01.2023 10:00:00', '05.01.2023 10:00:00', '20.01.2023 12:00:00',
+                          '03.02.2023 09:00:00', '15.02.2023 18:30:00', '02.03.2023 08:15:00'],
+        'Номер карты': ['*1111', '*1111', '*2222', '*1111', None, '*2222'],
+        'Категория': ['Транспорт', 'Транспорт', 'Еда', 'Еда', 'Связь', 'Еда'],
+        'Описание': ['Метро', 'Метро', 'Магнит', 'Магнит', 'МТС', 'Дикси'],
+        'Сумма операции': [-60.0, -60.0, -500.0, -700.0, -300.0, -250.0],
+        'Сумма платежа': [-60.0, -60.0, -500.0, -700.0, -300.0, -250.0],
+        'Кэшбэк': [None, None, 5.0, 7.0, 3.0, 2.0]
+    })
+
+
+def test_keys_distinguish_repeated_operations(exports: pd.DataFrame) -> None:
+    """Одинаковые операции получают одинаковый хэш и разные номера повторения."""
+    keys = transaction_keys(normalize_transactions(exports))
+    assert keys['_key'].iloc[0] == keys['_key'].iloc[1]
+    assert keys['_occurrence'].tolist()[:3] == [0, 1, 0]
+    assert keys['_key'].nunique() == 5
+
+
+def test_overlapping_exports_are_deduplicated(exports: pd.DataFrame, tmp_path: Path) -> None:
+    """Пересекающиеся выгрузки дают каждую операцию один раз и обновляют только затронутые месяцы."""
+    ledger = TransactionLedger(str(tmp_path / 'ledger'))
+    first = ledger.ingest(exports.iloc[:4])
+    assert first == (4, 0, ['2023-01', '2023-02'])
+
+    january = os.path.getmtime(tmp_path / 'ledger' / 'cube' / '2023-01.feather')
+    second = ledger.ingest(exports.iloc[3:])
+    assert second == (2, 1, ['2023-02', '2023-03'])
+    assert os.path.getmtime(tmp_path / 'ledger' / 'cube' / '2023-01.feather') == january
+
+    reopened = TransactionLedger(str(tmp_path / 'ledger'))
+    assert len(reopened) == 6
+    assert [str(month) for month in reopened.months] == ['2023-01', '2023-02', '2023-03']
+
+    expected = AggregateCube.from_transactions(normalize_transactions(exports))
+    totals = reopened.cube().totals(['Категория'])
+    pd.testing.assert_frame_equal(totals.sort_index(), expected.totals(['Категория']).sort_index())
+    assert reopened.store().frame['Сумма операции'].sum() == exports['Сумма операции'].sum()
+
+
+def test_same_file_is_skipped(exports: pd.DataFrame, tmp_path: Path) -> None:
+    """Повторная загрузка того же файла не читает его и ничего не добавляет."""
+    path = tmp_path / 'operations.xlsx'
+    exports.to_excel(path, index=False)
+    ledger = TransactionLedger(str(tmp_path / 'ledger'))
+
+    assert ledger.ingest(str(path)).added == 6
+    assert ledger.ingest(str(path)) == (0, 0, [])
+    assert len(ledger) == 6
+
+
+def test_failed_manifest_write_keeps_previous_manifest(exports: pd.DataFrame, tmp_path: Path) -> None:
+    """Сбой записи описания хранилища не оставляет временных файлов и не портит прежнее описание."""
+    root = tmp_path / 'ledger'
+    ledger = TransactionLedger(str(root))
+    ledger.ingest(exports.iloc[:2])
+    manifest = (root / MANIFEST_FILE).read_text(encoding='utf-8')
+
+    with patch('src.ingest.json.dump', side_effect=OSError('disk full')), pytest.raises(OSError):
+        ledger.ingest(exports.iloc[2:])
+    assert (root / MANIFEST_FILE).read_text(encoding='utf-8') == manifest
+    assert [name for name in os.listdir(root) if MANIFEST_FILE in name] == [MANIFEST_FILE]
+
+
+def test_amounts_are_converted_and_modes_not_mixed(exports: pd.DataFrame, tmp_path: Path) -> None:
+    """Суммы в валюте переводятся в рубли при загрузке; хранилище не смешивает переведенные и исходные суммы."""
+    foreign = exports.assign(**{'Валюта операции': ['RUB'] * 5 + ['USD'], 'Валюта платежа': ['RUB'] * 5 + ['USD']})
+    rates = FxRateTable.from_records([{'date': '2023-01-01', 'currency': 'USD', 'rate': 80.0}])
+    ledger = TransactionLedger(str(tmp_path / 'ledger'), rates=rates)
+    ledger.ingest(foreign)
+
+    march = ledger.month_frame('2023-03')
+    assert march['Сумма операции'].tolist() == [-20000.0]
+    assert march['Сумма операции в валюте операции'].tolist() == [-250.0]
+    assert ledger.cube().totals(['Категория']).loc['Еда', 'Сумма операции'] == -21200.0
+
+    # Переданная пустая таблица курсов используется как есть, без загрузки курсов
+    with patch('src.ingest.rate_table_for', side_effect=AssertionError):
+        TransactionLedger(str(tmp_path / 'rub'), rates=FxRateTable.from_records([])).ingest(exports)
+
+    with pytest.raises(ValueError):
+        TransactionLedger(str(tmp_path / 'ledger'), base_currency=None).ingest(exports)
+    with pytest.raises(ValueError):
+        TransactionLedger(str(tmp_path / 'ledger'), base_currency='USD').ingest(exports)
@@ -0,0 +1,99 @@
+from pathlib import Path
+from typing import List
+
+from src.market_cache import MarketDataCache, MemoryBackend, SQLiteBackend
+from tests.conftest import StubMarketDataServer
+
+
+class FakeClock:
+    """Управляемые часы для проверки TTL."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_fresh_stale_and_expired_entries() -> None:
+    """Свежая запись отдается из кэша, устаревшая — сразу с фоновым обновлением, просроченная — запрашивается."""
+    clock = FakeClock()
+    cache = MarketDataCache(default_ttl=10, ttls={'stock:AAPL': 1}, max_stale=100, clock=clock)
+    calls: List[str] = []
+
+    def fetch() -> dict:
+        calls.append('fetch')
+        return {'price': len(calls)}
+
+    assert cache.get_or_fetch('fx', fetch) == {'price': 1}
+    clock.now += 5
+    assert cache.get_or_fetch('fx', fetch) == {'price': 1}
+    assert calls == ['fetch']
+
+    clock.now += 10
+    assert cache.get_or_fetch('fx', fetch) == {'price': 1}
+    cache.wait_for_refreshes(timeout=5)
+    assert cache.get_or_fetch('fx', fetch) == {'price': 2}
+
+    clock.now += 1000
+    assert cache.get_or_fetch('fx', fetch) == {'price': 3}
+
+    assert cache.ttl_for('stock:AAPL') == 1
+    assert cache.ttl_for('stock:GOOGL') == 10
+    cache.close()
+
+
+def test_failed_fetch_is_not_cached() -> None:
+    """Неудачный результат не сохраняется, устаревшее значение при ошибке обновления сохраняется."""
+    clock = FakeClock()
+    cache = MarketDataCache(default_ttl=1, max_stale=100, clock=clock)
+    assert cache.get_or_fetch('fx', lambda: None) is None
+    assert cache.get_or_fetch('fx', lambda: {'USD': 1.0}) == {'USD': 1.0}
+
+    clock.now += 2
+    assert cache.get_or_fetch('fx', lambda: None) == {'USD': 1.0}
+    cache.wait_for_refreshes(timeout=5)
+    assert cache.get_or_fetch('fx', lambda: None) == {'USD': 1.0}
+    cache.close()
+
+
+def test_memory_backend_evicts_least_recently_used() -> None:
+    """При переполнении вытесняется давно не использованная запись."""
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', 1, 0.0)
+    backend.set('b', 2, 0.0)
+    backend.get('a')
+    backend.set('c', 3, 0.0)
+
+    assert backend.get('b') is None
+    assert backend.get('a') == (1, 0.0)
+    assert len(backend) == 2
+
+
+def test_sqlite_backend_is_shared(tmp_path: Path) -> None:
+    """Записи в SQLite видны другим экземплярам (например, другим процессам)."""
+    path = str(tmp_path / "market.sqlite")
+    first = SQLiteBackend(path, max_entries=2)
+    second = SQLiteBackend(path, max_entries=2)
+
+    first.set('fx', {'USD': 74.3}, 10.0)
+    assert second.get('fx') == ({'USD': 74.3}, 10.0)
+
+    first.set('stock:AAPL', {'price': 150}, 11.0)
+    first.set('stock:GOOGL', {'price': 2800}, 12.0)
+    assert second.get('fx') is None
+
+
+def test_client_uses_cache(market_server: StubMarketDataServer) -> None:
+    """Повторные запросы клиента с кэшем не обращаются к серверу."""
+    market_server.prices = {'AAPL': 150}
+    cache = MarketDataCache(default_ttl=60)
+
+    with market_server.client(cache=cache) as client:
+        for _ in range(3):
+            rates, prices = client.get_market_data(['AAPL'])
+
+    assert prices == [{"stock": "AAPL", "price": 150}]
+    assert rates == [{"currency": "USD", "rate": 74.3}, {"currency": "EUR", "rate": 88.7}]
+    assert sorted(market_server.requests) == ['/latest', '/stocks/AAPL']
+    cache.close()
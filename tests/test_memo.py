@@ -0,0 +1,81 @@
+from typing import List
+
+import pandas as pd
+
+from src.memo import UniqueValueMemo, apply_over_uniques
+from src.schema import normalize_transactions
+from src.services import simple_search
+
+
+def test_apply_over_uniques_computes_each_value_once() -> None:
+    """Функция вызывается один раз на уникальное значение, в том числе между вызовами."""
+    memo = UniqueValueMemo()
+    calls: List[str] = []
+
+    def length(value: str) -> int:
+        calls.append(value)
+        return len(value)
+
+    values = pd.Series(['Магнит', None, 'Пятерочка', 'Магнит'], index=[5, 6, 7, 8])
+    result = apply_over_uniques(values, length, 'length', na_value=-1, memo=memo)
+    apply_over_uniques(values, length, 'length', na_value=-1, memo=memo)
+
+    assert list(result.index) == [5, 6, 7, 8]
+    assert list(result) == [6, -1, 9, 6]
+    assert calls == ['Магнит', 'Пятерочка']
+
+
+def test_apply_over_uniques_uses_categorical_codes() -> None:
+    """Для категориального столбца используются его категории."""
+    memo = UniqueValueMemo()
+    values = pd.Series(['b', 'a', None, 'b'], dtype='category')
+
+    result = apply_over_uniques(values, str.upper, 'upper', memo=memo)
+
+    assert list(result) == ['B', 'A', None, 'B']
+    assert len(memo) == 2
+
+
+def test_apply_over_uniques_keeps_sequence_results() -> None:
+    """Кортежи и списки в результатах остаются значениями ячеек, числа сохраняют тип."""
+    values = pd.Series(['a', 'b', 'a', None])
+    pairs = apply_over_uniques(values, lambda value: (value, 1), 'pair', memo=UniqueValueMemo())
+    assert pairs.tolist() == [('a', 1), ('b', 1), ('a', 1), None]
+    lists = apply_over_uniques(values, lambda value: [value], 'list', memo=UniqueValueMemo())
+    assert lists.tolist() == [['a'], ['b'], ['a'], None]
+    lengths = apply_over_uniques(values, len, 'len', na_value=0, memo=UniqueValueMemo())
+    assert lengths.dtype == 'int64' and lengths.tolist() == [1, 1, 1, 0]
+
+
+def test_memo_evicts_least_recently_used() -> None:
+    """Кэш ограничен по размеру и вытесняет давно не использованные записи."""
+    memo = UniqueValueMemo(max_entries=2)
+    memo.get_or_compute('key', 'a', str.upper)
+    memo.get_or_compute('key', 'b', str.upper)
+    memo.get_or_compute('key', 'a', str.upper)
+    memo.get_or_compute('key', 'c', str.upper)
+
+    calls: List[str] = []
+
+    def record(value: str) -> str:
+        calls.append(value)
+        return value
+
+    memo.get_or_compute('key', 'a', record)
+    memo.get_or_compute('key', 'b', record)
+
+    assert calls == ['b']
+
+
+def test_simple_search_on_normalized_frame() -> None:
+    """Поиск дает одинаковый результат для исходного и нормализованного DataFrame."""
+    transactions = pd.DataFrame({
+        'Категория': ['Супермаркеты', 'Связь', 'Супермаркеты', None],
+        'Описание': ['Магнит', 'МТС', 'магнит у дома', 'Перевод'],
+        'Сумма операции': [-100.0, -200.0, -300.0, -400.0]
+    })
+
+    expected = [txn['Описание'] for txn in simple_search(transactions, 'МАГНИТ')]
+    normalized = [txn['Описание'] for txn in simple_search(normalize_transactions(transactions), 'МАГНИТ')]
+
+    assert expected == normalized == ['Магнит', 'магнит у дома']
@@ -0,0 +1,104 @@
+import json
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+import pytest
+
+from src import metrics
+from src.metrics import MetricsRegistry, span, timed
+from src.store import TransactionStore, select_range
+
+
+@pytest.fixture
+def enabled() -> Iterator[MetricsRegistry]:
+    """Включает сбор метрик в чистом общем реестре."""
+    metrics.REGISTRY.reset()
+    metrics.enable()
+    yield metrics.REGISTRY
+    metrics.disable()
+    metrics.REGISTRY.reset()
+
+
+def test_disabled_records_nothing() -> None:
+    """При выключенном сборе метрик span и timed ничего не записывают."""
+    metrics.REGISTRY.reset()
+
+    @timed('aggregate')
+    def double(values: list) -> list:
+        return values * 2
+
+    with span('filter') as stage:
+        stage.rows = 10
+    assert double([1]) == [1, 1]
+    assert metrics.REGISTRY.snapshot() == {}
+
+
+def test_timed_and_span_record_stages(enabled: MetricsRegistry) -> None:
+    """Вызовы, ошибки и число строк учитываются по стадиям."""
+    transactions = pd.DataFrame({
+        'Дата операции': pd.to_datetime(['2023-01-05', '2023-02-10', '2023-03-15']),
+        'Сумма операции': [-100.0, -200.0, -300.0]
+    })
+    select_range(transactions, '2023-02-01', '2023-03-31')
+    TransactionStore(transactions).range('2023-01-01', '2023-01-31')
+
+    @timed('fetch', rows=None)
+    def failing() -> None:
+        raise ValueError("нет ответа")
+
+    with pytest.raises(ValueError):
+        failing()
+
+    snapshot = enabled.snapshot()
+    assert snapshot['filter']['count'] == 2
+    assert snapshot['filter']['rows'] == 3
+    assert snapshot['fetch']['errors'] == 1
+    assert sum(snapshot['filter']['buckets'].values()) == 2
+    assert {function: values['rows'] for function, values in snapshot['filter']['functions'].items()} == {
+        'select_range': 2, 'TransactionStore.range': 1}
+    assert list(snapshot['fetch']['functions']) == ['test_timed_and_span_record_stages.<locals>.failing']
+
+
+def test_nested_calls_of_same_stage_are_recorded_once(enabled: MetricsRegistry) -> None:
+    """Вложенный вызов той же стадии не учитывается повторно, вызов другой стадии учитывается."""
+    store = TransactionStore(pd.DataFrame({
+        'Дата операции': pd.to_datetime(['2023-01-05', '2023-02-10', '2023-03-15']),
+        'Сумма операции': [-100.0, -200.0, -300.0]
+    }))
+
+    @timed('filter')
+    def outer() -> pd.DataFrame:
+        with span('aggregate', function='inner'):
+            pass
+        return store.range('2023-01-01', '2023-02-28')
+
+    outer()
+    snapshot = enabled.snapshot()
+    assert snapshot['filter']['count'] == 1
+    assert [function.rsplit('.', 1)[-1] for function in snapshot['filter']['functions']] == ['outer']
+    assert snapshot['aggregate']['functions']['inner']['count'] == 1
+
+    store.range('2023-01-01', '2023-02-28')
+    assert enabled.snapshot()['filter']['count'] == 2
+
+
+def test_dump_json_and_prometheus(tmp_path: Path) -> None:
+    """Снимок выгружается в JSON и в текстовом формате Prometheus."""
+    registry = MetricsRegistry(buckets=(0.1, float('inf')))
+    registry.record('load', 0.05, rows=100, function='load_transactions')
+    registry.record('load', 0.5, rows=50, function='TransactionLedger.ingest')
+
+    json_path = tmp_path / 'metrics.json'
+    registry.dump(str(json_path))
+    loaded = json.loads(json_path.read_text(encoding='utf-8'))
+    assert loaded['load']['count'] == 2
+    assert loaded['load']['rows'] == 150
+    assert loaded['load']['buckets'] == {'0.1': 1, '+Inf': 1}
+    assert loaded['load']['functions']['load_transactions']['rows'] == 100
+
+    text = registry.to_prometheus()
+    assert 'finanalyzer_stage_seconds_bucket{stage="load",function="load_transactions",le="0.1"} 1' in text
+    assert 'finanalyzer_stage_seconds_bucket{stage="load",function="TransactionLedger.ingest",le="+Inf"} 1' in text
+    assert 'finanalyzer_stage_seconds_count{stage="load",function="load_transactions"} 1' in text
+    assert 'finanalyzer_stage_rows_total{stage="load",function="TransactionLedger.ingest"} 50' in text
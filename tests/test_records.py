@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.records import TransactionRecords
+from src.server import _plain
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    """Транзакции с датами, суммами и категориальным столбцом."""
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(pd.Series(['2021-01-01 10:00', '2021-01-02 11:00', None, '2021-01-04 13:00'])),
+        'Сумма операции': [-100.5, -20.0, np.nan, 300.0],
+        'Категория': pd.Categorical(['Еда', 'Такси', 'Еда', None]),
+        'Описание': ['Кафе', 'Такси', 'Магнит', 'Перевод'],
+    })
+
+
+def test_rows_match_to_dict_records(frame: pd.DataFrame) -> None:
+    """Строки совпадают с to_dict('records') по значениям и типам."""
+    records = TransactionRecords.from_frame(frame)
+    expected = frame.to_dict('records')
+    assert len(records) == 4
+    assert records.columns == list(frame.columns)
+    for row, expected_row in zip(records, expected):
+        assert list(row) == list(expected_row)
+        for key, value in row.items():
+            assert type(value) is type(expected_row[key])
+    assert records[0] == expected[0]
+    assert records[-1] == expected[-1]
+    with pytest.raises(IndexError):
+        _ = records[4]
+
+
+def test_slice_shares_column_buffers(frame: pd.DataFrame) -> None:
+    """Срез не копирует массивы столбцов."""
+    records = TransactionRecords.from_frame(frame)
+    page = records[1:3]
+    assert isinstance(page, TransactionRecords)
+    assert [row['Описание'] for row in page] == ['Такси', 'Магнит']
+    amounts = page.column('Сумма операции')
+    assert isinstance(amounts, np.ndarray)
+    assert np.shares_memory(amounts, frame['Сумма операции'].to_numpy())
+    assert [row['Описание'] for row in records[::-2]] == ['Перевод', 'Такси']
+
+
+def test_sequence_behaviour_and_json(frame: pd.DataFrame) -> None:
+    """Последовательность сравнивается со списком словарей и сериализуется в JSON."""
+    records = TransactionRecords.from_frame(frame[['Описание', 'Сумма операции']].iloc[:2])
+    assert records == [{'Описание': 'Кафе', 'Сумма операции': -100.5}, {'Описание': 'Такси', 'Сумма операции': -20.0}]
+    assert TransactionRecords.from_records(records.to_list()) == records
+    assert records.to_frame().equals(frame[['Описание', 'Сумма операции']].iloc[:2].reset_index(drop=True))
+
+    dates = TransactionRecords.from_frame(frame).select(['Дата операции'])
+    expected = [{'Дата операции': '2021-01-01T10:00:00'}, {'Дата операции': '2021-01-02T11:00:00'},
+                {'Дата операции': None}, {'Дата операции': '2021-01-04T13:00:00'}]
+    assert json.loads(dates.to_json()) == expected
+    assert json.loads(json.dumps(_plain(dates))) == expected
+    assert json.loads(TransactionRecords.from_frame(frame).to_json())[2] == {
+        'Дата операции': None, 'Сумма операции': None, 'Категория': 'Еда', 'Описание': 'Магнит'}
+
+
+def test_equality_treats_missing_values_as_equal(frame: pd.DataFrame) -> None:
+    """Пропуски (NaN, NaT) не делают последовательность неравной самой себе и своей копии."""
+    records = TransactionRecords.from_frame(pd.DataFrame({'a': [1.0, np.nan]}))
+    assert records == records
+    assert records == records.to_list()
+    assert records != [{'a': 1.0}, {'a': 2.0}]
+    assert records != [{'b': 1.0}, {'b': np.nan}]
+
+    full = TransactionRecords.from_frame(frame)
+    assert full == TransactionRecords.from_records(full.to_list())
+    assert full[1:] != full[:-1]
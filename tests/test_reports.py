@@ -1,9 +1,11 @@
+from pathlib import Path
 from typing import Any
 from unittest.mock import patch
 
 import pandas as pd
 import pytest
 
+from src.report_sink import ReportSink
 from src.reports import save_report, spending_by_category
 
 
@@ -19,12 +21,10 @@ def transactions_mock() -> pd.DataFrame:
     return pd.DataFrame(data)
 
 
-@patch("src.reports.pd.DataFrame.to_csv")
-@patch("src.reports.os.makedirs")
 @patch("src.reports.ensure_datetime_column")
 @patch("src.reports.get_last_three_months_range", autospec=True)
 def test_spending_by_category(mock_get_last_three_months_range: Any, mock_ensure_datetime_column: Any,
-                              mock_makedirs: Any, mock_to_csv: Any, transactions_mock: pd.DataFrame) -> None:
+                              transactions_mock: pd.DataFrame) -> None:
     """Тестирование функции spending_by_category."""
 
     # Мок возвращает кортеж с двумя датами
@@ -50,19 +50,82 @@ def test_spending_by_category(mock_get_last_three_months_range: Any, mock_ensure
     assert all(result['Дата операции'].apply(lambda x: isinstance(x, pd.Timestamp)))
 
 
-@patch("src.reports.pd.DataFrame.to_csv")
-@patch("src.reports.os.makedirs")
-@patch("src.reports.pd.Timestamp.now")
-def test_save_report_decorator(mock_now: Any, mock_makedirs: Any, mock_to_csv: Any) -> None:
+def test_save_report_decorator(tmp_path: Path) -> None:
     """Тестирование сохранения файла через декоратор save_report."""
-    # Mock the current time
-    mock_now.return_value = pd.Timestamp("2023-12-27")
+    sink = ReportSink(str(tmp_path))
 
-    # Define a dummy function wrapped with the save_report decorator
     def dummy_function() -> pd.DataFrame:
         return pd.DataFrame({"test": [1, 2, 3]})
 
-    wrapped_func = save_report("test.csv")(dummy_function)
+    wrapped_func = save_report("test.csv", sink=sink)(dummy_function)
     wrapped_func()
+    sink.flush()
 
-    mock_to_csv.assert_called_once_with("../data/reports\\test.csv", index=False)
+    assert pd.read_csv(tmp_path / "test.csv")["test"].tolist() == [1, 2, 3]
+
+
+def test_save_report_can_be_skipped(tmp_path: Path) -> None:
+    """При save=False отчет возвращается без записи в файл."""
+    sink = ReportSink(str(tmp_path), asynchronous=False)
+
+    @save_report("skipped.csv", sink=sink)
+    def dummy_report(value: int) -> pd.DataFrame:
+        return pd.DataFrame({"test": [value]})
+
+    assert dummy_report(1, save=False)["test"].tolist() == [1]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_save_report_unique_name_per_call(tmp_path: Path) -> None:
+    """Без имени файла каждый вызов сохраняет отчет в новый файл."""
+    sink = ReportSink(str(tmp_path), fmt='csv.gz')
+
+    @save_report(sink=sink)
+    def dummy_report() -> pd.DataFrame:
+        return pd.DataFrame({"test": [1, 2, 3]})
+
+    dummy_report()
+    dummy_report()
+    sink.close()
+
+    files = sorted(tmp_path.iterdir())
+    assert len(files) == 2
+    assert all(path.name.startswith("dummy_report_") and path.name.endswith(".csv.gz") for path in files)
+    assert pd.read_csv(files[0])["test"].tolist() == [1, 2, 3]
+
+
+def test_report_sink_queues_snapshot(tmp_path: Path) -> None:
+    """Изменение отчета после submit не попадает в файл, записываемый в фоне."""
+    sink = ReportSink(str(tmp_path))
+    report = pd.DataFrame({"test": [1, 2, 3]})
+
+    with patch.object(ReportSink, "_write", wraps=sink._write) as write:
+        sink.submit(report, "snapshot.csv")
+        report.loc[:, "test"] = 0
+        sink.flush()
+
+    assert write.call_args.args[0] is not report
+    assert pd.read_csv(tmp_path / "snapshot.csv")["test"].tolist() == [1, 2, 3]
+
+
+def test_report_sink_write_is_atomic_and_logs_errors(tmp_path: Path) -> None:
+    """Неудачная запись не оставляет файлов и не прерывает вызывающий код."""
+    sink = ReportSink(str(tmp_path), asynchronous=False)
+
+    with patch("src.report_sink.pd.DataFrame.to_csv", side_effect=OSError("disk full")):
+        assert sink.submit(pd.DataFrame({"test": [1]}), "broken.csv").result() is None
+    assert list(tmp_path.iterdir()) == []
+
+    assert sink.submit(pd.DataFrame({"test": [1]}), "ok.csv").result() == str(tmp_path / "ok.csv")
+    assert [path.name for path in tmp_path.iterdir()] == ["ok.csv"]
+
+
+def test_report_sink_parquet(tmp_path: Path) -> None:
+    """Отчет сохраняется в Parquet."""
+    pytest.importorskip("pyarrow")
+    sink = ReportSink(str(tmp_path), fmt="parquet", asynchronous=False)
+
+    path = sink.submit(pd.DataFrame({"test": [1, 2]}), sink.unique_name("report")).result()
+
+    assert path is not None and path.endswith(".parquet")
+    assert pd.read_parquet(path)["test"].tolist() == [1, 2]
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.rolling import RollingReportEngine
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    """Транзакции за полгода, по несколько в день."""
+    rng = np.random.default_rng(0)
+    size = 2000
+    dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 180 * 24 * 60, size), unit='min')
+    return pd.DataFrame({
+        'Дата операции': dates.strftime('%d.%m.%Y %H:%M:%S'),
+        'Категория': rng.choice(['Еда', 'Транспорт', 'Связь'], size),
+        'Сумма операции': rng.integers(-5000, 0, size).astype(float)
+    })
+
+
+def _expected(transactions: pd.DataFrame, date: str) -> pd.DataFrame:
+    # Транзакции окна, посчитанные напрямую по строкам
+    dates = pd.to_datetime(transactions['Дата операции'], format='%d.%m.%Y %H:%M:%S').dt.normalize()
+    end = pd.Timestamp(date)
+    window = transactions[(dates >= end - pd.DateOffset(months=3)) & (dates <= end)]
+    return window.assign(dates=dates[window.index])
+
+
+def test_sliding_window_matches_full_recomputation(transactions: pd.DataFrame) -> None:
+    """Отчеты после ежедневного сдвига окна совпадают с расчетом по строкам."""
+    engine = RollingReportEngine(transactions)
+
+    for date in ['2023-04-10', '2023-04-11', '2023-04-12', '2023-05-30', '2023-03-01']:
+        engine.advance(date)
+        window = _expected(transactions, date)
+
+        categories = engine.category_report()
+        expected_sums = window.groupby('Категория')['Сумма операции'].sum()
+        assert list(categories['Категория']) == list(expected_sums.index)
+        assert np.allclose(categories['Сумма операции'], expected_sums.to_numpy())
+        assert list(categories['Количество операций']) == list(window.groupby('Категория').size())
+
+        weekday = engine.weekday_report()
+        expected_weekday = window.groupby(window['dates'].dt.day_name())['Сумма операции'].mean()
+        assert np.allclose(weekday.set_index('День недели')['Сумма операции'].sort_index(),
+                           expected_weekday.sort_index())
+
+        workday = engine.workday_report()
+        day_type = np.where(window['dates'].dt.dayofweek < 5, 'Рабочий день', 'Выходной день')
+        expected_workday = window.groupby(day_type)['Сумма операции'].mean()
+        assert list(workday['Тип дня']) == list(expected_workday.index)
+        assert np.allclose(workday['Сумма операции'], expected_workday.to_numpy())
+
+
+def test_add_updates_current_window() -> None:
+    """Транзакции нового дня сразу учитываются в текущем окне."""
+    engine = RollingReportEngine(pd.DataFrame({
+        'Дата операции': ['02.01.2023 10:00:00', '03.01.2023 11:00:00'],
+        'Категория': ['Еда', 'Еда'],
+        'Сумма операции': [-100.0, -200.0]
+    }))
+    assert engine.advance('2023-01-05') == (pd.Timestamp('2022-10-05'), pd.Timestamp('2023-01-05'))
+    assert engine.category_total('Еда') == (-300.0, 2)
+
+    engine.add(pd.DataFrame({
+        'Дата операции': ['05.01.2023 09:00:00', '01.09.2022 09:00:00'],
+        'Категория': ['Связь', 'Еда'],
+        'Сумма операции': [-50.0, -1000.0]
+    }))
+
+    assert engine.category_total('Еда') == (-300.0, 2)
+    assert engine.category_total('Связь') == (-50.0, 1)
+    assert engine.window == (pd.Timestamp('2022-10-05'), pd.Timestamp('2023-01-05'))
+
+    engine.advance('2022-12-01')
+    assert engine.category_total('Еда') == (-1000.0, 1)
+    assert engine.category_total('Связь') == (0.0, 0)
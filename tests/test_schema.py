@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.reports import spending_by_weekday, spending_by_workday
+from src.schema import as_datetime, is_normalized, normalize_transactions
+from src.services import analyze_cashback_categories
+
+
+def raw_transactions() -> pd.DataFrame:
+    """Сырые данные в формате выгрузки."""
+    return pd.DataFrame({
+        'Дата операции': ['01.01.2023 12:00:00', '16.01.2023 15:30:00', '04.02.2023 18:00:00'],
+        'Дата платежа': ['01.01.2023', '16.01.2023', '04.02.2023'],
+        'Номер карты': ['*7197', '*7197', '*4556'],
+        'Категория': ['Еда', 'Транспорт', 'Еда'],
+        'Описание': ['Ресторан', 'Такси', 'Супермаркет'],
+        'Сумма операции': [500, 300, 800],
+        'Кэшбэк': [50, 20, None]
+    })
+
+
+# Тест приведения к схеме
+def test_normalize_transactions() -> None:
+    """Даты разбираются по формату, строки становятся категориями, суммы — float64."""
+    raw = raw_transactions()
+    df = normalize_transactions(raw)
+
+    assert is_normalized(df)
+    assert not is_normalized(raw)
+    assert df['Дата операции'].iloc[1] == pd.Timestamp('2023-01-16 15:30:00')
+    assert df['Дата платежа'].iloc[2] == pd.Timestamp('2023-02-04')
+    for column in ('Категория', 'Описание', 'Номер карты'):
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+    assert df['Сумма операции'].dtype == 'float64'
+    assert df['Кэшбэк'].dtype == 'float64'
+
+
+# Тест повторного разбора дат
+def test_as_datetime_skips_parsed_column() -> None:
+    """Уже разобранный столбец не разбирается повторно, а нестандартный формат все равно распознается."""
+    df = normalize_transactions(raw_transactions())
+    with patch("src.schema.pd.to_datetime") as mock_to_datetime:
+        assert as_datetime(df['Дата операции']) is df['Дата операции']
+        mock_to_datetime.assert_not_called()
+
+    parsed = as_datetime(pd.Series(['2023-01-01', '15.01.2023 15:30:00', None]))
+    assert parsed.iloc[0] == pd.Timestamp('2023-01-01')
+    assert parsed.iloc[1] == pd.Timestamp('2023-01-15 15:30:00')
+    assert pd.isna(parsed.iloc[2])
+
+    # Запасной разбор всегда читает день перед месяцем, независимо от значения дня
+    parsed = as_datetime(pd.Series(['05.06.2021', '13.06.2021', '2021-06-05']))
+    assert parsed.tolist() == [pd.Timestamp('2021-06-05'), pd.Timestamp('2021-06-13'), pd.Timestamp('2021-06-05')]
+
+
+# Тест потребителей нормализованных данных
+def test_consumers_accept_normalized_frame() -> None:
+    """Функции анализа дают одинаковый результат для сырых и нормализованных данных и не меняют вход."""
+    raw = raw_transactions()
+    df = normalize_transactions(raw)
+
+    assert analyze_cashback_categories(df, year=2023, month=1) == analyze_cashback_categories(raw, year=2023, month=1)
+    assert raw['Дата операции'].dtype == object
+
+    weekday = spending_by_weekday(df, date='2023-02-10')
+    assert set(weekday['День недели']) == {'Sunday', 'Monday', 'Saturday'}
+    workday = spending_by_workday(df, date='2023-02-10')
+    expected = {'Рабочий день': 300.0, 'Выходной день': 650.0}
+    assert dict(zip(workday['Тип дня'], workday['Сумма операции'])) == expected
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from src.schema import normalize_transactions
+from src.search_index import SearchIndex
+from src.services import simple_search
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    """Транзакции с повторяющимися описаниями."""
+    return normalize_transactions(pd.DataFrame({
+        'Дата операции': ['01.01.2023 12:00:00'] * 6,
+        'Категория': ['Кафе', 'Супермаркеты', 'Кафе', 'Переводы', 'Супермаркеты', None],
+        'Описание': ['Кофейня', 'Магнит', 'Кофейня', 'Иван И.', 'Пятёрочка', 'Магнитола'],
+        'Сумма операции': [-100.0, -200.0, -150.0, -1000.0, -300.0, -50.0]
+    }))
+
+
+@pytest.mark.parametrize("query", ["кафе", "МАГНИТ", "ко", "ё", "рочк", "отсутствует", "", "и.", "магнит.*"])
+def test_index_matches_full_scan(transactions: pd.DataFrame, query: str) -> None:
+    """Результаты поиска по индексу совпадают с поиском полным просмотром."""
+    index = SearchIndex(transactions)
+    assert simple_search(index, query) == simple_search(transactions, query)
+
+
+def test_search_pages_and_total(transactions: pd.DataFrame) -> None:
+    """Поиск возвращает страницу результатов и общее число совпадений."""
+    index = SearchIndex(transactions)
+
+    first = index.search("а", page=1, page_size=2)
+    second = index.search("а", page=2, page_size=2)
+
+    assert first.total == second.total == 6
+    assert [item['Описание'] for item in first.items] == ['Кофейня', 'Магнит']
+    assert [item['Описание'] for item in second.items] == ['Кофейня', 'Иван И.']
+    assert index.search("а", page=4, page_size=2).items == []
+
+
+def test_prefix_search(transactions: pd.DataFrame) -> None:
+    """Поиск по началу строки не находит совпадения в середине."""
+    index = SearchIndex(transactions)
+    assert list(index.find("магнит", prefix=True)) == [1, 5]
+    assert list(index.find("нит", prefix=True)) == []
+
+
+def test_incremental_add(transactions: pd.DataFrame) -> None:
+    """Новые транзакции добавляются в индекс без перестроения."""
+    index = SearchIndex(transactions.iloc[:3])
+    index.add(transactions.iloc[3:])
+
+    assert len(index) == 6
+    result = index.search("магнит")
+    assert result.total == 2
+    assert [item['Сумма операции'] for item in result.items] == [-200.0, -50.0]
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Iterator, Tuple
+from unittest.mock import MagicMock
+from urllib.parse import quote
+
+import pandas as pd
+import pytest
+
+from src.server import AnalyticsServer, WarmDataset, serve
+from src.utils import load_transactions
+
+
+def _write_operations(path: Path, amounts: list) -> None:
+    pd.DataFrame({
+        'Дата операции': ['05.06.2021 10:00:00', '12.06.2021 12:30:00', '20.06.2021 18:00:00'][:len(amounts)],
+        'Номер карты': ['*1111'] * len(amounts),
+        'Категория': ['Супермаркеты', 'Фастфуд', 'Супермаркеты'][:len(amounts)],
+        'Описание': ['Магнит', 'KFC', 'Пятерочка'][:len(amounts)],
+        'Сумма операции': amounts,
+        'Сумма платежа': amounts,
+        'Кэшбэк': [1.0, None, 3.0][:len(amounts)]
+    }).to_excel(path, index=False)
+
+
+@pytest.fixture
+def service(tmp_path: Path) -> Iterator[Tuple[AnalyticsServer, Path]]:
+    """Сервис на свободном порту над небольшим файлом операций."""
+    path = tmp_path / 'operations.xlsx'
+    _write_operations(path, [-100.0, -200.0, -300.0])
+    dataset = WarmDataset(str(path), lambda file: load_transactions(file, use_cache=False), reload_interval=60)
+    client = MagicMock()
+    client.get_currency_rates.return_value = [{'currency': 'USD', 'rate': 75.0}]
+    client.submit_stock_prices.return_value = []
+    server = serve(dataset, port=0, client=client)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, path
+    server.shutdown()
+    server.server_close()
+    dataset.stop()
+
+
+def _get(server: AnalyticsServer, path: str) -> Any:
+    host, port = server.server_address[:2]
+    with urllib.request.urlopen(f"http://{host!s}:{port}{path}") as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def test_endpoints(service: Tuple[AnalyticsServer, Path]) -> None:
+    """Эндпоинты отвечают по загруженным в память данным."""
+    server, _ = service
+    assert _get(server, '/health')['transactions'] == 3
+    assert _get(server, '/cashback?year=2021&month=6') == {'Супермаркеты': 4.0, 'Фастфуд': 0.0}
+    assert _get(server, '/cashback?start=2021-06-10&end=2021-06-30') == {'Супермаркеты': 3.0, 'Фастфуд': 0.0}
+
+    found = _get(server, '/search?q=' + quote('магнит'))
+    assert [item['Описание'] for item in found] == ['Магнит']
+    assert found[0]['Кэшбэк'] == 1.0
+
+    report = _get(server, '/reports/category?date=2021-06-30&category=' + quote('Супермаркеты'))
+    assert [row['Сумма операции'] for row in report] == [-100.0, -300.0]
+    assert [row['День недели'] for row in _get(server, '/reports/weekday?date=2021-06-30')] == ['Saturday', 'Sunday']
+
+    page = _get(server, '/main?time=2021-06-30%2009:00:00')
+    assert page['greeting'] == 'Доброе утро'
+    assert page['currency_rates'] == [{'currency': 'USD', 'rate': 75.0}]
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        _get(server, '/cashback?year=2021')
+    assert error.value.code == 400
+
+
+def test_reload_on_file_change(service: Tuple[AnalyticsServer, Path]) -> None:
+    """После изменения файла данные перезагружаются, до изменения — нет."""
+    server, path = service
+    assert not server.dataset.reload_if_changed()
+
+    _write_operations(path, [-100.0, -200.0])
+    os.utime(path, ns=(0, 10 ** 18))
+    assert server.dataset.reload_if_changed()
+    assert _get(server, '/health')['transactions'] == 2
+
+
+def test_dataset_converts_amounts_to_base_currency(tmp_path: Path) -> None:
+    """Снимок данных сервиса хранит суммы в базовой валюте по локальной таблице курсов."""
+    path = tmp_path / 'operations.xlsx'
+    pd.DataFrame({
+        'Дата операции': ['05.06.2021 10:00:00', '12.06.2021 12:30:00'],
+        'Номер карты': ['*1111', '*1111'],
+        'Категория': ['Супермаркеты', 'Фастфуд'],
+        'Описание': ['Магнит', 'KFC'],
+        'Сумма операции': [-100.0, -2.0],
+        'Валюта операции': ['RUB', 'EUR'],
+        'Сумма платежа': [-100.0, -2.0],
+        'Валюта платежа': ['RUB', 'EUR'],
+        'Кэшбэк': [1.0, None],
+    }).to_excel(path, index=False)
+    rates_path = tmp_path / 'fx_rates.csv'
+    rates_path.write_text('date,currency,rate\n2021-06-01,EUR,90.0\n2021-06-30,EUR,91.0\n', encoding='utf-8')
+
+    dataset = WarmDataset(str(path), lambda file: load_transactions(file, use_cache=False), reload_interval=60,
+                          rates_path=str(rates_path))
+    assert dataset.snapshot.frame['Сумма операции'].tolist() == [-100.0, -180.0]
+    assert dataset.snapshot.cube.totals(['Категория']).loc['Фастфуд', 'Сумма операции'] == -180.0
@@ -4,8 +4,9 @@ from unittest.mock import patch
 import pandas as pd
 import pytest
 
-from src.services import (analyze_cashback_categories, investment_bank, search_personal_transfers,
-                          search_phone_numbers, simple_search)
+from src.records import TransactionRecords
+from src.services import (analyze_cashback_categories, investment_bank, investment_bank_table,
+                          search_personal_transfers, search_phone_numbers, simple_search)
 
 
 @pytest.fixture
@@ -52,24 +53,35 @@ def test_investment_bank() -> None:
     assert result == 98  # (100 - 12) + (100 - 90)
 
 
-@patch("src.services.pd.DataFrame.to_dict")
-def test_simple_search(mock_to_dict: Any, transactions_mock: pd.DataFrame) -> None:
-    """Тестирование simple_search с mock."""
-    mock_to_dict.return_value = [
-        {'Дата операции': '2023-01-01', 'Описание': 'Кафе', 'Категория': 'Еда'}
-    ]
+def test_investment_bank_table() -> None:
+    """Тестирование investment_bank_table для нескольких месяцев и лимитов."""
+    transactions = pd.DataFrame({
+        'Дата операции': pd.to_datetime(['2023-01-01 12:00:00', '2023-01-15 15:30:00', '2023-02-10 18:00:00']),
+        'Сумма операции': [512.0, 490.0, -775.0]
+    })
+    result = investment_bank_table(transactions, ['2023-01', '2023-02', '2023-03'], [10, 50, 100])
+
+    assert list(result.index.astype(str)) == ['2023-01', '2023-02', '2023-03']
+    assert list(result.columns) == [10, 50, 100]
+    assert result.loc['2023-01', 100] == 98
+    assert result.loc['2023-02', 50] == 25  # -775 округляется до -750
+    assert result.loc['2023-03'].sum() == 0
+
+    with pytest.raises(ValueError):
+        investment_bank_table(transactions, ['2023-01'], [0])
+
+
+def test_simple_search(transactions_mock: pd.DataFrame) -> None:
+    """Тестирование simple_search: результат — последовательность словарей."""
     result = simple_search(transactions_mock, query="Кафе")
+    assert isinstance(result, TransactionRecords)
     assert len(result) == 1
     assert result[0]['Описание'] == 'Кафе'
-    mock_to_dict.assert_called_once_with('records')
+    assert result[0]['Сумма операции'] == 500
 
 
-@patch("src.services.pd.DataFrame.to_dict")
-def test_search_phone_numbers(mock_to_dict: Any) -> None:
-    """Тестирование search_phone_numbers с mock."""
-    mock_to_dict.return_value = [
-        {'Дата операции': '2023-01-01', 'Описание': 'Пополнение телефона +7 123 456-78-90'}
-    ]
+def test_search_phone_numbers() -> None:
+    """Тестирование search_phone_numbers."""
     data = {
         'Дата операции': ['2023-01-01', '2023-02-15'],
         'Категория': ['Еда', 'Связь'],
@@ -80,16 +92,20 @@ def test_search_phone_numbers(mock_to_dict: Any) -> None:
     result = search_phone_numbers(transactions)
     assert len(result) == 1
     assert '+7 123 456-78-90' in result[0]['Описание']
-    mock_to_dict.assert_called_once_with('records')
 
 
-@patch("src.services.pd.DataFrame.to_dict")
-def test_search_personal_transfers(mock_to_dict: Any, transactions_mock: pd.DataFrame) -> None:
-    """Тестирование search_personal_transfers с mock."""
-    mock_to_dict.return_value = [
-        {'Дата операции': '2023-03-01', 'Описание': 'Иванов И.П. перевод средств'}
-    ]
+def test_search_personal_transfers(transactions_mock: pd.DataFrame) -> None:
+    """Тестирование search_personal_transfers."""
     result = search_personal_transfers(transactions_mock)
     assert len(result) == 1
     assert 'Иванов И.П.' in result[0]['Описание']
-    mock_to_dict.assert_called_once_with('records')
+    assert result.to_list() == [transactions_mock.iloc[3].to_dict()]
+
+
+def test_investment_bank_accepts_records() -> None:
+    """investment_bank принимает TransactionRecords и считает так же, как для списка словарей."""
+    transactions: List[Dict[str, Any]] = [
+        {'Дата операции': '2023-01-01 12:00:00', 'Сумма операции': 512},
+        {'Дата операции': '2023-01-15 15:30:00', 'Сумма операции': 490}
+    ]
+    assert investment_bank("2023-01", TransactionRecords.from_records(transactions), limit=100) == 98
@@ -0,0 +1,54 @@
+
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_category, spending_by_weekday
+from src.services import analyze_cashback_categories
+from src.store import TransactionStore, select_range
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    """Транзакции за несколько месяцев в произвольном порядке."""
+    return pd.DataFrame({
+        'Дата операции': ['15.03.2023 10:00:00', '01.01.2023 12:00:00', '31.01.2023 23:59:59',
+                          '01.02.2023 00:00:00', None, '20.12.2022 08:00:00'],
+        'Категория': ['Еда', 'Еда', 'Транспорт', 'Еда', 'Еда', 'Транспорт'],
+        'Сумма операции': [100.0, 200.0, 300.0, 400.0, 500.0, 600.0],
+        'Кэшбэк': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    })
+
+
+def test_store_sorts_and_partitions_by_month(transactions: pd.DataFrame) -> None:
+    """Транзакции без даты отбрасываются, остальные сортируются и делятся на месяцы."""
+    store = TransactionStore(transactions)
+
+    assert len(store) == 5
+    assert store.frame['Дата операции'].is_monotonic_increasing
+    assert [str(month) for month in store.months] == ['2022-12', '2023-01', '2023-02', '2023-03']
+    assert list(store.month(2023, 1)['Сумма операции']) == [200.0, 300.0]
+    assert store.month(2023, 6).empty
+
+
+@pytest.mark.parametrize("start, end", [
+    ('2023-01-01', '2023-01-31 23:59:59'),
+    ('2023-01-15', '2023-02-01'),
+    ('2022-11-01', '2024-01-01'),
+    ('2023-02-02', '2023-03-14'),
+    ('2023-05-01', '2023-04-01'),
+])
+def test_store_range_matches_mask(transactions: pd.DataFrame, start: str, end: str) -> None:
+    """Выборка по партициям совпадает с фильтрацией по маске."""
+    store = TransactionStore(transactions)
+    expected = select_range(store.frame, start, end)
+    pd.testing.assert_frame_equal(store.range(start, end), expected)
+
+
+def test_consumers_accept_store(transactions: pd.DataFrame) -> None:
+    """Функции анализа и отчеты принимают хранилище так же, как DataFrame."""
+    store = TransactionStore(transactions)
+
+    assert analyze_cashback_categories(store, year=2023, month=1) == {'Транспорт': 3.0, 'Еда': 2.0}
+    assert list(spending_by_category(store, 'Еда', '2023-03-31')['Сумма операции']) == [200.0, 400.0, 100.0]
+    pd.testing.assert_frame_equal(spending_by_weekday(store, '2023-03-31'),
+                                  spending_by_weekday(store.frame, '2023-03-31'))
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.services import analyze_cashback_categories
+from src.streaming import accumulate_group_sums, iter_transactions
+from src.utils import load_transactions
+from src.views import get_card_summary
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """Выгрузка из нескольких месяцев и карт."""
+    return pd.DataFrame({
+        'Дата операции': ['01.01.2023 12:00:00', '15.01.2023 15:30:00', '01.02.2023 18:00:00',
+                          '20.01.2023 10:00:00', '21.01.2023 11:00:00'],
+        'Номер карты': ['*7197', '*4556', '*7197', '*4556', '*7197'],
+        'Сумма платежа': [-500.0, -300.0, -800.0, -100.0, -50.0],
+        'Кэшбэк': [5.0, 3.0, 8.0, None, 1.0],
+        'Категория': ['Еда', 'Транспорт', 'Еда', 'Транспорт', 'Еда'],
+        'Описание': ['Ресторан', 'Такси', 'Супермаркет', 'Такси', 'Кофейня']
+    })
+
+
+@pytest.mark.parametrize("extension", [".xlsx", ".csv"])
+def test_iter_transactions_yields_typed_chunks(operations: pd.DataFrame, tmp_path: Path, extension: str) -> None:
+    """Файл читается пакетами заданного размера, каждый пакет приведен к схеме."""
+    path = tmp_path / f"operations{extension}"
+    if extension == ".csv":
+        operations.to_csv(path, index=False)
+    else:
+        operations.to_excel(path, index=False)
+
+    chunks = list(iter_transactions(str(path), chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert all(chunk['Дата операции'].dtype == 'datetime64[ns]' for chunk in chunks)
+    assert chunks[0]['Дата операции'].iloc[1] == pd.Timestamp('2023-01-15 15:30:00')
+
+
+def test_streaming_consumers_match_full_load(operations: pd.DataFrame, tmp_path: Path) -> None:
+    """Агрегации по потоку пакетов совпадают с агрегациями по всему DataFrame."""
+    path = tmp_path / "operations.xlsx"
+    operations.to_excel(path, index=False)
+    full = load_transactions(str(path), use_cache=False)
+
+    assert (analyze_cashback_categories(iter_transactions(str(path), chunk_size=2), year=2023, month=1) ==
+            analyze_cashback_categories(full, year=2023, month=1) == {'Еда': 6.0, 'Транспорт': 3.0})
+    assert get_card_summary(iter_transactions(str(path), chunk_size=2)) == get_card_summary(full)
+
+
+def test_accumulate_group_sums_keeps_first_seen_order() -> None:
+    """Суммы по группам накапливаются между пакетами в порядке первого появления."""
+    chunks = [
+        pd.DataFrame({'key': ['b', 'a'], 'value': [1.0, 2.0]}),
+        pd.DataFrame({'key': ['c', 'b'], 'value': [3.0, 4.0]}),
+    ]
+    result = accumulate_group_sums(iter(chunks), 'key', 'value')
+    assert result.to_dict() == {'b': 5.0, 'a': 2.0, 'c': 3.0}
+    assert list(result.index) == ['b', 'a', 'c']
@@ -1,9 +1,10 @@
-from unittest.mock import MagicMock, patch
+import time
 
 import pandas as pd
 
 from src.views import (generate_main_page_response, get_card_summary, get_currency_rates, get_greeting,
-                       get_stock_prices, get_top_transactions)
+                       get_stock_prices, get_top_transactions, get_top_transactions_by_group)
+from tests.conftest import StubMarketDataServer
 
 
 # Тестирование функции get_greeting
@@ -44,6 +45,22 @@ def test_get_card_summary() -> None:
     assert result == expected_result
 
 
+# Тестирование get_card_summary со ставками кешбэка
+def test_get_card_summary_with_rates() -> None:
+    """Ставки по картам имеют приоритет над ставками по категориям, остальное — ставка по умолчанию."""
+    transactions = pd.DataFrame({
+        'Номер карты': ['*1111', '*2222', '*1111', '*3333', None],
+        'Сумма платежа': [1000, 200, 500, 100, 50],
+        'Категория': ['Супермаркеты', 'Такси', 'Аптеки', 'Такси', 'Такси']
+    })
+
+    result = get_card_summary(transactions, card_rates={'*2222': 0.1}, category_rates={'Супермаркеты': 0.05})
+
+    assert [card['last_digits'] for card in result] == ['1111', '2222', '3333']
+    assert [round(card['cashback'], 2) for card in result] == [55.0, 20.0, 1.0]
+    assert [card['total_spent'] for card in result] == [1500, 200, 100]
+
+
 # Тестирование функции get_top_transactions
 def test_get_top_transactions() -> None:
     """Тестирование функции get_top_transactions."""
@@ -63,18 +80,32 @@ def test_get_top_transactions() -> None:
     assert result == expected_result
 
 
-# Тестирование функции get_currency_rates с использованием mock
-@patch('requests.get')
-def test_get_currency_rates(mock_get: MagicMock) -> None:
-    """Тестирование функции get_currency_rates с использованием mock."""
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        'rates': {'USD': 74.3, 'EUR': 88.7}
+# Тестирование топ-k с окном дат и группировкой
+def test_get_top_transactions_window_and_groups() -> None:
+    """Тестирование get_top_transactions и get_top_transactions_by_group с параметрами."""
+    transactions = pd.DataFrame({
+        'Дата операции': pd.to_datetime(['2023-12-01', '2023-12-10', '2023-12-20', '2023-12-25', '2024-01-05']),
+        'Номер карты': ['*1111', '*2222', '*1111', '*1111', '*2222'],
+        'Сумма платежа': [100, 900, 300, 200, 1000],
+        'Категория': ['Еда', 'Техника', 'Еда', 'Одежда', 'Техника'],
+        'Описание': ['A', 'B', 'C', 'D', 'E']
+    })
+
+    result = get_top_transactions(transactions, k=2, start='2023-12-01', end='2023-12-31')
+    assert [txn['description'] for txn in result] == ['B', 'C']
+
+    groups = get_top_transactions_by_group(transactions, 'Номер карты', k=2)
+    assert {card: [txn['amount'] for txn in txns] for card, txns in groups.items()} == {
+        '*1111': [300, 200],
+        '*2222': [1000, 900]
     }
-    mock_get.return_value = mock_response
 
-    result = get_currency_rates()
+
+# Тестирование функции get_currency_rates на локальном сервере
+def test_get_currency_rates(market_server: StubMarketDataServer) -> None:
+    """Тестирование функции get_currency_rates на локальном сервере."""
+    with market_server.client() as client:
+        result = get_currency_rates(client)
     expected_result = [
         {"currency": "USD", "rate": 74.3},
         {"currency": "EUR", "rate": 88.7}
@@ -83,25 +114,14 @@ def test_get_currency_rates(mock_get: MagicMock) -> None:
     assert result == expected_result
 
 
-# Тестирование функции get_stock_prices с использованием mock
-@patch('requests.get')
-def test_get_stock_prices(mock_get: MagicMock) -> None:
-    """Тестирование функции get_stock_prices с использованием mock."""
-    stock_list = ["AAPL", "GOOGL"]
-
-    # Mocking response for AAPL
-    mock_response_aapl = MagicMock()
-    mock_response_aapl.status_code = 200
-    mock_response_aapl.json.return_value = {'price': 150}
-
-    # Mocking response for GOOGL
-    mock_response_googl = MagicMock()
-    mock_response_googl.status_code = 200
-    mock_response_googl.json.return_value = {'price': 2800}
+# Тестирование функции get_stock_prices на локальном сервере
+def test_get_stock_prices(market_server: StubMarketDataServer) -> None:
+    """Тестирование функции get_stock_prices на локальном сервере."""
+    stock_list = ["AAPL", "GOOGL", "UNKNOWN"]
+    market_server.prices = {'AAPL': 150, 'GOOGL': 2800}
 
-    mock_get.side_effect = [mock_response_aapl, mock_response_googl]
-
-    result = get_stock_prices(stock_list)
+    with market_server.client() as client:
+        result = get_stock_prices(stock_list, client)
     expected_result = [
         {"stock": "AAPL", "price": 150},
         {"stock": "GOOGL", "price": 2800}
@@ -110,22 +130,30 @@ def test_get_stock_prices(mock_get: MagicMock) -> None:
     assert result == expected_result
 
 
-# Тестирование функции generate_main_page_response
-@patch('requests.get')
-def test_generate_main_page_response(mock_get: MagicMock) -> None:
-    """Тестирование функции generate_main_page_response с использованием mock."""
-    # Mock responses for currency rates and stock prices
-    mock_response_currency = MagicMock()
-    mock_response_currency.status_code = 200
-    mock_response_currency.json.return_value = {
-        'rates': {'USD': 74.3, 'EUR': 88.7}
-    }
+# Тестирование параллельной загрузки и таймаутов
+def test_market_data_client_fetches_concurrently(market_server: StubMarketDataServer) -> None:
+    """Запросы по всем тикерам выполняются параллельно, зависший запрос ограничен таймаутом."""
+    symbols = [f"T{i}" for i in range(8)]
+    market_server.prices = {symbol: i for i, symbol in enumerate(symbols)}
+    market_server.delay = 0.2
+
+    with market_server.client(max_workers=9) as client:
+        started = time.perf_counter()
+        rates, prices = client.get_market_data(symbols)
+        elapsed = time.perf_counter() - started
+
+    assert [price["stock"] for price in prices] == symbols
+    assert len(rates) == 2
+    assert elapsed < 0.2 * len(symbols) / 2
 
-    mock_response_stock = MagicMock()
-    mock_response_stock.status_code = 200
-    mock_response_stock.json.return_value = {'price': 150}
+    with market_server.client(timeout=0.05) as client:
+        assert client.get_currency_rates() == []
 
-    mock_get.side_effect = [mock_response_currency, mock_response_stock]
+
+# Тестирование функции generate_main_page_response на локальном сервере
+def test_generate_main_page_response(market_server: StubMarketDataServer) -> None:
+    """Тестирование функции generate_main_page_response на локальном сервере."""
+    market_server.prices = {'AAPL': 150}
 
     transactions = pd.DataFrame({
         'Номер карты': [1234567890123456, 9876543210987654],
@@ -158,7 +186,8 @@ def test_generate_main_page_response(mock_get: MagicMock) -> None:
         ]
     }
 
-    result = generate_main_page_response(transactions, current_time, user_settings)
+    with market_server.client() as client:
+        result = generate_main_page_response(transactions, current_time, user_settings, client)
 
     # Приводим все числовые значения к типу float
     result["cards"] = [
@@ -171,3 +200,57 @@ def test_generate_main_page_response(mock_get: MagicMock) -> None:
     ]
 
     assert result == expected_result
+
+
+# Тестирование параллельной сборки главной страницы
+def test_generate_main_page_response_parallel(market_server: StubMarketDataServer) -> None:
+    """Параллельная сборка дает тот же ответ, что и последовательная, и добавляет время разделов."""
+    market_server.prices = {'AAPL': 150, 'GOOGL': 2800}
+    transactions = pd.DataFrame({
+        'Номер карты': ['*3456', '*7654'],
+        'Сумма платежа': [500, 700],
+        'Категория': ['Еда', 'Техника'],
+        'Описание': ['Покупка', 'Покупка'],
+        'Дата операции': ['2023-12-25 12:00:00', '2023-12-26 12:00:00']
+    })
+    user_settings = {"user_stocks": ["AAPL", "GOOGL"]}
+
+    with market_server.client() as client:
+        sequential = generate_main_page_response(transactions, "2023-12-27 08:00:00", user_settings, client)
+        result = generate_main_page_response(transactions, "2023-12-27 08:00:00", user_settings, client,
+                                             parallel=True)
+
+    assert result.pop("degraded") == []
+    timings = result.pop("timings")
+    assert set(timings) == {"greeting", "cards", "top_transactions", "currency_rates", "stock_prices"}
+    assert all(value >= 0 for value in timings.values())
+    assert result == sequential
+
+
+# Тестирование сроков разделов главной страницы
+def test_generate_main_page_response_deadlines(market_server: StubMarketDataServer) -> None:
+    """Медленные сетевые разделы не задерживают ответ и помечаются как неполные."""
+    market_server.prices = {'AAPL': 150}
+    market_server.delay = 0.5
+    transactions = pd.DataFrame({
+        'Номер карты': ['*3456'],
+        'Сумма платежа': [500],
+        'Категория': ['Еда'],
+        'Описание': ['Покупка'],
+        'Дата операции': ['2023-12-25 12:00:00']
+    })
+
+    with market_server.client() as client:
+        started = time.perf_counter()
+        result = generate_main_page_response(
+            transactions, "2023-12-27 14:00:00", {"user_stocks": ["AAPL"]}, client, parallel=True,
+            deadlines={"currency_rates": 0.1, "stock_prices": 0.1}
+        )
+        elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5
+    assert result["greeting"] == "Добрый день"
+    assert result["cards"][0]["total_spent"] == 500
+    assert result["currency_rates"] == []
+    assert result["stock_prices"] == []
+    assert sorted(result["degraded"]) == ["currency_rates", "stock_prices"]